@@ -0,0 +1,82 @@
+"""Benchmarks sound bank export: encoding time with 1..N threads, size with each compression, and the time to load one
+sound from a bank.
+
+Renders a pack of preset sounds at several pitches, then writes it as a bank with each compression and thread count.
+Loading one sound only reads that sound's blob, so its time shouldn't depend on the size of the bank. Runs headless (no
+audio device or display).
+
+Usage: python benchmarks/bank_benchmark.py [num_sounds] [seconds]
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import soundbank
+from generator import Generator
+
+
+SAMPLE_RATE = 22050
+
+
+def render_pack(num_sounds, seconds):
+    """Renders num_sounds sounds, cycling through the presets at rising pitches"""
+
+    generator = Generator(SAMPLE_RATE, -16, 2, 4096)
+    presets = sorted(Generator.PRESETS)
+    sounds = []
+
+    for i in xrange(num_sounds):
+        preset = presets[i % len(presets)]
+        generator.apply_parameters(dict(Generator.PRESETS[preset], length=seconds, pitch=220 * 2 ** (i / 24.0)))
+        sounds.append(("%s_%03d" % (preset, i), generator.render_sound().copy()))
+
+    return sounds
+
+
+def main():
+    """Prints the encoding time, size and load time of a bank for each compression and thread count"""
+
+    num_sounds = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    sounds = render_pack(num_sounds, seconds)
+    raw_size = sum(sound.samples.shape[0] * sound.samples.shape[1] * 2 for name, sound in sounds)
+
+    thread_counts = sorted(set([1, multiprocessing.cpu_count()]))
+    output_dir = tempfile.mkdtemp()
+
+    print("%d sounds of %.1f s, %.1f MB as 16-bit PCM" % (num_sounds, seconds, raw_size / 1e6))
+    print("%-8s %8s %10s %10s %12s %14s" % ("compress", "threads", "write s", "speed-up", "size ratio", "load one ms"))
+
+    try:
+        for compression in soundbank.COMPRESSIONS:
+            single_time = None
+
+            for threads in thread_counts:
+                file_name = os.path.join(output_dir, "%s_%d.bank" % (compression, threads))
+
+                start = time.time()
+                soundbank.write_bank(file_name, sounds, "int16", compression, threads=threads)
+                write_time = time.time() - start
+                single_time = single_time or write_time
+
+                bank = soundbank.SoundBank(file_name)
+                name = bank.names()[len(sounds) // 2]
+                start = time.time()
+                bank.load(name).samples.sum()
+                load_time = time.time() - start
+
+                print("%-8s %8d %10.3f %9.1fx %12.3f %14.2f" % (compression, threads, write_time,
+                                                             single_time / write_time,
+                                                             os.path.getsize(file_name) / float(raw_size),
+                                                             1000 * load_time))
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    main()
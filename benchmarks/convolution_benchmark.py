@@ -0,0 +1,90 @@
+"""Benchmarks convolution reverb and the filters against impulse response length.
+
+For each impulse response length, times partitioned FFT convolution (filters.convolve) and, for the shorter lengths,
+direct time-domain convolution (numpy.convolve, already much faster than a per-sample Python loop). The number of
+partitions is capped (filters.MAX_PARTITIONS), so the FFT cost per output frame grows roughly with log(IR length) and
+its normalised column stays roughly flat, while the direct cost grows linearly with the IR length. Biquad and FIR
+filters are timed alongside. Runs headless (no audio device or display).
+
+Usage: python benchmarks/convolution_benchmark.py [seconds]
+"""
+import math
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import filters
+
+
+SAMPLE_RATE = 22050
+
+# Impulse response lengths, in seconds (a small room up to a large cave)
+IR_LENGTHS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0]
+
+# Direct convolution is only timed up to this many taps, as it gets very slow
+DIRECT_MAX_TAPS = 11025
+
+
+def time_call(function, *args):
+    """Returns how long a call took, in seconds (the best of three for quick calls)"""
+
+    times = []
+    while len(times) < 3 and sum(times) < 2.0:
+        start = time.time()
+        function(*args)
+        times.append(time.time() - start)
+
+    return min(times)
+
+
+def direct(samples, impulse_response):
+    """Time-domain convolution of each channel"""
+
+    return numpy.column_stack([numpy.convolve(samples[:, channel], impulse_response[:, channel])
+                               for channel in xrange(samples.shape[1])])
+
+
+def main():
+    """Prints convolution and filter throughput for each impulse response length"""
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    num_frames = int(seconds * SAMPLE_RATE)
+    samples = numpy.random.RandomState(0).standard_normal((num_frames, 2))
+
+    print("%.0f s of stereo audio" % seconds)
+    print("%8s %8s %12s %14s %12s %14s" % ("IR s", "taps", "FFT s", "FFT ns/fr/log", "direct s", "direct ns/fr/tap"))
+
+    for ir_length in IR_LENGTHS:
+        impulse_response = filters.synthetic_impulse_response(SAMPLE_RATE, ir_length)
+        taps = impulse_response.shape[0]
+
+        fft_time = time_call(filters.convolve, samples, impulse_response)
+        # Normalised by (N + M) log M, the output length times log M: roughly constant if the cost is O(N log N)
+        fft_normalised = 1e9 * fft_time / ((num_frames + taps) * math.log(max(taps, 2), 2))
+
+        if taps <= DIRECT_MAX_TAPS:
+            direct_time = time_call(direct, samples, impulse_response)
+            direct_line = "%12.3f %14.3f" % (direct_time, 1e9 * direct_time / (num_frames * taps))
+        else:
+            direct_line = "%12s %14s" % ("-", "-")
+
+        print("%8g %8d %12.3f %14.2f %s" % (ir_length, taps, fft_time, fft_normalised, direct_line))
+
+    print("")
+    print("%-24s %14s" % ("filter", "frames/s"))
+
+    for filter_type in ("lowpass", "peaking", "highshelf"):
+        filter_time = time_call(filters.biquad_filter, samples, filter_type, 1000, SAMPLE_RATE, 0.7071, 6.0)
+        print("%-24s %14.0f" % ("biquad " + filter_type, num_frames / filter_time))
+
+    for num_taps in (31, 101, 1001):
+        taps = filters.fir_lowpass(1000, SAMPLE_RATE, num_taps)
+        print("%-24s %14.0f" % ("fir %d taps" % num_taps, num_frames / time_call(filters.fir_filter, samples, taps)))
+
+
+if __name__ == "__main__":
+    main()
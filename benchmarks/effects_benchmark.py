@@ -0,0 +1,74 @@
+"""Benchmarks the vectorised DynSound effects against the original per-sample effects.
+
+Times each effect both ways on 16-bit stereo sounds of a few lengths, prints the speed-up and checks that both give
+exactly the same samples. The per-sample effects are slow, so the lengths are kept short. Runs headless (no audio
+device or display).
+
+Usage: python benchmarks/effects_benchmark.py [seconds]
+"""
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dynsound import DynSound
+from tests import baseline
+
+
+SAMPLE_RATE = 22050
+
+# Effect name, per-sample version (samples -> samples) and vectorised version (DynSound -> None)
+EFFECTS = [
+    ("change_volume", lambda samples: baseline.change_volume(samples, -6, -32768, 32767),
+     lambda sound: sound.change_volume(-6)),
+    ("change_frequency", lambda samples: baseline.change_frequency(samples, 1.5),
+     lambda sound: sound.change_frequency(1.5)),
+    ("change_frequency_shifting", lambda samples: baseline.change_frequency_shifting(samples, SAMPLE_RATE, 0.8, 0.5),
+     lambda sound: sound.change_frequency_shifting(0.8, 0.5)),
+    ("add_plopper", lambda samples: baseline.add_plopper(samples, SAMPLE_RATE, 10),
+     lambda sound: sound.add_plopper(10)),
+    ("mix", lambda samples: baseline.mix(samples, samples[::-1], SAMPLE_RATE, -32768, 32767, 0.01),
+     lambda sound: sound.mix(make_sound(sound.samples[::-1]), 0.01)),
+]
+
+
+def make_sound(samples):
+    """Returns a 16-bit sound holding a copy of samples"""
+
+    sound = DynSound(num_frames=1, sample_rate=SAMPLE_RATE)
+    sound.set_samples(samples.copy())
+
+    return sound
+
+
+def main():
+    """Prints per-sample and vectorised times of each effect"""
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    lengths = [int(seconds * SAMPLE_RATE / 10), int(seconds * SAMPLE_RATE)]
+
+    print("%-26s %8s %14s %14s %10s %6s" % ("effect", "frames", "per-sample s", "vectorised s", "speed-up", "same"))
+
+    for name, per_sample, vectorised in EFFECTS:
+        for num_frames in lengths:
+            samples = numpy.random.RandomState(num_frames).randint(-32768, 32768, (num_frames, 2)).astype("<h")
+
+            start = time.time()
+            expected = per_sample(samples.copy())
+            per_sample_time = time.time() - start
+
+            sound = make_sound(samples)
+            start = time.time()
+            vectorised(sound)
+            vectorised_time = max(time.time() - start, 1e-6)
+
+            print("%-26s %8d %14.3f %14.5f %9.0fx %6s" % (name, num_frames, per_sample_time, vectorised_time,
+                                                          per_sample_time / vectorised_time,
+                                                          numpy.array_equal(expected, sound.samples)))
+
+
+if __name__ == "__main__":
+    main()
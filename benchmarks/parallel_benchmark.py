@@ -0,0 +1,52 @@
+"""Benchmarks parallel rendering of a parameter sweep (frequency x echoes x plops) with 1..N processes.
+
+Runs headless (no audio device or display).
+
+Usage: python benchmarks/parallel_benchmark.py [max_processes]
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import render
+
+
+SWEEP = {"name": "sweep", "length": 2, "frequency": [0.5, 1.0, 2.0, 3.0], "echoes": [0, 2, 4], "plops": [0, 8, 30]}
+
+
+def main():
+    """Renders the sweep once per process count and prints the speed-up over one process"""
+
+    max_processes = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    output_dir = tempfile.mkdtemp()
+
+    try:
+        entries = render.expand_sweeps([SWEEP])
+        jobs = []
+        for index, entry in enumerate(entries):
+            name, parameters = render.entry_parameters(entry, index)
+            jobs.append((name, parameters, os.path.join(output_dir, name + ".wav"), "int16"))
+
+        print("%d renders per run" % len(jobs))
+
+        serial_time = None
+        for processes in range(1, max_processes + 1):
+            start = time.time()
+            results = render.render_batch(jobs, processes=processes)
+            elapsed = time.time() - start
+
+            serial_time = serial_time or elapsed
+            failures = len([result for result in results if "error" in result])
+            print("%3d processes  %8.3fs  %6.2fx speed-up  %8.1f renders/s  %d failed" % (
+                processes, elapsed, serial_time / elapsed, len(jobs) / elapsed, failures))
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmarks each resampling mode: throughput for a constant ratio and a sweep, and how much aliasing it lets through.
+
+Aliasing is measured by repitching a tone that ends up above the Nyquist frequency, which an ideal resampler would
+remove completely; whatever is left has folded back down as an alias. The passband gain of a tone that stays below
+Nyquist is reported alongside, to show the modes aren't simply quieter.
+
+Runs headless (no audio device or display).
+
+Usage: python benchmarks/resample_benchmark.py [seconds]
+"""
+import math
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import effects
+import resample
+
+
+SAMPLE_RATE = 22050
+RATIO = 2.5
+
+
+def tone(frequency, num_frames):
+    """Returns a full-scale int16 stereo sine tone"""
+
+    frames = numpy.arange(num_frames)
+    wave = (32767 * numpy.sin(2.0 * math.pi * frequency * frames / SAMPLE_RATE)).astype("<h")
+
+    return numpy.column_stack((wave, wave))
+
+
+def nearest(samples, ratio):
+    """The original repitch, for comparison"""
+
+    return effects.resample_by_index(samples, effects.frequency_index_map(samples.shape[0], ratio)).astype(numpy.float64)
+
+
+def level(samples):
+    """Returns the RMS level of some samples in dB relative to a full-scale sine"""
+
+    rms = math.sqrt(numpy.mean(numpy.square(samples.astype(numpy.float64))))
+
+    return 20 * math.log10(max(rms, 1e-9) / (32767 / math.sqrt(2)))
+
+
+def time_call(function, *args):
+    """Returns the result of a call and how long it took"""
+
+    start = time.time()
+    result = function(*args)
+
+    return result, time.time() - start
+
+
+def main():
+    """Prints throughput and aliasing for each mode"""
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    num_frames = int(seconds * SAMPLE_RATE)
+
+    source = tone(440, num_frames)
+    # 3 kHz repitched by 2.5 lands at 7.5 kHz, below Nyquist; 6 kHz lands at 15 kHz, above it
+    in_band = tone(3000, SAMPLE_RATE)
+    out_of_band = tone(6000, SAMPLE_RATE)
+
+    print("%.0f s of audio, ratio %g" % (seconds, RATIO))
+    print("%-8s %14s %14s %12s %12s" % ("mode", "constant fr/s", "sweep fr/s", "passband dB", "alias dB"))
+
+    for mode in ("original",) + resample.MODES:
+        if mode == "original":
+            constant, constant_time = time_call(nearest, source, RATIO)
+            sweep_time = float("nan")
+            passband = nearest(in_band, RATIO)
+            alias = nearest(out_of_band, RATIO)
+        else:
+            constant, constant_time = time_call(resample.resample, source, RATIO, mode)
+            sweep, sweep_time = time_call(resample.resample_sweep, source, SAMPLE_RATE, 1.0, 3.0, mode)
+            passband = resample.resample(in_band, RATIO, mode)
+            alias = resample.resample(out_of_band, RATIO, mode)
+
+        print("%-8s %14.0f %14.0f %12.1f %12.1f" % (mode, constant.shape[0] / max(constant_time, 1e-9),
+                                                    num_frames / max(sweep_time, 1e-9), level(passband), level(alias)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Benchmark suite: times every DynSound and Generator operation over a matrix of lengths, channel counts and parameters.
+
+Each case runs in its own process so that its peak memory can be measured. For each case the suite reports operations
+per second, samples (frames x channels) per second and the peak RSS above the process's baseline. Results can be
+written as JSON and compared against an earlier run to spot regressions. Runs headless (no audio device or display).
+
+Usage: python benchmarks/run.py [--lengths 1,10,60] [--channels 1,2] [--only change_volume,save] [--floating]
+                                [--output results.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy
+
+import filters
+from generator import Generator
+
+
+SAMPLE_RATE = 22050
+
+SCREAM_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "wilhelmScream.wav")
+
+# Minimum time to spend repeating each case, in seconds
+MIN_TIME = 0.2
+MAX_REPEATS = 100
+
+
+def op_create_sine(generator, sound, value):
+    """Runs Generator.create_sine for a sound of the test length"""
+
+    return generator.create_sine(440, sound.samples.shape[0] / float(SAMPLE_RATE))
+
+
+def op_change_volume(generator, sound, value):
+    """Runs DynSound.change_volume"""
+
+    sound.change_volume(value)
+
+
+def op_change_frequency(generator, sound, value):
+    """Runs DynSound.change_frequency"""
+
+    sound.change_frequency(value)
+
+
+def op_change_frequency_shifting(generator, sound, value):
+    """Runs DynSound.change_frequency_shifting"""
+
+    sound.change_frequency_shifting(value[0], value[1])
+
+
+def op_add_plopper(generator, sound, value):
+    """Runs DynSound.add_plopper"""
+
+    sound.add_plopper(value)
+
+
+def op_add_echo(generator, sound, value):
+    """Runs DynSound.add_echo"""
+
+    sound.add_echo(0.3, -4, value)
+
+
+def op_apply_filter(generator, sound, value):
+    """Runs DynSound.apply_filter"""
+
+    sound.apply_filter(value, 1000)
+
+
+def op_add_reverb(generator, sound, value):
+    """Runs DynSound.add_reverb with a synthetic room of the given reverberation time"""
+
+    sound.add_reverb(filters.synthetic_impulse_response(SAMPLE_RATE, value, sound.samples.shape[1]))
+
+
+def op_mix(generator, sound, value):
+    """Runs DynSound.mix, mixing the sound onto itself at an offset"""
+
+    sound.mix(sound, value)
+
+
+def op_copy(generator, sound, value):
+    """Runs DynSound.copy"""
+
+    return sound.copy()
+
+
+def op_resize(generator, sound, value):
+    """Runs DynSound.resize, by a factor of the length"""
+
+    sound.resize(int(sound.samples.shape[0] * value))
+
+
+def op_save(generator, sound, value):
+    """Runs DynSound.save to a temporary file"""
+
+    handle, file_name = tempfile.mkstemp(suffix=".wav")
+    os.close(handle)
+
+    try:
+        sound.save(file_name, value)
+    finally:
+        os.remove(file_name)
+
+
+def op_validate_sound(generator, sound, value):
+    """Runs Generator.validate_sound for a preset, from an empty cache"""
+
+    generator.apply_parameters(dict(Generator.PRESETS[value], length=sound.samples.shape[0] / float(SAMPLE_RATE)))
+
+    # Start from nothing cached, so every stage is timed
+    generator.effect_chain.clear()
+    generator.render_cache.clear()
+    generator.sound_valid = False
+    generator.validate_sound()
+
+
+def op_validate_file(generator, sound, value):
+    """Runs Generator.validate_sound for a preset applied to the bundled scream, from an empty render cache (the
+    decoded file stays cached, as it would between renders)"""
+
+    parameters = dict(Generator.PRESETS[value], source=SCREAM_FILE, length=sound.samples.shape[0] / float(SAMPLE_RATE))
+    generator.apply_parameters(parameters)
+
+    generator.effect_chain.clear()
+    generator.render_cache.clear()
+    generator.sound_valid = False
+    generator.validate_sound()
+
+
+# Operation name: (function, parameter values)
+OPERATIONS = [
+    ("create_sine", op_create_sine, [None]),
+    ("change_volume", op_change_volume, [-6, 6]),
+    ("change_frequency", op_change_frequency, [0.5, 2.5]),
+    ("change_frequency_shifting", op_change_frequency_shifting, [(2, 3), (0.5, 0.5)]),
+    ("add_plopper", op_add_plopper, [4, 80]),
+    ("add_echo", op_add_echo, [1, 4]),
+    ("apply_filter", op_apply_filter, ["lowpass", "peaking"]),
+    ("add_reverb", op_add_reverb, [0.5, 4.0]),
+    ("mix", op_mix, [0.0, 0.1]),
+    ("copy", op_copy, [None]),
+    ("resize", op_resize, [0.5, 1.5]),
+    ("save", op_save, ["int16", "float32"]),
+    ("validate_sound", op_validate_sound, ["death", "laser"]),
+    ("validate_file", op_validate_file, ["death", "laser"]),
+]
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB (Linux reports ru_maxrss in KB)"""
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_case(operation, length, num_channels, value_index, floating):
+    """
+    Times one case in this process.
+
+    Args:
+        operation (string): Name of the operation, see OPERATIONS
+        length (float): Length of the test sound, in seconds
+        num_channels (int): Number of channels of the test sound
+        value_index (int): Which of the operation's parameter values to use
+        floating (bool): Whether to use float sounds
+    Returns:
+        (dict) The result
+    """
+
+    function, values = [(function, values) for name, function, values in OPERATIONS if name == operation][0]
+    value = values[value_index]
+
+    generator = Generator(SAMPLE_RATE, -16, num_channels, 4096, floating=floating)
+    base = generator.create_sine(440, length)
+    num_samples = base.samples.size
+
+    rss_before = peak_rss_mb()
+    times = []
+
+    while len(times) < MAX_REPEATS and (len(times) < 3 or sum(times) < MIN_TIME):
+        # Each repeat works on its own copy, so in-place operations don't build on each other
+        sound = base.copy()
+        sound.get_writable_samples()
+
+        start = time.time()
+        function(generator, sound, value)
+        times.append(time.time() - start)
+
+    mean_time = sum(times) / len(times)
+
+    return {"operation": operation, "value": value, "length": length, "channels": num_channels, "floating": floating,
+            "repeats": len(times), "mean_time": mean_time, "best_time": min(times),
+            "ops_per_second": 1.0 / max(mean_time, 1e-9), "samples_per_second": num_samples / max(mean_time, 1e-9),
+            "peak_memory_mb": peak_rss_mb() - rss_before}
+
+
+def case_key(result):
+    """Returns what identifies a case, for matching results between runs"""
+
+    return (result["operation"], json.dumps(result["value"]), result["length"], result["channels"], result["floating"])
+
+
+def print_result(result, previous=None):
+    """Prints one result line, with the change from a previous run if there is one"""
+
+    line = "%-26s %-12s %6gs %dch %12.1f ops/s %12.3g samples/s %8.1f MB" % (
+        result["operation"], json.dumps(result["value"]), result["length"], result["channels"],
+        result["ops_per_second"], result["samples_per_second"], result["peak_memory_mb"])
+
+    if previous:
+        line += "  %+6.0f%%" % (100.0 * (result["ops_per_second"] / previous["ops_per_second"] - 1.0))
+
+    print(line)
+    sys.stdout.flush()
+
+
+def main():
+    """Runs every case in a fresh process and prints (and optionally saves) the results"""
+
+    parser = argparse.ArgumentParser(description="Benchmark every DynSound and Generator operation.")
+    parser.add_argument("--lengths", default="1,10,60", help="Comma-separated sound lengths, in seconds")
+    parser.add_argument("--channels", default="1,2", help="Comma-separated channel counts")
+    parser.add_argument("--only", help="Comma-separated operations to run (default: all)")
+    parser.add_argument("--floating", action="store_true", help="Benchmark float sounds instead of 16-bit ones")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare ops/s against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # Child process: run one case and hand the result back as JSON
+        operation, length, num_channels, value_index = args.case.split(":")
+        print(json.dumps(run_case(operation, float(length), int(num_channels), int(value_index), args.floating)))
+        return
+
+    lengths = [float(length) for length in args.lengths.split(",")]
+    channel_counts = [int(channels) for channels in args.channels.split(",")]
+    only = args.only.split(",") if args.only else None
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as compare_file:
+            previous = dict((case_key(result), result) for result in json.load(compare_file)["results"])
+
+    results = []
+    for operation, function, values in OPERATIONS:
+        if only and operation not in only:
+            continue
+
+        for length in lengths:
+            for num_channels in channel_counts:
+                for value_index in range(len(values)):
+                    command = [sys.executable, os.path.abspath(__file__), "--case",
+                               "%s:%r:%d:%d" % (operation, length, num_channels, value_index)]
+                    if args.floating:
+                        command.append("--floating")
+
+                    result = json.loads(subprocess.check_output(command).splitlines()[-1])
+                    results.append(result)
+                    print_result(result, previous.get(case_key(result)))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"python": platform.python_version(), "numpy": numpy.__version__, "machine": platform.machine(),
+                       "time": time.time(), "results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
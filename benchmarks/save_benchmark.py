@@ -0,0 +1,68 @@
+"""Benchmarks DynSound.save: throughput and peak memory for sounds from 1 second to 10 minutes.
+
+Each save runs in its own process so that peak RSS can be measured per length. Runs headless (no audio device).
+
+Usage: python benchmarks/save_benchmark.py [sample_format]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy
+
+import wavfile
+
+
+LENGTHS = [1, 10, 60, 300, 600]  # seconds
+SAMPLE_RATE = 22050
+NUM_CHANNELS = 2
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB (Linux reports ru_maxrss in KB)"""
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_one(length, sample_format):
+    """Saves one sound of the given length and prints a result line"""
+
+    samples = numpy.random.RandomState(0).randint(-32768, 32767, (int(length * SAMPLE_RATE), NUM_CHANNELS), dtype="<i2")
+    buffer_mb = samples.nbytes / (1024.0 * 1024.0)
+    rss_before = peak_rss_mb()
+
+    handle, file_name = tempfile.mkstemp(suffix=".wav")
+    os.close(handle)
+
+    try:
+        start = time.time()
+        wavfile.write_wav(file_name, samples, SAMPLE_RATE, sample_format)
+        elapsed = time.time() - start
+    finally:
+        os.remove(file_name)
+
+    print("%6ds  %-8s %9.1f MB buffer  %9.1f MB peak RSS overhead  %8.3fs  %9.1f MB/s" % (
+        length, sample_format, buffer_mb, peak_rss_mb() - rss_before, elapsed, buffer_mb / max(elapsed, 1e-9)))
+
+
+def main():
+    """Runs every length in a fresh process"""
+
+    sample_format = sys.argv[1] if len(sys.argv) > 1 else "int16"
+
+    if len(sys.argv) > 2:
+        run_one(float(sys.argv[2]), sample_format)
+        return
+
+    for length in LENGTHS:
+        sys.stdout.flush()
+        subprocess.check_call([sys.executable, os.path.abspath(__file__), sample_format, str(length)])
+
+
+if __name__ == "__main__":
+    main()
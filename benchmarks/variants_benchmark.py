@@ -0,0 +1,80 @@
+"""Benchmarks batched variant rendering against rendering each variant on its own.
+
+Renders 64 pitch and echo variants of the pickup preset (16 pitches with 0 to 3 echoes each), first one at a time with Generator.render_sound and then in
+one call to Generator.render_variants, in each resampling mode. The render cache is cleared before every run, so both
+paths do all the work. The batched sounds are checked against the single renders. Runs headless (no audio device or
+display).
+
+Usage: python benchmarks/variants_benchmark.py [num_variants]
+"""
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import resample
+from generator import Generator
+
+
+SAMPLE_RATE = 22050
+
+
+def make_parameter_sets(num_variants):
+    """Returns pickup variants: pitches a semitone apart, each with 0 to 3 echoes (in that order, so that the single
+    renders can reuse the effect chain's cached stages between echo counts)"""
+
+    return [dict(Generator.PRESETS["pickup"], pitch=440 * 2 ** ((i // 4) / 12.0), echoes=i % 4)
+            for i in xrange(num_variants)]
+
+
+def render_singly(generator, parameter_sets):
+    """Renders each variant with render_sound"""
+
+    base_parameters = generator.get_parameters()
+    sounds = []
+
+    for parameters in parameter_sets:
+        generator.apply_parameters(base_parameters)
+        generator.apply_parameters(parameters)
+        sounds.append(generator.render_sound())
+
+    generator.apply_parameters(base_parameters)
+
+    return sounds
+
+
+def main():
+    """Prints the time of both paths in each resampling mode"""
+
+    num_variants = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    parameter_sets = make_parameter_sets(num_variants)
+
+    print("%d variants of the pickup" % num_variants)
+    print("%-8s %12s %12s %10s %14s" % ("mode", "single s", "batched s", "speed-up", "max difference"))
+
+    for mode in resample.MODES:
+        generator = Generator(SAMPLE_RATE, -16, 2, 4096)
+        generator.resample_mode = mode
+
+        generator.render_cache.clear()
+        start = time.time()
+        single_sounds = render_singly(generator, parameter_sets)
+        single_time = time.time() - start
+
+        generator.render_cache.clear()
+        start = time.time()
+        batched_sounds = generator.render_variants(parameter_sets)
+        batched_time = time.time() - start
+
+        difference = max(numpy.abs(single.samples - batched.samples).max()
+                         for single, batched in zip(single_sounds, batched_sounds))
+
+        print("%-8s %12.3f %12.3f %9.1fx %14g" % (mode, single_time, batched_time, single_time / batched_time,
+                                                 difference))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmarks drawing the waveform view from a min/max decimation pyramid against scanning every frame in view.
+
+For a 10 second sound at several sample rates, times building the pyramid, then finding the column extremes of views
+from the whole sound down to a few hundred frames, both from the pyramid and by scanning the frames. The pyramid's
+time should stay flat as the view grows while the scan grows with it. The spectrogram of each view is timed too. Runs
+headless (no window is opened).
+
+Usage: python benchmarks/waveview_benchmark.py [seconds]
+"""
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import waveview
+
+
+SAMPLE_RATES = [22050, 48000, 96000]
+
+# Pixel columns of the view
+WIDTH = 800
+
+
+def time_call(function, *args):
+    """Returns how long a call took, in seconds (the best of three for quick calls)"""
+
+    times = []
+    while len(times) < 3 and sum(times) < 2.0:
+        start = time.time()
+        function(*args)
+        times.append(time.time() - start)
+
+    return min(times)
+
+
+def scan_columns(samples, start, end, num_columns):
+    """Finds the lowest and highest sample in each column by reading every frame in view"""
+
+    edges = numpy.linspace(start, end, num_columns + 1).astype(numpy.intp)
+    frames = samples[start:end]
+
+    return (numpy.minimum.reduceat(frames.min(axis=1), edges[:-1] - start),
+            numpy.maximum.reduceat(frames.max(axis=1), edges[:-1] - start))
+
+
+def main():
+    """Prints pyramid build, view and spectrogram times for each sample rate and view length"""
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+
+    print("%.0f s of stereo audio, %d pixel columns" % (seconds, WIDTH))
+    print("%8s %10s %10s %12s %12s %14s" % ("rate", "view", "build ms", "pyramid ms", "scan ms", "spectrogram ms"))
+
+    for sample_rate in SAMPLE_RATES:
+        num_frames = int(seconds * sample_rate)
+        samples = numpy.random.RandomState(0).uniform(-32768, 32767, (num_frames, 2)).astype(numpy.float32)
+        mono_samples = samples.mean(axis=1)
+
+        build_time = time_call(waveview.MinMaxPyramid, samples)
+        pyramid = waveview.MinMaxPyramid(samples)
+
+        view = num_frames
+        while view >= WIDTH:
+            pyramid_time = time_call(pyramid.get_columns, 0, view, WIDTH)
+            scan_time = time_call(scan_columns, samples, 0, view, WIDTH)
+            spectrogram_time = time_call(waveview.spectrogram, mono_samples, 0, view, WIDTH, 100)
+
+            print("%8d %10d %10.1f %12.3f %12.3f %14.1f" % (sample_rate, view, 1000 * build_time, 1000 * pyramid_time,
+                                                           1000 * scan_time, 1000 * spectrogram_time))
+            view //= 8
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,43 @@
-import struct
-import wave
 import math
+import struct
 
 import numpy
 import pygame
 
+import effects
+import envelope
+import filters
+import resample
+import wavfile
+
 
-class DynSound:
-    """DynSound: A dynamic sound (editable sound) based on pygame.Sound
+class DynSound(object):
+    """DynSound: A dynamic sound (editable sound). The sound owns its samples; a pygame.Sound is only built from them
+    when the sound is played
 
         Attributes:
-            sound (pygame.Sound): source sound
+            samples (numpy.ndarray): sample data (frames x channels). May be a copy-on-write view of a WAV file on disk.
+                                     Read-only while it is shared with a copy of this sound; see get_writable_samples
+            sound (pygame.Sound): playback sound, created from the samples when needed. None if out of date
+            num_channels (int): number of channels
+            sample_rate (int): sample rate
+            sample_range (int): number of distinct sample values, minus one
+            sample_min (int): lowest sample value
+            sample_max (int): highest sample value
+            data_type (string): type of the samples played or saved, e.g. "<h" for signed 16-bit
+            floating (bool): whether the samples are float32 (on the same scale as data_type) rather than data_type.
+                             Effects don't clip float samples, so they only lose precision once, when quantised for
+                             playback or saving
+            clip_min (float): lowest value effects clip to: sample_min, or -inf for float samples
+            clip_max (float): highest value effects clip to: sample_max, or inf for float samples
+            dither (bool): whether to dither when quantising float samples
     """
-    sound = None
-    num_channels = 0
-    sample_rate = 0
-    sample_range = 0
-    sample_min = 0
-    sample_max = 0
-
-    def __init__(self, file_name):
-        """___init___: Create sound from file"""
-
-        self.sound = pygame.mixer.Sound(file_name)
-        self.num_channels = 2
 
-        self.sample_rate = 22050
+    # Sounds are created by the thousand (every effect stage and cache entry is one), so keep them small
+    __slots__ = ("samples", "sound", "num_channels", "sample_rate", "sample_range", "sample_min", "sample_max",
+                 "data_type", "floating", "clip_min", "clip_max", "dither")
 
-    def __init__(self, load_file="", num_frames=1, num_channels=2, sample_rate=22050, data_type="<h"):
+    def __init__(self, load_file="", num_frames=1, num_channels=2, sample_rate=22050, data_type="<h", floating=False):
         """Create empty sound or loads a file if load_file is not "".
 
         Args:
@@ -36,20 +46,12 @@ class DynSound:
             num_channels: Number of channels in the mixer. This must match pygame.mixer's initialisation values.
             sample_rate: Sample rate. This must match pygame.mixer's initialised values.
             data_type: Type of data for samples. Usually signed 2-byte int. This must match pygame.mixer's initialised data type.
+            floating: Whether to hold the samples as float32 until they are played or saved
         """
 
-        # Load a file if a filename was provided
-        if load_file:
-            self.sound = pygame.mixer.Sound(load_file)
-
-            if self.sound.get_length() <= 0.1:
-                # Assume that the load failed
-                del self.sound
-                self.sound = None
-
-        # If no sound was provided or loaded, create an empty sound
-        if self.sound is None:
-            self.sound = pygame.mixer.Sound(numpy.ndarray(shape=(num_frames, num_channels), dtype=data_type))
+        self.samples = None
+        self.sound = None
+        self.dither = False
 
         # Set sound parameters
         self.num_channels = num_channels
@@ -64,6 +66,132 @@ class DynSound:
             self.sample_min = 0
             self.sample_max = self.sample_range
 
+        self.data_type = data_type
+        self.floating = floating
+
+        if floating:
+            self.clip_min = -numpy.inf
+            self.clip_max = numpy.inf
+        else:
+            self.clip_min = self.sample_min
+            self.clip_max = self.sample_max
+
+        # Load a file if a filename was provided
+        if load_file:
+            if load_file.lower().endswith(".wav"):
+                # Map WAVs straight from disk; nothing is decoded and no mixer is needed
+                self.samples = self.load_wav(load_file, data_type)
+            else:
+                self.sound = pygame.mixer.Sound(load_file)
+
+                if self.sound.get_length() <= 0.1:
+                    # Assume that the load failed
+                    del self.sound
+                    self.sound = None
+                else:
+                    self.samples = pygame.sndarray.array(self.sound)
+
+        # If no sound was provided or loaded, create an empty sound
+        if self.samples is None:
+            self.samples = numpy.zeros(shape=(num_frames, num_channels), dtype=numpy.float32 if floating else data_type)
+        elif floating:
+            self.samples = self.samples.astype(numpy.float32)
+
+    def load_wav(self, file_name, data_type):
+        """Memory-maps a WAV file, converting it only if it doesn't match this sound's format
+
+        Args:
+            file_name (string): The WAV file to load
+            data_type (string): Type of data for samples
+        Returns:
+            (numpy.ndarray) The samples (frames x channels)
+        """
+
+        samples, file_sample_rate, file_sample_format = wavfile.read_wav(file_name)
+
+        return self.convert_file_samples(samples, file_sample_rate, file_sample_format, data_type)
+
+    def convert_file_samples(self, samples, file_sample_rate, file_sample_format, data_type):
+        """Converts samples stored in a file format to this sound's sample rate, channels and data type, only if they
+        don't match already
+
+        Args:
+            samples (numpy.ndarray): The stored samples, as returned by wavfile.read_wav
+            file_sample_rate (int): Sample rate of the stored samples
+            file_sample_format (string): Sample format of the stored samples (see wavfile.SAMPLE_FORMATS)
+            data_type (string): Type of data for samples
+        Returns:
+            (numpy.ndarray) The samples (frames x channels)
+        """
+
+        is_same_rate = file_sample_rate == self.sample_rate
+
+        if is_same_rate and samples.dtype == numpy.dtype(data_type) and samples.shape[1] == self.num_channels:
+            # Same format: use the file's samples directly
+            return samples
+
+        values = wavfile.normalise(samples, file_sample_format)
+
+        if not is_same_rate:
+            # Convert to the mixer's sample rate, band-limited so that downsampling doesn't alias
+            values = resample.resample(values, file_sample_rate / float(self.sample_rate), "sinc")
+
+        # Match the number of channels
+        if values.shape[1] == 1:
+            values = numpy.repeat(values, self.num_channels, axis=1)
+        elif self.num_channels == 1:
+            values = values.mean(axis=1, keepdims=True)
+        else:
+            values = values[:, :self.num_channels]
+
+        # Scale to the sample range
+        centre_value = (self.sample_min + self.sample_max + 1) / 2.0
+        values *= self.sample_max + 1 - centre_value
+        values += centre_value
+
+        if self.floating:
+            # Float sounds are only quantised (and clipped) when played or saved
+            return values.astype(numpy.float32)
+
+        # Round by the same rule as playback and saving
+        return effects.quantise(values, self.sample_min, self.sample_max, data_type, self.dither)
+
+    def set_samples(self, samples):
+        """Replaces (or marks as changed) the samples of this sound
+
+        Args:
+            samples (numpy.ndarray): New samples (frames x channels)
+        """
+
+        self.samples = samples
+
+        # The playback sound no longer matches the samples
+        self.sound = None
+
+    def get_sound(self):
+        """Returns the pygame Sound for playback, creating it if necessary. This requires pygame.mixer to be initialised.
+
+        Returns:
+            (pygame.Sound) The playback sound
+        """
+
+        if self.sound is None:
+            self.sound = pygame.mixer.Sound(numpy.ascontiguousarray(self.get_output_samples()))
+
+        return self.sound
+
+    def get_output_samples(self):
+        """Returns the samples in data_type, quantising (and dithering, if enabled) float samples
+
+        Returns:
+            (numpy.ndarray) The samples (frames x channels)
+        """
+
+        if not self.floating:
+            return self.samples
+
+        return effects.quantise(self.samples, self.sample_min, self.sample_max, self.data_type, self.dither)
+
     def copy(self):
         """Creates and returns a copy of this sound
 
@@ -71,53 +199,84 @@ class DynSound:
             (Sound) The copy
         """
 
-        samples = pygame.sndarray.samples(self.sound)
+        new_sound = DynSound.__new__(DynSound)
+        for name in DynSound.__slots__:
+            setattr(new_sound, name, getattr(self, name))
 
-        new_sound = DynSound(num_channels=self.num_channels, num_frames=samples.shape[0], sample_rate=self.sample_rate)
-        new_sound.sound = pygame.mixer.Sound(samples)
+        # Copy on write: both sounds share the samples (read-only) until one of them changes them. Effects that
+        # build new samples anyway, like change_frequency, never copy at all
+        self.samples.flags.writeable = False
 
         return new_sound
 
-    def save(self, file_name):
+    def get_writable_samples(self):
+        """Returns the samples for changing in place, first taking a private copy if they are shared with another sound
+
+        Returns:
+            (numpy.ndarray) The samples (frames x channels)
+        """
+
+        if not self.samples.flags.writeable:
+            self.set_samples(self.samples.copy())
+
+        return self.samples
+
+    def save(self, file_name, sample_format="int16"):
         """
         Saves this sound to disk.
 
         Args:
              file_name (string): The file name to save the sound with. File extension must be included.
+             sample_format (string): Sample format of the file: "uint8", "int16", "int24", "int32" or "float32"
         """
 
-        samples = pygame.sndarray.samples(self.sound)
+        # Stream the samples straight from the sound's buffer to the file. Float samples are only quantised (to the
+        # file's format) as they are written
+        wavfile.write_wav(file_name, self.samples, self.sample_rate, sample_format, self.sample_min, self.sample_max,
+                          self.floating and self.dither)
 
-        # Create/open WAV
-        saved_sound = wave.open(file_name, "w")
-        saved_sound.setparams((samples.shape[1], self.num_channels, self.sample_rate, samples.shape[0], "NONE", ""))
+    def resize(self, num_frames):
+        """Resizes this sound to a precise number of frames
 
-        # Write samples to WAV
-        sample_values = []
+        Args:
+            num_frames (int): New length of the sound, in frames
+        """
 
-        for index, sample in numpy.ndenumerate(samples):
-            packaged_value = struct.pack("<h", samples[index[0], index[1]])
-            sample_values.append(packaged_value)
+        # Copy the samples into a buffer of the new length, padded with silence
+        sample_array = numpy.zeros((num_frames, self.samples.shape[1]), dtype=self.samples.dtype)
+        sample_array[:min(num_frames, self.samples.shape[0])] = self.samples[:num_frames]
 
-        value_string = "".join(sample_values)
-        saved_sound.writeframes(value_string)
+        self.set_samples(sample_array)
 
-        # Done!
-        saved_sound.close()
-
-    def resize(self, num_frames):
-        """Resizes this sound to a precise number of frames
+    def change_sample_rate(self, sample_rate, mode="nearest"):
+        """Converts this sound to a different sample rate, keeping its pitch and length
 
         Args:
-            num_frames (int): New length of the sound, in frames
+            sample_rate (int): The new sample rate
+            mode (string): Resampling mode: "nearest", "linear", "cubic" or "sinc" (see resample.MODES)
         """
 
-        # Create a copy of the sound's samples (surprise! This seems to be the only way we can resize it).
-        sample_array = pygame.sndarray.array(self.sound)
+        if sample_rate != self.sample_rate:
+            ratio = self.sample_rate / float(sample_rate)
+
+            if mode == "nearest":
+                self.set_samples(effects.resample_by_index(self.samples, effects.frequency_index_map(self.samples.shape[0], ratio)))
+            else:
+                self.set_float_samples(resample.resample(self.samples, ratio, mode))
+
+            self.sample_rate = sample_rate
+
+    def crop(self, start, length):
+        """Crops this sound to a section of itself. This doesn't copy the samples, so it is cheap even for long files
 
-        sample_array.resize((num_frames, sample_array.shape[1]))
+        Args:
+            start (float in seconds): Start of the section
+            length (float in seconds): Length of the section
+        """
 
-        self.sound = pygame.mixer.Sound(sample_array)
+        start_frame = int(start * self.sample_rate)
+
+        self.set_samples(self.samples[start_frame:start_frame + int(length * self.sample_rate)])
 
     def mix(self, source, target_start=0.0, source_start=0.0, length=-1):
         """Mixes this sound with another
@@ -131,7 +290,7 @@ class DynSound:
         """
 
         # Load the source samples
-        source_samples = pygame.sndarray.array(source.sound)
+        source_samples = source.samples
 
         # Determine the frame max and min boundaries for both sounds
         target_start_frame = int(target_start * self.sample_rate)
@@ -142,22 +301,23 @@ class DynSound:
         if source_start_frame + num_frames >= source_samples.shape[0] or length == -1:
             num_frames = source_samples.shape[0] - source_start_frame
 
-        # Load the target (self) samples
-        sample_array = pygame.sndarray.array(self.sound)
-
-        if sample_array.shape[0] < target_start_frame + num_frames:
-            sample_array.resize((target_start_frame + num_frames, sample_array.shape[1]))
+        # Mix into this sound's own samples, only making a new buffer if the sound needs to grow
+        if self.samples.shape[0] < target_start_frame + num_frames:
+            sample_array = numpy.zeros((target_start_frame + num_frames, self.samples.shape[1]), dtype=self.samples.dtype)
+            sample_array[:self.samples.shape[0]] = self.samples
+        else:
+            sample_array = self.get_writable_samples()
 
         # Mix the sounds!
-        for frame in xrange(0, num_frames):
-            for channel in xrange(0, num_channels):
-                sample_array[target_start_frame + frame, channel] = numpy.clip(int(sample_array[target_start_frame + frame, channel]) + source_samples[source_start_frame + frame, channel],
-                                                                               self.sample_min, self.sample_max)
+        if num_frames > 0:
+            effects.saturating_mix(sample_array[target_start_frame:target_start_frame + num_frames, :num_channels],
+                                   source_samples[source_start_frame:source_start_frame + num_frames, :num_channels],
+                                   self.clip_min, self.clip_max)
 
         # Copy the data back into this sound
-        self.sound = pygame.mixer.Sound(sample_array)
+        self.set_samples(sample_array)
 
-    def add_echo(self, delay, volume_change, num_echoes):
+    def add_echo(self, delay, volume_change, num_echoes, tap_gains=None, feedback=False, interpolate=False):
         """
         Adds an echo to the sound.
 
@@ -165,70 +325,84 @@ class DynSound:
             delay (float): Delay of each echo, in seconds
             volume_change (float): Reduction of volume per echo, in dB
             num_echoes (int): Number of echoes
+            tap_gains (list): Volume change of each echo in dB, overriding volume_change. Not used with feedback
+            feedback (bool): Whether to feed echoes back into the delay, so that echoes have echoes of their own.
+                             The sound is extended by num_echoes delays
+            interpolate (bool): Whether to delay by fractions of a frame instead of rounding delays down to whole frames
         """
 
-        original_sound = self.copy()
+        if num_echoes <= 0:
+            return
+
+        if feedback:
+            delay_frames = delay * self.sample_rate if interpolate else int(delay * self.sample_rate)
+            out_length = self.samples.shape[0] + int(math.ceil(delay_frames * num_echoes))
+
+            self.set_samples(effects.feedback_delay(self.samples, delay_frames, volume_change, out_length, self.clip_min, self.clip_max))
+        else:
+            # Each echo is a tap on the original sound, all mixed into one buffer
+            if interpolate:
+                delays = [delay * (i + 1) * self.sample_rate for i in xrange(0, num_echoes)]
+            else:
+                delays = [int(delay * (i + 1) * self.sample_rate) for i in xrange(0, num_echoes)]
+
+            gains = tap_gains or [volume_change * (i + 1) for i in xrange(0, num_echoes)]
 
-        for i in xrange(0, num_echoes):
-            overlay = original_sound.copy()
-            overlay.change_volume(volume_change * (i + 1))
-            self.mix(overlay, delay * (i + 1))
+            self.set_samples(effects.multi_tap_delay(self.samples, delays, gains, self.clip_min, self.clip_max))
 
-    def change_frequency(self,  multiplier):
+    def change_frequency(self,  multiplier, mode="nearest"):
         """
         Change the pitch of a sound.
 
         Args:
             multiplier (float): The multiplier to be applied to the sound's frequency.
+            mode (string): Resampling mode: "nearest" (the original, fastest but aliased), "linear", "cubic" or "sinc"
+                           (see resample.MODES)
         """
 
-        # Create a copy of the samples so we can resize them
-        sample_array = pygame.sndarray.array(self.sound)
-
-        if multiplier > 1.0:
-            # Increase frequency (shift down samples from later on in the array)
-            for index, sample in numpy.ndenumerate(sample_array):
-                if int(index[0] * multiplier) >= sample_array.shape[0]:
-                    break
-                else:
-                    sample_array[index[0], index[1]] = sample_array[int(index[0] * multiplier), index[1]]
-
-            sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier))), int(sample_array.shape[1])))
-        elif multiplier < 1.0:
-            # Decrease frequency (stretch out samples from earlier on in the array)
-            sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier))), int(sample_array.shape[1])))
+        if mode != "nearest":
+            self.set_float_samples(resample.resample(self.samples, multiplier, mode))
+            return
 
-            for frame in xrange(sample_array.shape[0] - 1, 0, -1):
-                for channel in xrange(sample_array.shape[1]):
-                    sample_array[frame, channel] = sample_array[int(frame * multiplier), channel]
+        # Increasing frequency grabs samples from later on in the array; decreasing it stretches out earlier samples
+        sample_array = effects.resample_by_index(self.samples, effects.frequency_index_map(self.samples.shape[0], multiplier))
 
-        # Update the length of sound by recreating it (seems to be the only way to resize a sound)
-        self.sound = pygame.mixer.Sound(sample_array)
+        self.set_samples(sample_array)
 
-    def change_frequency_shifting(self,  multiplier, multiplier_shift):
+    def change_frequency_shifting(self,  multiplier, multiplier_shift, mode="nearest"):
         """
         Change the pitch of the sound with a constant shift up or down during playback
 
         Args:
             multiplier (float): The base multiplier to be applied to the sound's frequency.
             multiplier_shift (float): The amount by which the multiplier increases per second
+            mode (string): Resampling mode: "nearest" (the original), "linear", "cubic" or "sinc". The other modes
+                           integrate the multiplier over time, so the pitch at each moment follows the multiplier
+                           exactly and the sound ends when the source runs out
         """
 
-        # Create a copy of the samples so we can resize them
-        sample_array = pygame.sndarray.array(self.sound)
+        if mode != "nearest":
+            self.set_float_samples(resample.resample_sweep(self.samples, self.sample_rate, multiplier, multiplier_shift, mode))
+            return
+
+        num_frames = self.samples.shape[0]
+        sample_array = self.samples[effects.shifting_index_map(num_frames, self.sample_rate, multiplier, multiplier_shift)]
+        sample_array.resize((effects.shifting_length(num_frames, self.sample_rate, multiplier, multiplier_shift), int(sample_array.shape[1])))
 
-        for index, sample in numpy.ndenumerate(sample_array):
-            grab = int(index[0] * (multiplier + float(index[0]) / self.sample_rate * multiplier_shift))
+        self.set_samples(sample_array)
 
-            if grab >= sample_array.shape[0] or grab < 0:
-                break
-            else:
-                sample_array[index[0], index[1]] = sample_array[grab, index[1]]
+    def set_float_samples(self, samples):
+        """
+        Replaces the samples with the float output of a resampler or filter, clipped to the sample range
 
-        sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier + float(sample_array.shape[0]) / self.sample_rate * multiplier_shift))), int(sample_array.shape[1])))
+        Args:
+            samples (numpy.ndarray): Float samples (frames x channels)
+        """
 
-        # Update the length of sound by recreating it (seems to be the only way to resize a sound)
-        self.sound = pygame.mixer.Sound(sample_array)
+        numpy.clip(samples, self.clip_min, self.clip_max, out=samples)
+
+        # Truncates towards zero, like int() does
+        self.set_samples(samples.astype(self.samples.dtype))
 
     def change_volume(self, db):
         """
@@ -238,20 +412,19 @@ class DynSound:
             db (float): Decibels to change sound volume by.
         """
 
-        sample_array = pygame.sndarray.samples(self.sound)
-
         # Multiply all samples according to the dB given
-        multiplier = pow(10, float(db) / 20)
-        for index, sample in numpy.ndenumerate(sample_array):
-            # Todo limits checking (clipping)
-            sample_array[index[0], index[1]] = numpy.clip(sample_array[index[0], index[1]] * multiplier, self.sample_min, self.sample_max)
+        effects.apply_gain(self.get_writable_samples(), db, self.clip_min, self.clip_max)
 
-    def add_plopper(self, plopper_rate):
+        self.set_samples(self.samples)
+
+    def add_plopper(self, plopper_rate, duty=0.5, crossfade=0.0):
         """
         Adds 'plop' effect. Plop effect is a stutter/on-off effect.
 
         Args:
              plopper_rate (float): Number of plops per second
+             duty (float): Fraction of each plop that is on
+             crossfade (float): Length of the fade at each on-off edge, in seconds. 0 gives the original hard edges
         """
 
         # Don't divide by extremely small amounts (slight hack: checking if it is 0.0 has given me errors in the past where Python divided by zero anyway, so using 0.0001)
@@ -259,23 +432,80 @@ class DynSound:
             return
 
         # Produce plop effect
-        sample_array = pygame.sndarray.samples(self.sound)
+        self.apply_envelope(envelope.gate(self.samples.shape[0], self.sample_rate, plopper_rate, duty, crossfade))
+
+    def apply_envelope(self, gains):
+        """
+        Shapes the volume of the sound over time with a gain curve from the envelope module (e.g. envelope.adsr)
+
+        Args:
+             gains (numpy.ndarray): Gain for each frame
+        """
+
+        envelope.apply(self.get_writable_samples(), gains)
+
+        self.set_samples(self.samples)
+
+    def apply_filter(self, filter_type, frequency, q=0.7071, gain=0.0):
+        """
+        Filters the sound with a biquad filter, e.g. a lowpass to muffle it or a peaking filter to boost a band
+
+        Args:
+            filter_type (string): "lowpass", "highpass", "bandpass", "notch", "peaking", "lowshelf" or "highshelf"
+            frequency (float): Cutoff, centre or shelf frequency in hZ
+            q (float): Quality factor: higher is a sharper peak or notch
+            gain (float): Boost (or cut) in dB, for the peaking and shelf filters
+        """
+
+        self.set_float_samples(filters.biquad_filter(self.samples, filter_type, frequency, self.sample_rate, q, gain))
+
+    def apply_fir(self, taps):
+        """
+        Filters the sound with a linear-phase FIR filter (e.g. from filters.fir_lowpass), keeping it in place in time
+
+        Args:
+            taps (numpy.ndarray): Filter taps (an odd number of them)
+        """
+
+        self.set_float_samples(filters.fir_filter(self.samples, taps))
+
+    def add_reverb(self, impulse_response, wet=0.3, normalise=True):
+        """
+        Places the sound in a room by convolving it with the room's impulse response (a recording of a click in the
+        room, or filters.synthetic_impulse_response). The sound is extended by the length of the reverb tail.
+
+        Args:
+            impulse_response (DynSound or numpy.ndarray): The impulse response. A DynSound is converted to this
+                                                          sound's sample rate; an array (frames x channels, or 1-D)
+                                                          must already match it
+            wet (float): Share of the output that is reverb, from 0 (none) to 1 (reverb only)
+            normalise (bool): Whether to scale the impulse response to unit energy, so the reverb is about as loud
+                              as the dry sound
+        """
+
+        if isinstance(impulse_response, DynSound):
+            if impulse_response.sample_rate != self.sample_rate:
+                impulse_response = impulse_response.copy()
+                impulse_response.change_sample_rate(self.sample_rate, "linear")
+
+            impulse_response = impulse_response.samples
+
+        impulse_response = filters.as_frames(impulse_response)
 
-        high_index = self.sample_rate / plopper_rate / 2
-        length = sample_array.shape[0]
-        while high_index < length:
-            section_end = high_index + self.sample_rate / plopper_rate / 2
+        if impulse_response.shape[1] not in (1, self.samples.shape[1]):
+            # Different channel layouts: use the room's mono response
+            impulse_response = impulse_response.mean(axis=1, keepdims=True)
 
-            if section_end > length:
-                section_end = length
+        if normalise:
+            impulse_response = filters.normalise_impulse_response(impulse_response)
 
-            for low_index in xrange(int(high_index), int(section_end)):
-                for channel in xrange(0, self.num_channels):
-                    sample_array[low_index, channel] = 0
+        reverb = filters.convolve(self.samples, impulse_response)
+        reverb *= wet
+        reverb[:self.samples.shape[0]] += (1.0 - wet) * self.samples
 
-            high_index += self.sample_rate / plopper_rate
+        self.set_float_samples(reverb)
 
     def play(self):
         """Play the sound"""
 
-        self.sound.play()
+        self.get_sound().play()
@@ -0,0 +1,148 @@
+import time
+
+
+class RenderCancelled(Exception):
+    """Raised when a render is abandoned part-way through, e.g. because newer parameters have arrived"""
+
+
+class EffectStage:
+    """
+    One stage of an effect chain.
+
+    Attributes:
+        name (string): Name of the stage
+        get_key (function): Returns the parameters the stage's output depends on (must be hashable and comparable)
+        apply (function): Applies the stage to a sound (DynSound) in place. The first stage is given None and must return
+                          a new sound; later stages are given their own copy of the previous stage's output
+        is_enabled (function): Returns whether the stage changes the sound at all. Disabled stages pass the previous
+                               stage's output through without copying it
+    """
+
+    name = ""
+    get_key = None
+    apply = None
+    is_enabled = None
+
+    def __init__(self, name, get_key, apply, is_enabled=None):
+        """
+        Creates an effect stage.
+
+        Args:
+            name (string): Name of the stage
+            get_key (function): Returns the parameters the stage's output depends on
+            apply (function): Applies the stage to a sound
+            is_enabled (function): Returns whether the stage changes the sound. If None, the stage is always enabled
+        """
+
+        self.name = name
+        self.get_key = get_key
+        self.apply = apply
+        self.is_enabled = is_enabled
+
+
+class EffectChain:
+    """
+    A chain of effect stages that caches the output of each stage. When a parameter changes, only the stage that
+    depends on it and the stages after it are recomputed.
+
+    Attributes:
+        stages (list): The EffectStages, in order
+        keys (dict): Key of each stage's cached output, by stage name. A key includes the keys of all earlier stages
+        outputs (dict): Cached output (DynSound) of each stage, by stage name
+        hits (dict): Number of times each stage's cached output was reused, by stage name
+        misses (dict): Number of times each stage was recomputed, by stage name
+        stage_hook (function): Called after each stage is recomputed, with the stage name, wall time (seconds), number
+                               of samples in the output and bytes of new samples allocated. Set on the class by
+                               profiling.enable; None (no timing at all) otherwise
+    """
+
+    stages = None
+    keys = None
+    outputs = None
+    hits = None
+    misses = None
+    stage_hook = None
+
+    def __init__(self):
+        """Creates an empty effect chain"""
+
+        self.stages = []
+        self.keys = {}
+        self.outputs = {}
+        self.hits = {}
+        self.misses = {}
+
+    def add_stage(self, name, get_key, apply, is_enabled=None):
+        """
+        Adds a stage to the end of the chain.
+
+        Args:
+            name (string): Name of the stage
+            get_key (function): Returns the parameters the stage's output depends on
+            apply (function): Applies the stage to a sound (see EffectStage)
+            is_enabled (function): Returns whether the stage changes the sound. If None, the stage is always enabled
+        """
+
+        self.stages.append(EffectStage(name, get_key, apply, is_enabled))
+        self.hits[name] = 0
+        self.misses[name] = 0
+
+    def run(self, should_cancel=None):
+        """
+        Runs the chain, recomputing only the stages whose parameters (or earlier stages' parameters) have changed.
+
+        Args:
+            should_cancel (function): Optional; checked before each stage is recomputed. If it returns True, the run
+                                      is abandoned with RenderCancelled. Stages finished so far stay cached
+        Returns:
+            (DynSound) Output of the final stage. This is the cached sound itself, so it must be copied before editing
+        """
+
+        sound = None
+        key = ()
+
+        for stage in self.stages:
+            key = key + ((stage.name, stage.get_key()),)
+
+            if self.keys.get(stage.name) == key:
+                self.hits[stage.name] += 1
+            else:
+                if should_cancel and should_cancel():
+                    raise RenderCancelled()
+
+                self.misses[stage.name] += 1
+
+                if self.stage_hook:
+                    start = time.time()
+
+                if sound is None:
+                    output = stage.apply(None)
+                elif stage.is_enabled is None or stage.is_enabled():
+                    output = sound.copy()
+                    stage.apply(output)
+                else:
+                    output = sound
+
+                if self.stage_hook:
+                    allocated = 0 if sound is not None and output.samples is sound.samples else output.samples.nbytes
+                    self.stage_hook("stage:" + stage.name, time.time() - start, output.samples.size, allocated)
+
+                self.keys[stage.name] = key
+                self.outputs[stage.name] = output
+
+            sound = self.outputs[stage.name]
+
+        return sound
+
+    def clear(self):
+        """Forgets every cached output"""
+
+        self.keys = {}
+        self.outputs = {}
+
+    def reset_counters(self):
+        """Resets the hit and miss counters"""
+
+        for stage in self.stages:
+            self.hits[stage.name] = 0
+            self.misses[stage.name] = 0
@@ -0,0 +1,401 @@
+import math
+
+import numpy
+
+
+def db_to_multiplier(db):
+    """
+    Converts a volume change in decibels to a sample multiplier.
+
+    Args:
+        db (float): Decibels to change the volume by
+    Returns:
+        (float) The multiplier to apply to each sample
+    """
+
+    return pow(10, float(db) / 20)
+
+
+def apply_gain(samples, db, sample_min, sample_max):
+    """
+    Changes the volume of a block of samples in place, clipping to the sample range.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels) to change
+        db (float): Decibels to change the volume by
+        sample_min (int): Lowest allowed sample value
+        sample_max (int): Highest allowed sample value
+    """
+
+    scaled = samples * db_to_multiplier(db)
+    numpy.clip(scaled, sample_min, sample_max, out=scaled)
+
+    # Assigning back to the integer array truncates towards zero, like int() does
+    samples[...] = scaled
+
+
+def frequency_index_map(num_frames, multiplier):
+    """
+    Builds the source frame indices used to repitch a sound by a constant multiplier.
+
+    Args:
+        num_frames (int): Length of the source sound, in frames
+        multiplier (float): The multiplier to be applied to the sound's frequency
+    Returns:
+        (numpy.ndarray) Source frame index for each frame of the repitched sound
+    """
+
+    if multiplier == 1.0:
+        return numpy.arange(num_frames)
+
+    new_length = int(math.ceil(num_frames / float(multiplier)))
+    frames = numpy.arange(new_length)
+    index_map = (frames * multiplier).astype(numpy.intp)
+
+    if multiplier > 1.0:
+        # Frames from the first grab past the end of the sound keep their original position
+        out_of_range = numpy.flatnonzero(index_map >= num_frames)
+        if out_of_range.shape[0]:
+            index_map[out_of_range[0]:] = frames[out_of_range[0]:]
+
+    return index_map
+
+
+def resample_by_index(samples, index_map):
+    """
+    Creates a new block of samples by looking up source frames through an index map.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        index_map (numpy.ndarray): Source frame index for each output frame. Indices outside the source give silence
+    Returns:
+        (numpy.ndarray) The resampled samples
+    """
+
+    valid = (index_map >= 0) & (index_map < samples.shape[0])
+    resampled = numpy.zeros((index_map.shape[0], samples.shape[1]), dtype=samples.dtype)
+    resampled[valid] = samples[index_map[valid]]
+
+    return resampled
+
+
+def shifting_index_map(num_frames, sample_rate, multiplier, multiplier_shift):
+    """
+    Builds the source frame indices used to repitch a sound with a multiplier that shifts over time.
+
+    The indices reproduce the original in-place repitch: each frame grabs frame int(i * (multiplier + t * shift)), and
+    a grab from a frame that has already been repitched follows that frame's own grab. Frames from the first
+    out-of-range grab onward keep their original position.
+
+    Args:
+        num_frames (int): Length of the source sound, in frames
+        sample_rate (int): Sample rate of the sound
+        multiplier (float): The base multiplier to be applied to the sound's frequency
+        multiplier_shift (float): The amount by which the multiplier increases per second
+    Returns:
+        (numpy.ndarray) Source frame index for each frame of the source sound
+    """
+
+    frames = numpy.arange(num_frames)
+    frame_times = frames.astype(numpy.float64)
+    grabs = (frame_times * (multiplier + frame_times / sample_rate * multiplier_shift)).astype(numpy.intp)
+
+    # Stop at the first grab that falls outside the sound; the rest of the sound is left alone
+    out_of_range = numpy.flatnonzero((grabs >= num_frames) | (grabs < 0))
+    end = out_of_range[0] if out_of_range.shape[0] else num_frames
+
+    index_map = frames.copy()
+    index_map[:end] = grabs[:end]
+
+    # Grabs from earlier frames read the already-repitched value, so chase them back to a frame that wasn't changed
+    chasing = numpy.flatnonzero(index_map[:end] < frames[:end])
+    while chasing.shape[0]:
+        previous = index_map[chasing]
+        index_map[chasing] = grabs[previous]
+        chasing = chasing[index_map[chasing] < previous]
+
+    return index_map
+
+
+def shifting_length(num_frames, sample_rate, multiplier, multiplier_shift):
+    """
+    Calculates the length of a sound after a shifting repitch.
+
+    Args:
+        num_frames (int): Length of the source sound, in frames
+        sample_rate (int): Sample rate of the sound
+        multiplier (float): The base multiplier to be applied to the sound's frequency
+        multiplier_shift (float): The amount by which the multiplier increases per second
+    Returns:
+        (int) Length of the repitched sound, in frames
+    """
+
+    return int(math.ceil(num_frames / float(multiplier + float(num_frames) / sample_rate * multiplier_shift)))
+
+
+def saturating_mix(target, source, sample_min, sample_max):
+    """
+    Adds a block of source samples onto a block of target samples in place, clipping to the sample range.
+
+    Args:
+        target (numpy.ndarray): Samples (frames x channels) to mix onto
+        source (numpy.ndarray): Samples to mix in. Must be the same shape as target
+        sample_min (int): Lowest allowed sample value
+        sample_max (int): Highest allowed sample value
+    """
+
+    if target.dtype.kind == "f":
+        # Float samples can't overflow, so mix straight into the target
+        target += source
+        numpy.clip(target, sample_min, sample_max, out=target)
+        return
+
+    mixed = target.astype(numpy.int64)
+    mixed += source
+    numpy.clip(mixed, sample_min, sample_max, out=mixed)
+
+    target[...] = mixed
+
+
+def multi_tap_delay(samples, delays, gains, sample_min, sample_max):
+    """
+    Mixes delayed, attenuated copies (taps) of a block of samples onto itself, building every tap into one output
+    buffer. The output saturates after each tap is added, like mixing the taps in one at a time.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        delays (list): Delay of each tap, in frames. Fractional delays are linearly interpolated
+        gains (list): Volume change of each tap, in dB
+        sample_min (int): Lowest allowed sample value
+        sample_max (int): Highest allowed sample value
+    Returns:
+        (numpy.ndarray) The source with its taps mixed in, long enough to hold the last tap
+    """
+
+    num_frames = samples.shape[0]
+    out_length = max([num_frames] + [int(math.ceil(delay)) + num_frames for delay in delays])
+
+    # Integer samples are mixed as wider integers; float samples stay float
+    output_type = samples.dtype if samples.dtype.kind == "f" else numpy.int32
+    output = numpy.zeros((out_length, samples.shape[1]), dtype=output_type)
+    output[:num_frames] = samples
+
+    # One scratch buffer is reused for every tap (one frame longer, for the tail of an interpolated tap)
+    scratch = numpy.empty((num_frames + 1, samples.shape[1]))
+
+    for delay, gain in zip(delays, gains):
+        start = int(math.floor(delay))
+        fraction = delay - start
+        multiplier = db_to_multiplier(gain)
+
+        if fraction == 0.0:
+            tap = scratch[:num_frames]
+            numpy.multiply(samples, multiplier, out=tap)
+        else:
+            # Linear interpolation between neighbouring frames: the tap straddles frames start and start + 1
+            tap = scratch
+            tap[:num_frames] = samples
+            tap[:num_frames] *= (1.0 - fraction) * multiplier
+            tap[num_frames] = 0.0
+            tap[1:] += samples * (fraction * multiplier)
+
+        numpy.clip(tap, sample_min, sample_max, out=tap)
+
+        # Saturating add (integer taps are truncated towards zero, like the per-sample volume change)
+        section = output[start:start + tap.shape[0]]
+        section += tap[:section.shape[0]].astype(output_type)
+        numpy.clip(section, sample_min, sample_max, out=section)
+
+    return output.astype(samples.dtype)
+
+
+def feedback_delay(samples, delay, gain, out_length, sample_min, sample_max):
+    """
+    Runs a block of samples through a feedback delay line: every output frame is fed back, attenuated, after the delay.
+    This gives a train of echoes of echoes that keeps going until out_length. The line is processed one delay length
+    at a time, so the cost depends on the sound length rather than the number of echoes.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        delay (float): Delay in frames (at least 1). Fractional delays are linearly interpolated
+        gain (float): Volume change per repeat, in dB
+        out_length (int): Length of the output, in frames
+        sample_min (int): Lowest allowed sample value
+        sample_max (int): Highest allowed sample value
+    Returns:
+        (numpy.ndarray) The output of the delay line, clipped to the sample range
+    """
+
+    if delay < 1.0:
+        raise ValueError("Feedback delay must be at least one frame")
+
+    multiplier = db_to_multiplier(gain)
+    block_size = int(math.floor(delay))
+    fraction = delay - block_size
+
+    # The padding frame in front of the output is the silence read by the first interpolated block
+    padded = numpy.zeros((out_length + 1, samples.shape[1]))
+    output = padded[1:]
+    output[:min(samples.shape[0], out_length)] = samples[:out_length]
+
+    # Every frame in a block reads from earlier blocks only, so each block can be computed in one go
+    for start in range(block_size, out_length, block_size):
+        end = min(start + block_size, out_length)
+        delayed = output[start - block_size:end - block_size]
+
+        if fraction != 0.0:
+            delayed = (1.0 - fraction) * delayed + fraction * padded[start - block_size:end - block_size]
+
+        output[start:end] += multiplier * delayed
+
+    numpy.clip(output, sample_min, sample_max, out=output)
+
+    return output.astype(samples.dtype)
+
+
+def add_dither(values, random_state=None):
+    """
+    Adds triangular (TPDF) dither of one quantisation step to a block of values in place, turning the error of the
+    quantisation that follows into steady noise instead of distortion.
+
+    Args:
+        values (numpy.ndarray): Float values, scaled so that one quantisation step is 1
+        random_state (numpy.random.RandomState): Source of noise. If None, numpy's global generator is used
+    """
+
+    if random_state is None:
+        random_state = numpy.random
+
+    values += random_state.uniform(-0.5, 0.5, values.shape)
+    values += random_state.uniform(-0.5, 0.5, values.shape)
+
+
+def round_samples(values, dither=False):
+    """
+    Rounds float values to whole quantisation steps in place. This is the one rounding rule for both playback and
+    saving, so a float sound plays and saves as the same samples.
+
+    Args:
+        values (numpy.ndarray): Float values centred on 0, scaled so that one quantisation step is 1
+        dither (bool): Whether to dither and round to the nearest step, rather than truncate towards zero like int()
+                       does (which matches the integer effects)
+    """
+
+    if dither:
+        add_dither(values)
+        values += 0.5
+        numpy.floor(values, out=values)
+    else:
+        numpy.trunc(values, out=values)
+
+
+def quantise(samples, sample_min, sample_max, data_type, dither=False):
+    """
+    Converts float samples to an integer sample type, clipping to the sample range. This is the one place a float
+    pipeline loses precision.
+
+    Args:
+        samples (numpy.ndarray): Float samples (frames x channels) on the integer type's scale
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+        data_type (string): Type of the output samples
+        dither (bool): Whether to dither and round, rather than truncate towards zero like int() does
+    Returns:
+        (numpy.ndarray) The quantised samples
+    """
+
+    values = samples.astype(numpy.float64)
+
+    # Round around the centre of the range, as wavfile.convert does
+    centre_value = (sample_min + sample_max + 1) / 2.0
+    values -= centre_value
+    round_samples(values, dither)
+    values += centre_value
+
+    numpy.clip(values, sample_min, sample_max, out=values)
+
+    return values.astype(data_type)
+
+
+def pan_gains(num_channels, db, pan):
+    """
+    Works out the multiplier for each channel of a source with a volume change and a stereo position.
+
+    Args:
+        num_channels (int): Number of channels
+        db (float): Decibels to change the volume by
+        pan (float): Stereo position, from -1 (left only) through 0 (centre, both channels at full volume) to 1 (right
+                     only). Ignored unless there are two channels
+    Returns:
+        (numpy.ndarray) Multiplier for each channel
+    """
+
+    gains = numpy.empty(num_channels)
+    gains[:] = db_to_multiplier(db)
+
+    if num_channels == 2:
+        gains[0] *= min(1.0, 1.0 - pan)
+        gains[1] *= min(1.0, 1.0 + pan)
+
+    return gains
+
+
+def mix_into(target, source, gains, sample_min, sample_max, scratch, saturate=True):
+    """
+    Adds a block of source samples, scaled per channel, onto a block of target samples in place. The work is done one
+    scratch buffer at a time, so nothing the size of the source is allocated and each source frame is read once.
+
+    Args:
+        target (numpy.ndarray): Float samples (frames x channels) to mix onto
+        source (numpy.ndarray): Samples to mix in: the same length as target, with the same number of channels or one
+        gains (numpy.ndarray): Multiplier for each channel, see pan_gains
+        sample_min (float): Lowest allowed sample value
+        sample_max (float): Highest allowed sample value
+        scratch (numpy.ndarray): Float work buffer (frames x channels) with the same number of channels as target.
+                                 Its length sets the chunk size
+        saturate (bool): Whether to clip the target to the sample range as each chunk is added
+    """
+
+    chunk_size = scratch.shape[0]
+
+    for start in xrange(0, target.shape[0], chunk_size):
+        end = min(start + chunk_size, target.shape[0])
+        work = scratch[:end - start]
+
+        numpy.multiply(source[start:end], gains, out=work)
+
+        section = target[start:end]
+        section += work
+        if saturate:
+            numpy.clip(section, sample_min, sample_max, out=section)
+
+
+def soft_limit(samples, sample_max, threshold=0.8):
+    """
+    Applies a soft limiter in place: samples below the threshold pass through unchanged, and louder samples are
+    squashed smoothly (with tanh) so they approach, but never pass, full scale.
+
+    Args:
+        samples (numpy.ndarray): Float samples (frames x channels) centred on zero
+        sample_max (float): Full scale
+        threshold (float): Level the limiter starts at, as a fraction of full scale
+    """
+
+    knee = threshold * sample_max
+    headroom = sample_max - knee
+
+    loud = numpy.abs(samples) > knee
+    values = samples[loud]
+    signs = numpy.sign(values)
+
+    # Map the part above the knee through tanh, which approaches the headroom without reaching it
+    numpy.abs(values, out=values)
+    values -= knee
+    values /= headroom
+    numpy.tanh(values, out=values)
+    values *= headroom
+    values += knee
+    values *= signs
+
+    samples[loud] = values
+
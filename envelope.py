@@ -0,0 +1,186 @@
+import math
+
+import numpy
+
+
+def adsr(num_frames, sample_rate, attack=0.0, decay=0.0, sustain=1.0, release=0.0):
+    """
+    Builds an attack-decay-sustain-release gain curve with straight-line segments. The release ends at the end of the
+    sound. If the sound is too short for every segment, the later segments are cut short.
+
+    Args:
+        num_frames (int): Length of the sound, in frames
+        sample_rate (int): Sample rate of the sound
+        attack (float): Time to rise from silence to full volume, in seconds
+        decay (float): Time to fall from full volume to the sustain level, in seconds
+        sustain (float): Gain held between the decay and the release (1 is full volume)
+        release (float): Time to fall from the sustain level to silence, in seconds
+    Returns:
+        (numpy.ndarray) Gain for each frame
+    """
+
+    gains = numpy.empty(num_frames)
+    gains[:] = sustain
+
+    attack_frames = min(int(attack * sample_rate), num_frames)
+    decay_frames = min(int(decay * sample_rate), num_frames - attack_frames)
+    release_frames = min(int(release * sample_rate), num_frames - attack_frames - decay_frames)
+
+    gains[:attack_frames] = numpy.arange(attack_frames) / float(max(attack_frames, 1))
+
+    decay_end = attack_frames + decay_frames
+    gains[attack_frames:decay_end] = 1.0 - (1.0 - sustain) * numpy.arange(decay_frames) / float(max(decay_frames, 1))
+
+    gains[num_frames - release_frames:] = sustain * numpy.arange(release_frames, 0, -1) / float(max(release_frames, 1))
+
+    return gains
+
+
+def tremolo(num_frames, sample_rate, rate, depth=0.5):
+    """
+    Builds a tremolo gain curve: the volume dips smoothly (a raised cosine) rate times per second.
+
+    Args:
+        num_frames (int): Length of the sound, in frames
+        sample_rate (int): Sample rate of the sound
+        rate (float): Dips per second
+        depth (float): How far the volume dips, from 0 (not at all) to 1 (to silence)
+    Returns:
+        (numpy.ndarray) Gain for each frame
+    """
+
+    gains = numpy.arange(num_frames) * (2.0 * math.pi * rate / sample_rate)
+    numpy.cos(gains, out=gains)
+
+    # 1 at the top of each cycle, 1 - depth at the bottom
+    gains -= 1.0
+    gains *= 0.5 * depth
+    gains += 1.0
+
+    return gains
+
+
+def gate(num_frames, sample_rate, rate, duty=0.5, crossfade=0.0, start=0):
+    """
+    Builds an on-off gate: each of the rate cycles per second is on for its first duty fraction and silent for the
+    rest. With the default duty of 0.5 and no crossfade, this is exactly the original plop effect.
+
+    The cost doesn't depend on the rate: the section edges are marked in one array and added up in one pass. A stream
+    can build the gate a block at a time by giving the first frame of each block as start.
+
+    Args:
+        num_frames (int): Length of the sound (or of the block, from start), in frames
+        sample_rate (int): Sample rate of the sound
+        rate (float): Cycles per second
+        duty (float): Fraction of each cycle that is on
+        crossfade (float): Length of the fade at each edge, in seconds. 0 gives hard edges
+        start (int): Frame of the whole gate to start from. Only hard edges can be built from a start other than 0
+    Returns:
+        (numpy.ndarray) Gain for each frame
+    """
+
+    if start and crossfade:
+        raise ValueError("A crossfaded gate can't be built from frame %d, only from the start" % start)
+
+    if duty == 0.5:
+        # The original plop arithmetic, so that sections round (and integer rates divide) exactly the same way
+        on_length = off_length = sample_rate / rate / 2
+    else:
+        on_length = sample_rate / float(rate) * duty
+        off_length = sample_rate / float(rate) - on_length
+    period = sample_rate / rate
+
+    gains = numpy.ones(num_frames)
+    if period <= 0 or num_frames == 0:
+        return gains
+
+    # Skip the sections that end before start (none, for a whole sound)
+    end_frame = start + num_frames
+    first_section = max(0, int(math.floor((start - on_length - off_length) / float(period)))) if start else 0
+
+    # Start of each silent section: the running sum on, on + period, ... (the same additions as the original loop)
+    num_sections = max(1, int(math.ceil((end_frame - on_length) / float(period))) + 1 - first_section)
+    steps = numpy.empty(num_sections)
+    steps[0] = on_length + first_section * period if first_section else on_length
+    steps[1:] = period
+    starts = numpy.cumsum(steps)
+    starts = starts[starts < end_frame]
+    ends = numpy.minimum(starts + off_length, end_frame)
+
+    # Frames of the section edges from start, with sections already under way at start cut to begin there
+    starts = numpy.maximum(starts.astype(numpy.intp) - start, 0)
+    ends = ends.astype(numpy.intp) - start
+    in_range = ends > 0
+    starts = starts[in_range]
+    ends = ends[in_range]
+
+    # +1 where each silent section starts and -1 where it ends; the running total is 1 inside a section
+    edges = numpy.bincount(starts, minlength=num_frames + 1)
+    edges -= numpy.bincount(ends, minlength=num_frames + 1)
+    gains -= numpy.cumsum(edges[:num_frames])
+
+    fade_frames = int(crossfade * sample_rate)
+    if fade_frames > 1:
+        # A centred moving average turns each hard edge into a straight-line fade
+        padded = numpy.concatenate((numpy.repeat(gains[:1], fade_frames // 2), gains,
+                                    numpy.repeat(gains[-1:], fade_frames - fade_frames // 2)))
+        totals = numpy.concatenate(([0.0], numpy.cumsum(padded)))
+        gains = (totals[fade_frames:fade_frames + num_frames] - totals[:num_frames]) / fade_frames
+
+    return gains
+
+
+def gates(lengths, sample_rate, rates, duty=0.5):
+    """
+    Builds many on-off gates at once, one per row, for rendering variants of a sound together. Each row is exactly
+    the gate that gate would build for its length and rate: the section starts are summed up the same way, just
+    along every row at once.
+
+    Args:
+        lengths (numpy.ndarray): Length of each gate, in frames
+        sample_rate (int): Sample rate of the sounds
+        rates (numpy.ndarray): Cycles per second of each gate (above 0)
+        duty (float): Fraction of each cycle that is on
+    Returns:
+        (numpy.ndarray) Gains (gates x longest length). Frames past the end of a shorter gate are undefined
+    """
+
+    lengths = numpy.asarray(lengths, dtype=numpy.intp)
+    rates = numpy.asarray(rates, dtype=numpy.float64)
+    width = int(lengths.max()) if lengths.shape[0] else 0
+
+    if duty == 0.5:
+        on_lengths = off_lengths = sample_rate / rates / 2
+    else:
+        on_lengths = sample_rate / rates * duty
+        off_lengths = sample_rate / rates - on_lengths
+    periods = sample_rate / rates
+
+    # Start of each silent section, summed along each row
+    num_sections = int(numpy.max(numpy.ceil((lengths - on_lengths) / periods).clip(0), initial=0)) + 1
+    steps = numpy.empty((rates.shape[0], num_sections))
+    steps[:, 0] = on_lengths
+    steps[:, 1:] = periods[:, numpy.newaxis]
+    starts = numpy.cumsum(steps, axis=1)
+    ends = numpy.minimum(starts + off_lengths[:, numpy.newaxis], lengths[:, numpy.newaxis])
+    valid = starts < lengths[:, numpy.newaxis]
+
+    # Mark the edges of every row in one flat array, each row with room for an edge at its very end
+    row_starts = (numpy.arange(rates.shape[0]) * (width + 1))[:, numpy.newaxis]
+    num_edges = rates.shape[0] * (width + 1)
+    edges = numpy.bincount((row_starts + starts.astype(numpy.intp))[valid], minlength=num_edges)
+    edges -= numpy.bincount((row_starts + ends.astype(numpy.intp))[valid], minlength=num_edges)
+
+    return 1.0 - numpy.cumsum(edges.reshape(rates.shape[0], width + 1)[:, :width], axis=1)
+
+
+def apply(samples, gains):
+    """
+    Applies a gain curve to a block of samples in place, with a single multiply.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        gains (numpy.ndarray): Gain for each frame. Integer samples are truncated towards zero, like int() does
+    """
+
+    numpy.multiply(samples, gains[:, numpy.newaxis], out=samples, casting="unsafe")
@@ -0,0 +1,503 @@
+import math
+
+import numpy
+
+
+# Filter shapes understood by design_biquad
+BIQUAD_TYPES = ("lowpass", "highpass", "bandpass", "notch", "peaking", "lowshelf", "highshelf")
+
+# Shortest partition used when convolve picks the block size itself, in frames (about 0.1 seconds at 22050 hZ). Shorter
+# impulse responses use one partition of their own (power of two) length
+PARTITION_SIZE = 2048
+
+# Most partitions used when convolve picks the block size itself. Longer impulse responses get longer partitions, so
+# the multiply-adds per block stay bounded and the cost grows as (N + M) log M
+MAX_PARTITIONS = 8
+
+
+def next_power_of_two(value):
+    """Returns the smallest power of two that is at least value (and at least 1)"""
+
+    return 1 << max(0, int(math.ceil(math.log(max(value, 1), 2))))
+
+
+def as_frames(samples):
+    """Returns samples as float64 frames x channels, adding a channel axis to mono 1-D arrays"""
+
+    samples = numpy.asarray(samples, dtype=numpy.float64)
+
+    return samples[:, numpy.newaxis] if samples.ndim == 1 else samples
+
+
+def design_biquad(filter_type, frequency, sample_rate, q=0.7071, gain=0.0):
+    """
+    Designs a second-order (biquad) filter, with the coefficients from the Audio EQ Cookbook.
+
+    Args:
+        filter_type (string): One of BIQUAD_TYPES
+        frequency (float): Cutoff, centre or shelf frequency in hZ
+        sample_rate (int): Sample rate
+        q (float): Quality factor: higher is a sharper peak or notch. 0.7071 gives the flattest passband
+        gain (float): Boost (or cut) in dB, for the peaking and shelf filters
+    Returns:
+        (tuple) The feedforward coefficients (b0, b1, b2) and feedback coefficients (a1, a2), normalised so a0 is 1
+    """
+
+    if filter_type not in BIQUAD_TYPES:
+        raise ValueError("Unknown filter type: %s" % filter_type)
+
+    # Keep the frequency just below Nyquist, where the formulas break down
+    w0 = 2.0 * math.pi * min(max(frequency, 1.0), 0.499 * sample_rate) / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2.0 * q)
+    a = 10.0 ** (gain / 40.0)
+    shelf = 2.0 * math.sqrt(a) * alpha
+
+    if filter_type == "lowpass":
+        b = ((1.0 - cos_w0) / 2.0, 1.0 - cos_w0, (1.0 - cos_w0) / 2.0)
+        a_coefficients = (1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha)
+    elif filter_type == "highpass":
+        b = ((1.0 + cos_w0) / 2.0, -(1.0 + cos_w0), (1.0 + cos_w0) / 2.0)
+        a_coefficients = (1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha)
+    elif filter_type == "bandpass":
+        b = (alpha, 0.0, -alpha)
+        a_coefficients = (1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha)
+    elif filter_type == "notch":
+        b = (1.0, -2.0 * cos_w0, 1.0)
+        a_coefficients = (1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha)
+    elif filter_type == "peaking":
+        b = (1.0 + alpha * a, -2.0 * cos_w0, 1.0 - alpha * a)
+        a_coefficients = (1.0 + alpha / a, -2.0 * cos_w0, 1.0 - alpha / a)
+    elif filter_type == "lowshelf":
+        b = (a * ((a + 1.0) - (a - 1.0) * cos_w0 + shelf), 2.0 * a * ((a - 1.0) - (a + 1.0) * cos_w0),
+             a * ((a + 1.0) - (a - 1.0) * cos_w0 - shelf))
+        a_coefficients = ((a + 1.0) + (a - 1.0) * cos_w0 + shelf, -2.0 * ((a - 1.0) + (a + 1.0) * cos_w0),
+                          (a + 1.0) + (a - 1.0) * cos_w0 - shelf)
+    else:
+        b = (a * ((a + 1.0) + (a - 1.0) * cos_w0 + shelf), -2.0 * a * ((a - 1.0) + (a + 1.0) * cos_w0),
+             a * ((a + 1.0) + (a - 1.0) * cos_w0 - shelf))
+        a_coefficients = ((a + 1.0) - (a - 1.0) * cos_w0 + shelf, 2.0 * ((a - 1.0) - (a + 1.0) * cos_w0),
+                          (a + 1.0) - (a - 1.0) * cos_w0 - shelf)
+
+    a0 = a_coefficients[0]
+
+    return (b[0] / a0, b[1] / a0, b[2] / a0), (a_coefficients[1] / a0, a_coefficients[2] / a0)
+
+
+class Biquad:
+    """
+    A biquad filter that processes sound a block at a time, carrying its state from one block to the next.
+
+    A recursive filter can't be vectorised directly, because each output depends on the one before. Instead, each
+    block's output is split in two: the response to the block's input with the filter at rest, which is a convolution
+    with the first block_size frames of the filter's impulse response (exact, because later frames can't reach the
+    block), plus the decay of the state left by earlier blocks, which is a weighted sum of two fixed curves. Both are
+    whole-array operations, so the per-frame loop only runs once, when the filter is created.
+
+    Attributes:
+        b (tuple): Feedforward coefficients (b0, b1, b2)
+        a (tuple): Feedback coefficients (a1, a2)
+        block_size (int): Largest block processed in one step, in frames
+        impulse_spectrum (numpy.ndarray): Spectrum of the first block_size frames of the impulse response
+        state_responses (numpy.ndarray): Output (2 x block_size) from each state variable at 1, with no input
+        state (numpy.ndarray): Transposed direct form II state (2 x channels), or None before the first block
+    """
+
+    b = None
+    a = None
+    block_size = 1024
+    impulse_spectrum = None
+    state_responses = None
+    state = None
+
+    def __init__(self, b, a, block_size=1024):
+        """
+        Creates a filter at rest.
+
+        Args:
+            b (tuple): Feedforward coefficients (b0, b1, b2), e.g. from design_biquad
+            a (tuple): Feedback coefficients (a1, a2)
+            block_size (int): Largest block processed in one step, in frames. Longer blocks are split
+        """
+
+        self.b = tuple(float(value) for value in b)
+        self.a = tuple(float(value) for value in a)
+        self.block_size = block_size
+
+        b0, b1, b2 = self.b
+        a1, a2 = self.a
+
+        # Run the recursion once for an impulse and for each state variable
+        impulse = numpy.empty(block_size)
+        responses = numpy.empty((2, block_size))
+        for row, (z1, z2, x) in enumerate(((0.0, 0.0, 1.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))):
+            output = impulse if row == 0 else responses[row - 1]
+            for i in xrange(block_size):
+                y = b0 * x + z1
+                z1 = b1 * x - a1 * y + z2
+                z2 = b2 * x - a2 * y
+                output[i] = y
+                x = 0.0
+
+        self.impulse_spectrum = numpy.fft.rfft(impulse, 2 * block_size)[:, numpy.newaxis]
+        self.state_responses = responses[:, :, numpy.newaxis]
+
+    def reset(self):
+        """Puts the filter back at rest"""
+
+        self.state = None
+
+    def process(self, block):
+        """
+        Filters the next block of sound.
+
+        Args:
+            block (numpy.ndarray): Samples (frames x channels, or 1-D for mono) following the previous block
+        Returns:
+            (numpy.ndarray) The filtered samples, as float64 in the same shape
+        """
+
+        frames = as_frames(block)
+        output = numpy.empty(frames.shape)
+
+        if self.state is None:
+            self.state = numpy.zeros((2, frames.shape[1]))
+
+        for start in xrange(0, frames.shape[0], self.block_size):
+            output[start:start + self.block_size] = self.process_block(frames[start:start + self.block_size])
+
+        return output.reshape(numpy.shape(block))
+
+    def process_block(self, x):
+        """
+        Filters at most block_size frames and updates the state.
+
+        Args:
+            x (numpy.ndarray): Float samples (frames x channels)
+        Returns:
+            (numpy.ndarray) The filtered samples
+        """
+
+        num_frames = x.shape[0]
+        b0, b1, b2 = self.b
+        a1, a2 = self.a
+        z1, z2 = self.state
+
+        # Response at rest, by FFT convolution (the zero padding keeps it linear rather than circular)...
+        spectrum = numpy.fft.rfft(x, 2 * self.block_size, axis=0)
+        spectrum *= self.impulse_spectrum
+        y = numpy.fft.irfft(spectrum, 2 * self.block_size, axis=0)[:num_frames]
+
+        # ...plus the decay of the earlier blocks' state
+        y += z1 * self.state_responses[0, :num_frames]
+        y += z2 * self.state_responses[1, :num_frames]
+
+        # State after the last frame, from the last two inputs and outputs
+        middle_z2 = b2 * x[-2] - a2 * y[-2] if num_frames > 1 else z2
+        self.state = numpy.array([b1 * x[-1] - a1 * y[-1] + middle_z2, b2 * x[-1] - a2 * y[-1]])
+
+        return y
+
+
+def biquad_filter(samples, filter_type, frequency, sample_rate, q=0.7071, gain=0.0):
+    """
+    Filters a whole sound with a biquad filter.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        filter_type (string): One of BIQUAD_TYPES
+        frequency (float): Cutoff, centre or shelf frequency in hZ
+        sample_rate (int): Sample rate
+        q (float): Quality factor
+        gain (float): Boost (or cut) in dB, for the peaking and shelf filters
+    Returns:
+        (numpy.ndarray) The filtered samples, as float64
+    """
+
+    b, a = design_biquad(filter_type, frequency, sample_rate, q, gain)
+
+    # Big blocks amortise the per-block overhead, but the impulse response is built frame by frame once per filter
+    block_size = min(4096, next_power_of_two(samples.shape[0]))
+
+    return Biquad(b, a, block_size).process(samples)
+
+
+def fir_lowpass(cutoff, sample_rate, num_taps=101):
+    """
+    Designs a linear-phase lowpass FIR filter by windowing a sinc with a Blackman window.
+
+    Args:
+        cutoff (float): Cutoff frequency in hZ
+        sample_rate (int): Sample rate
+        num_taps (int): Length of the filter. Longer filters have a sharper cutoff. Made odd, so the delay is whole
+    Returns:
+        (numpy.ndarray) The taps, summing to 1 (unity gain for low frequencies)
+    """
+
+    num_taps |= 1
+    positions = numpy.arange(num_taps) - (num_taps - 1) / 2
+    taps = numpy.sinc(2.0 * cutoff / sample_rate * positions) * numpy.blackman(num_taps)
+
+    return taps / taps.sum()
+
+
+def fir_highpass(cutoff, sample_rate, num_taps=101):
+    """
+    Designs a linear-phase highpass FIR filter, by subtracting a lowpass filter from an impulse.
+
+    Args:
+        cutoff (float): Cutoff frequency in hZ
+        sample_rate (int): Sample rate
+        num_taps (int): Length of the filter. Made odd, so the delay is whole
+    Returns:
+        (numpy.ndarray) The taps
+    """
+
+    taps = -fir_lowpass(cutoff, sample_rate, num_taps)
+    taps[taps.shape[0] // 2] += 1.0
+
+    return taps
+
+
+def fir_filter(samples, taps):
+    """
+    Filters a sound with a linear-phase FIR filter, removing the filter's delay so the sound stays in place.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        taps (numpy.ndarray): Filter taps, e.g. from fir_lowpass (an odd number of them)
+    Returns:
+        (numpy.ndarray) The filtered samples, as float64 and the same length as the input
+    """
+
+    delay = (len(taps) - 1) // 2
+
+    return convolve(samples, taps)[delay:delay + samples.shape[0]]
+
+
+def partition_spectra(impulse_response, block_size):
+    """
+    Splits an impulse response into block_size partitions and transforms each one.
+
+    Args:
+        impulse_response (numpy.ndarray): Float impulse response (frames x channels)
+        block_size (int): Partition length, in frames
+    Returns:
+        (numpy.ndarray) Spectra (partitions x block_size + 1 x channels)
+    """
+
+    num_partitions = max(1, int(math.ceil(impulse_response.shape[0] / float(block_size))))
+
+    padded = numpy.zeros((num_partitions * block_size, impulse_response.shape[1]))
+    padded[:impulse_response.shape[0]] = impulse_response
+
+    return numpy.fft.rfft(padded.reshape(num_partitions, block_size, -1), 2 * block_size, axis=1)
+
+
+def convolve(samples, impulse_response, block_size=None):
+    """
+    Convolves a sound with an impulse response (e.g. a recording of a room), by uniformly partitioned FFT convolution.
+
+    The sound is cut into blocks and the impulse response into partitions of the same size, and every block and
+    partition is transformed in one go. Each block's output is the sum over partitions of the block that many places
+    earlier times the partition, so there is one whole-array multiply-add per partition, not per block. By default the
+    impulse response is split into at most MAX_PARTITIONS partitions of at least PARTITION_SIZE frames (or a single
+    partition if it is shorter than that), so the transforms stay well below the impulse response length while the cost
+    still grows as (N + M) log M rather than the N x M of convolving frame by frame.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels, or 1-D)
+        impulse_response (numpy.ndarray): Impulse response (frames x channels, or 1-D). A mono impulse response is
+                                          applied to every channel; otherwise each channel uses its own
+        block_size (int): Partition length, in frames. If None, it is chosen from the impulse response length
+    Returns:
+        (numpy.ndarray) The convolved samples, as float64 frames x channels. These run on after the sound ends, for
+                        len(impulse_response) - 1 frames
+    """
+
+    x = as_frames(samples)
+    h = as_frames(impulse_response)
+    num_frames = x.shape[0]
+    out_length = num_frames + h.shape[0] - 1
+
+    if num_frames == 0 or h.shape[0] == 0:
+        return numpy.zeros((max(out_length, 0), max(x.shape[1], h.shape[1])))
+
+    if block_size is None:
+        block_size = max(min(next_power_of_two(h.shape[0]), PARTITION_SIZE),
+                         next_power_of_two(int(math.ceil(h.shape[0] / float(MAX_PARTITIONS)))))
+
+    spectra = partition_spectra(h, block_size)
+    num_partitions = spectra.shape[0]
+
+    # Transform every block of the input, including enough silent blocks for the tail
+    num_blocks = int(math.ceil(num_frames / float(block_size))) + num_partitions
+    blocks = numpy.zeros((num_blocks * block_size, x.shape[1]))
+    blocks[:num_frames] = x
+    block_spectra = numpy.fft.rfft(blocks.reshape(num_blocks, block_size, -1), 2 * block_size, axis=1)
+    del blocks
+
+    # Output spectrum of each block: a frequency-domain delay line, one partition at a time
+    output_spectra = block_spectra * spectra[0]
+    for partition in xrange(1, num_partitions):
+        output_spectra[partition:] += block_spectra[:num_blocks - partition] * spectra[partition]
+    del block_spectra
+
+    # Each block's output is two blocks long: overlap-add the second half onto the next block
+    output_blocks = numpy.fft.irfft(output_spectra, 2 * block_size, axis=1)
+    del output_spectra
+
+    output = output_blocks[:, :block_size].copy()
+    output[1:] += output_blocks[:-1, block_size:]
+
+    return output.reshape(num_blocks * block_size, -1)[:out_length]
+
+
+class Convolver:
+    """
+    Streaming partitioned convolution: the same algorithm as convolve, but fed a block at a time with its history
+    kept between calls, so a reverb can run inside a streaming engine. Through process, the output lags the input by
+    block_size frames; callers that always have exactly one block can call process_block for no latency at all.
+
+    Attributes:
+        block_size (int): Partition length, in frames
+        spectra (numpy.ndarray): Spectra of the impulse response partitions (partitions x block_size + 1 x channels)
+        history (numpy.ndarray): Spectra of the most recent input blocks, as a ring buffer. None before reset
+        newest (int): Index in history of the newest block's spectrum
+        overlap (numpy.ndarray): Second half of the previous block's output, added to the next block
+        pending (numpy.ndarray): Input frames waiting for a whole block
+        ready (numpy.ndarray): Output frames waiting to be handed back
+    """
+
+    block_size = 1024
+    spectra = None
+    history = None
+    newest = 0
+    overlap = None
+    pending = None
+    ready = None
+
+    def __init__(self, impulse_response, block_size=1024):
+        """
+        Creates a convolver.
+
+        Args:
+            impulse_response (numpy.ndarray): Impulse response (frames x channels, or 1-D)
+            block_size (int): Partition length, in frames
+        """
+
+        self.block_size = block_size
+        self.spectra = partition_spectra(as_frames(impulse_response), block_size)
+
+    def reset(self, num_channels=1):
+        """
+        Clears the history, ready for a new input.
+
+        Args:
+            num_channels (int): Number of channels of the input
+        """
+
+        output_channels = max(num_channels, self.spectra.shape[2])
+
+        self.history = numpy.zeros((self.spectra.shape[0], self.block_size + 1, output_channels), dtype=numpy.complex128)
+        self.newest = 0
+        self.overlap = numpy.zeros((self.block_size, output_channels))
+        self.pending = numpy.zeros((0, num_channels))
+        # The latency: one block of silence is handed back while the first block fills
+        self.ready = numpy.zeros((self.block_size, output_channels))
+
+    def process(self, block):
+        """
+        Convolves the next frames of the input.
+
+        Args:
+            block (numpy.ndarray): Samples (frames x channels)
+        Returns:
+            (numpy.ndarray) The same number of frames of output (float64), block_size frames behind the input
+        """
+
+        frames = as_frames(block)
+
+        if self.history is None:
+            self.reset(frames.shape[1])
+
+        self.pending = numpy.concatenate((self.pending, frames))
+
+        num_blocks = self.pending.shape[0] // self.block_size
+        if num_blocks:
+            outputs = [self.process_block(self.pending[i * self.block_size:(i + 1) * self.block_size])
+                       for i in xrange(num_blocks)]
+            self.pending = self.pending[num_blocks * self.block_size:]
+            self.ready = numpy.concatenate([self.ready] + outputs)
+
+        output = self.ready[:frames.shape[0]]
+        self.ready = self.ready[frames.shape[0]:]
+
+        return output
+
+    def process_block(self, x):
+        """
+        Convolves exactly one block.
+
+        Args:
+            x (numpy.ndarray): Float samples (block_size x channels)
+        Returns:
+            (numpy.ndarray) block_size frames of output
+        """
+
+        # Step the ring buffer back by one block, overwriting the oldest spectrum with the new block's. The block j
+        # places before the newest is then at newest + j (wrapping round), and is multiplied by partition j
+        num_partitions = self.spectra.shape[0]
+        newest = self.newest = (self.newest - 1) % num_partitions
+        self.history[newest] = numpy.fft.rfft(x, 2 * self.block_size, axis=0)
+
+        spectrum = (self.history[newest:] * self.spectra[:num_partitions - newest]).sum(axis=0)
+        if newest:
+            spectrum += (self.history[:newest] * self.spectra[num_partitions - newest:]).sum(axis=0)
+
+        output = numpy.fft.irfft(spectrum, 2 * self.block_size, axis=0)
+
+        result = output[:self.block_size] + self.overlap
+        self.overlap = output[self.block_size:]
+
+        return result
+
+
+def synthetic_impulse_response(sample_rate, decay, num_channels=2, seed=0):
+    """
+    Builds an impulse response for a room: noise that dies away exponentially, reaching -60 dB after decay seconds.
+    Each channel has its own noise, which gives the reverb some stereo width.
+
+    Args:
+        sample_rate (int): Sample rate
+        decay (float): Reverberation time (to -60 dB), in seconds. Large rooms and caves have long decays
+        num_channels (int): Number of channels
+        seed (int): Seed for the noise, so the same room always sounds the same
+    Returns:
+        (numpy.ndarray) Impulse response (frames x channels), scaled to unit energy per channel
+    """
+
+    num_frames = max(1, int(decay * sample_rate))
+    noise = numpy.random.RandomState(seed).standard_normal((num_frames, num_channels))
+
+    # 60 dB is a factor of 1000 in amplitude
+    noise *= numpy.exp(numpy.arange(num_frames) * (-math.log(1000.0) / num_frames))[:, numpy.newaxis]
+
+    return normalise_impulse_response(noise)
+
+
+def normalise_impulse_response(impulse_response):
+    """
+    Scales an impulse response to unit energy per channel, so that reverb keeps the sound at roughly the same loudness
+    whatever the room.
+
+    Args:
+        impulse_response (numpy.ndarray): Impulse response (frames x channels)
+    Returns:
+        (numpy.ndarray) The scaled impulse response, as float64
+    """
+
+    h = as_frames(impulse_response)
+    energy = numpy.sqrt(numpy.square(h).sum(axis=0))
+
+    return h / numpy.maximum(energy, 1e-12)
@@ -1,10 +1,11 @@
-import math
-import pygame
-import Tkinter
-import tkFileDialog
-import numpy
 
-from dynsound import DynSound
+import filters
+import oscillator
+import sources
+import streaming
+import variants
+from effectchain import EffectChain
+from rendercache import RenderCache
 
 
 class Generator:
@@ -20,14 +21,41 @@ class Generator:
         edit_sound (DynSound): Sound after edits have been applied
         base_sound (DynSound): Original sound before edits are applied
         sound_valid (boolean): Whether the sound is valid. If invalid, sound will be validated before being played or saved
-
+        effect_chain (EffectChain): Stages that build edit_sound, each caching its output
+        render_cache (RenderCache): Finished sounds by their full set of parameters
+        resample_mode (string): How the frequency effects resample the sound: "nearest", "linear", "cubic" or "sinc"
+        floating (bool): Whether sounds are processed as float32 and only quantised (once) when played or saved
+        dither (bool): Whether to dither when quantising float sounds
+
+        source (string): Where the base sound comes from: "oscillator" (the waveform at the pitch), "white_noise",
+                         "pink_noise", "brown_noise" or the name of a sound file (see sources.make_source)
+        waveform (string): Shape of the base wave: "sine", "square", "saw", "triangle" or "noise"
+        pitch (float): Frequency of the base wave in hZ, before the frequency multiplier
         volume (float): Volume offset effect
         frequency (float): Frequency multiplier for sound
         frequency_shift (float): Rate of frequency increase or decrease over time
         echo_count (int): Number of echoes to follow the sound
         plops_per_second (int): Plop effect for sounds
+        filter_type (string): Biquad filter applied after the echoes: "none", or one of filters.BIQUAD_TYPES
+        filter_frequency (float): Cutoff or centre frequency of the filter in hZ
+        reverb (float): Reverberation time of a synthetic room in seconds, or 0 for no reverb
+        reverb_ir (string): WAV file of an impulse response to use instead of the synthetic room, or ""
+        reverb_wet (float): Share of the output that is reverb, from 0 to 1
+
+        PARAMETERS (tuple): Names of the sound parameters accepted by apply_parameters
+        PRESETS (dict): Parameters for each preset sound, by preset name
     """
 
+    PARAMETERS = ("length", "volume", "frequency", "frequency_shift", "plops", "echoes", "source", "waveform", "pitch",
+                  "filter", "filter_frequency", "reverb", "reverb_ir", "reverb_wet")
+
+    PRESETS = {
+        "death": {"frequency": 2, "frequency_shift": 0, "plops": 4, "echoes": 4},
+        "pickup": {"frequency": 3, "frequency_shift": 3, "plops": 28, "echoes": 0},
+        "jump": {"frequency": 2, "frequency_shift": 3, "plops": 0, "echoes": 0},
+        "laser": {"frequency": 2.5, "frequency_shift": 2, "plops": 80, "echoes": 0},
+    }
+
     mixer_sample_rate = 22050
     mixer_sample_size = -16
     mixer_num_channels = 2
@@ -36,20 +64,36 @@ class Generator:
     edit_sound = None
     base_sound = None
     sound_valid = False
-
-    sound_length = 1
+    effect_chain = None
+    render_cache = None
+    resample_mode = "nearest"
+    floating = True
+    dither = False
+
+    sound_length = 1  # 0 plays a file source in full
+    source = "oscillator"
+    waveform = "sine"
+    pitch = 440
     volume = 0  # Volume offset
     frequency = 1  # Frequency multiplier
     frequency_shift = 0  # in multiplier per second (TODO)
     echo_count = 0  # Number of echoes
     plops_per_second = 0
+    filter_type = "none"
+    filter_frequency = 2000
+    reverb = 0  # Reverberation time in seconds
+    reverb_ir = ""
+    reverb_wet = 0.3
 
-    def __init__(self, sample_rate, sample_size, num_channels, buffer_size):
+    def __init__(self, sample_rate, sample_size, num_channels, buffer_size, render_cache=None, floating=True):
         """
         Initialises sound generator with a base sine wave
 
         Args:
             sample_rate (int): Sample rate of mixer. Must match pygame.mixer initialisation properties.
+            render_cache (RenderCache): Cache of finished sounds. If None, an in-memory cache is created
+            floating (bool): Whether to process sounds as float32, quantising only when they are played or saved.
+                             If False, every effect clips and truncates to 16-bit samples, like the original generator
 
         """
 
@@ -57,9 +101,27 @@ class Generator:
         self.mixer_buffer_size = buffer_size
         self.mixer_num_channels = num_channels
         self.mixer_sample_size = sample_size
+        self.render_cache = render_cache or RenderCache()
+        self.floating = floating
         self.base_sound = self.create_sine(440, 1.0)
         self.edit_sound = self.base_sound.copy()
 
+        # Apply effects in an order which hopefully minimises clipping: volume, frequency, plops, echoes, then the
+        # filter and room, which colour everything before them
+        # Each stage is only recomputed when its parameters, or those of an earlier stage, change
+        self.effect_chain = EffectChain()
+        self.effect_chain.add_stage("base", lambda: (self.frequency * self.sound_length, self.get_source().get_key(),
+                                                     self.floating, self.dither), self.apply_base)
+        self.effect_chain.add_stage("volume", lambda: self.volume, self.apply_volume, lambda: self.volume != 0)
+        self.effect_chain.add_stage("frequency", lambda: (self.frequency, self.frequency_shift, self.resample_mode), self.apply_frequency,
+                                    lambda: self.frequency != 1.0 or self.frequency_shift != 0.0)
+        self.effect_chain.add_stage("plops", lambda: self.plops_per_second, self.apply_plops, lambda: self.plops_per_second > 0)
+        self.effect_chain.add_stage("echoes", lambda: self.echo_count, self.apply_echoes, lambda: self.echo_count > 0)
+        self.effect_chain.add_stage("filter", lambda: (self.filter_type, self.filter_frequency), self.apply_filter,
+                                    lambda: self.filter_type != "none")
+        self.effect_chain.add_stage("reverb", lambda: (self.reverb, self.reverb_ir, self.reverb_wet), self.apply_reverb,
+                                    self.has_reverb)
+
     def play_sound(self):
         """Previews the sound"""
 
@@ -69,6 +131,9 @@ class Generator:
     def save_sound(self):
         """Saves the sound as a WAV with a user-selected name"""
 
+        # Only needed by the GUI, so headless users of the generator don't need Tk
+        import tkFileDialog
+
         self.validate_sound()
 
         # Give the user a prompt to save the sound
@@ -88,29 +153,342 @@ class Generator:
         if self.edit_sound.sound:
             self.edit_sound.sound.stop()
 
-        # Regenerate the 2-second A4 base sine wave (note: in a stretch-goal version the user could select the base sound)
-        self.base_sound = self.create_sine(440, self.frequency * self.sound_length)  # self.frequency is used to rebalance the length of the final sound before change_frequency is called
+        self.edit_sound = self.render_sound()
 
-        # Recopy the base sound
-        self.edit_sound = self.base_sound.copy()
+        # Validate sound
+        self.sound_valid = True
+
+    def render_sound(self, should_cancel=None):
+        """
+        Renders the sound with the current parameters. Unlike validate_sound, this doesn't touch pygame.mixer or
+        edit_sound, so it is safe to call from a worker thread that owns this generator.
+
+        Args:
+            should_cancel (function): Optional; checked between effect stages. If it returns True, the render is
+                                      abandoned with effectchain.RenderCancelled
+        Returns:
+            (DynSound) The rendered sound. It may be shared with the caches, so copy it before editing
+        """
+
+        # Reuse the finished sound if these exact parameters have been rendered before
+        key = self.get_render_key()
+        sound = self.render_cache.get(key)
+
+        if sound is None:
+            # Rebuild the sound, reusing the output of every stage that hasn't changed
+            sound = self.effect_chain.run(should_cancel)
+            self.base_sound = self.effect_chain.outputs["base"]
+            self.render_cache.put(key, sound)
+
+        return sound
+
+    def get_render_key(self):
+        """
+        Returns the render cache key of the current parameters
 
-        # Apply effects in an order which hopefully minimises clipping: volume, frequency, plops, echoes
-        if self.volume is not 0:
-            self.edit_sound.change_volume(self.volume)
+        Returns:
+            (tuple) The key
+        """
+
+        return self.render_cache.make_key(self.mixer_sample_rate, self.mixer_num_channels, self.sound_length, self.volume,
+                                          self.frequency, self.frequency_shift, self.plops_per_second, self.echo_count,
+                                          self.resample_mode, self.floating, self.waveform, self.pitch, self.filter_type,
+                                          self.filter_frequency, self.reverb, self.reverb_ir, self.reverb_wet,
+                                          self.get_source().get_key(), self.dither)
+
+    def render_variants(self, parameter_sets):
+        """
+        Renders many variants of the sound at once (see variants.render_variants). Oscillator variants are rendered
+        as one 2-D computation: with nearest resampling, several times faster than rendering them one at a time (and
+        less so with the other resampling modes). The generator's own parameters are left as they are
+
+        Args:
+            parameter_sets (list): Parameters of each variant (dicts, see PARAMETERS). Parameters a set doesn't
+                                   include keep their current values
+        Returns:
+            (list) The rendered sounds (DynSound), in the same order. They may be shared with the render cache, so
+                   copy them before editing
+        """
+
+        return variants.render_variants(self, parameter_sets)
+
+    def create_stream(self, block_size=None):
+        """
+        Creates a streaming engine for the current parameters, which renders the sound a block at a time instead of
+        all at once. Playback (StreamingEngine.play) or saving (StreamingEngine.write) can start as soon as the first
+        block is ready, and memory use doesn't grow with the length of the sound.
+
+        Args:
+            block_size (int): Frames per block. If None, the mixer buffer size is used
+        Returns:
+            (streaming.StreamingEngine) The engine
+        """
+
+        if self.source != "oscillator":
+            # The engine synthesises its pitch shift directly, which only works for the oscillator
+            raise ValueError("Only the oscillator source can be streamed, not %s" % self.source)
+
+        return streaming.create_engine(self.mixer_sample_rate, self.mixer_num_channels, block_size or self.mixer_buffer_size,
+                                       self.sound_length, self.volume, self.frequency, self.frequency_shift,
+                                       self.plops_per_second, self.echo_count, self.waveform, self.pitch,
+                                       filter_type=self.filter_type, filter_frequency=self.filter_frequency,
+                                       impulse_response=self.get_impulse_response(1) if self.has_reverb() else None,
+                                       reverb_wet=self.reverb_wet, floating=self.floating)
+
+    def get_parameters(self):
+        """
+        Returns the current sound parameters
+
+        Returns:
+            (dict) Parameter values by name (see PARAMETERS), suitable for apply_parameters
+        """
+
+        return {"length": self.sound_length, "volume": self.volume, "frequency": self.frequency,
+                "frequency_shift": self.frequency_shift, "plops": self.plops_per_second, "echoes": self.echo_count,
+                "source": self.source, "waveform": self.waveform, "pitch": self.pitch, "filter": self.filter_type,
+                "filter_frequency": self.filter_frequency, "reverb": self.reverb, "reverb_ir": self.reverb_ir,
+                "reverb_wet": self.reverb_wet}
+
+    def get_source(self):
+        """
+        Returns the source of the base sound
+
+        Returns:
+            (sources.WaveSource, sources.NoiseSource or sources.FileSource) The source
+        """
+
+        return sources.make_source(self.source, self.waveform, self.pitch)
+
+    def apply_base(self, sound):
+        """
+        Effect stage: regenerates the base sound from the source (an A4 sine unless the source, waveform or pitch have
+        been changed). A file is only decoded the first time; later renders share the decoded samples
+
+        Args:
+            sound (DynSound): Unused; the first stage has no input
+        Returns:
+            (DynSound) The base sound
+        """
+
+        source = self.get_source()
+        length = self.frequency * self.sound_length  # self.frequency is used to rebalance the length of the final sound before change_frequency is called
+
+        if self.sound_length <= 0 and isinstance(source, sources.FileSource):
+            num_frames = None
+        else:
+            num_frames = int(length * self.mixer_sample_rate)
+
+        sound = source.render(num_frames, self.mixer_sample_rate, self.mixer_num_channels, self.floating)
+        sound.dither = self.dither
+
+        return sound
+
+    def apply_volume(self, sound):
+        """
+        Effect stage: applies the volume offset
+
+        Args:
+            sound (DynSound): Sound to change
+        """
+
+        sound.change_volume(self.volume)
+
+    def apply_frequency(self, sound):
+        """
+        Effect stage: applies the frequency multiplier and shift
+
+        Args:
+            sound (DynSound): Sound to change
+        """
 
         if self.frequency != 1.0 and self.frequency_shift == 0.0:
-            self.edit_sound.change_frequency(self.frequency)
+            sound.change_frequency(self.frequency, self.resample_mode)
         elif self.frequency_shift != 0.0:
-            self.edit_sound.change_frequency_shifting(self.frequency, self.frequency_shift)
+            sound.change_frequency_shifting(self.frequency, self.frequency_shift, self.resample_mode)
+
+    def apply_plops(self, sound):
+        """
+        Effect stage: applies the plop effect
+
+        Args:
+            sound (DynSound): Sound to change
+        """
 
-        if self.plops_per_second > 0:
-            self.edit_sound.add_plopper(self.plops_per_second)
+        sound.add_plopper(self.plops_per_second)
 
-        if self.echo_count > 0:
-            self.edit_sound.add_echo(0.3, -4, self.echo_count)
+    def apply_echoes(self, sound):
+        """
+        Effect stage: adds the echoes
 
-        # Validate sound
-        self.sound_valid = True
+        Args:
+            sound (DynSound): Sound to change
+        """
+
+        sound.add_echo(0.3, -4, self.echo_count)
+
+    def apply_filter(self, sound):
+        """
+        Effect stage: applies the filter
+
+        Args:
+            sound (DynSound): Sound to change
+        """
+
+        sound.apply_filter(self.filter_type, self.filter_frequency)
+
+    def has_reverb(self):
+        """Returns whether the reverb stage changes the sound"""
+
+        return self.reverb_wet > 0 and (self.reverb > 0 or self.reverb_ir != "")
+
+    def get_impulse_response(self, num_channels=None):
+        """
+        Returns the impulse response of the room: the reverb_ir file if one is set, otherwise a synthetic room
+
+        Args:
+            num_channels (int): Number of channels to return. If None, the mixer's
+        Returns:
+            (numpy.ndarray) Impulse response (frames x channels) at the mixer's sample rate
+        """
+
+        num_channels = num_channels or self.mixer_num_channels
+
+        if self.reverb_ir:
+            # Decoded once, like a file source
+            return sources.file_cache.load(self.reverb_ir, self.mixer_sample_rate, num_channels, floating=True).samples
+
+        return filters.synthetic_impulse_response(self.mixer_sample_rate, self.reverb, num_channels)
+
+    def apply_reverb(self, sound):
+        """
+        Effect stage: places the sound in the room
+
+        Args:
+            sound (DynSound): Sound to change
+        """
+
+        sound.add_reverb(self.get_impulse_response(), self.reverb_wet)
+
+    def apply_parameters(self, parameters):
+        """
+        Sets several sound parameters at once
+
+        Args:
+            parameters (dict): Parameter values by name (see PARAMETERS). Parameters that aren't included are unchanged
+        """
+
+        for name, value in parameters.items():
+            if name == "length":
+                self.change_length(value)
+            elif name == "volume":
+                self.change_volume(float(value))
+            elif name == "frequency":
+                self.change_frequency(value)
+            elif name == "frequency_shift":
+                self.change_frequency_shift(float(value))
+            elif name == "plops":
+                self.change_plopper(float(value))
+            elif name == "echoes":
+                self.change_echoes(int(value))
+            elif name == "source":
+                self.change_source(value)
+            elif name == "waveform":
+                self.change_waveform(value)
+            elif name == "pitch":
+                self.change_pitch(float(value))
+            elif name == "filter":
+                self.change_filter(value, self.filter_frequency)
+            elif name == "filter_frequency":
+                self.change_filter(self.filter_type, float(value))
+            elif name == "reverb":
+                self.change_reverb(float(value), self.reverb_ir, self.reverb_wet)
+            elif name == "reverb_ir":
+                self.change_reverb(self.reverb, value, self.reverb_wet)
+            elif name == "reverb_wet":
+                self.change_reverb(self.reverb, self.reverb_ir, float(value))
+            else:
+                raise ValueError("Unknown sound parameter: %s" % name)
+
+    def change_length(self, length):
+        """
+        Sets the length of the sound before frequency changes
+
+        Args:
+            length (float): Length of the sound in seconds
+        """
+
+        self.sound_length = float(length)
+        self.sound_valid = False
+
+    def change_source(self, source):
+        """
+        Sets where the base sound comes from
+
+        Args:
+            source (string): "oscillator", "white_noise", "pink_noise", "brown_noise" or the name of a sound file
+        """
+
+        # Raises ValueError for anything that isn't a source
+        sources.make_source(source)
+
+        self.source = source
+        self.sound_valid = False
+
+    def change_waveform(self, waveform):
+        """
+        Sets the shape of the base wave
+
+        Args:
+            waveform (string): "sine", "square", "saw", "triangle" or "noise"
+        """
+
+        if waveform not in oscillator.WAVEFORMS:
+            raise ValueError("Unknown waveform: %s" % waveform)
+
+        self.waveform = waveform
+        self.sound_valid = False
+
+    def change_pitch(self, pitch):
+        """
+        Sets the frequency of the base wave
+
+        Args:
+            pitch (float): Frequency in hZ
+        """
+
+        self.pitch = pitch
+        self.sound_valid = False
+
+    def change_filter(self, filter_type, frequency):
+        """
+        Sets the filter
+
+        Args:
+            filter_type (string): "none", or one of filters.BIQUAD_TYPES
+            frequency (float): Cutoff or centre frequency in hZ
+        """
+
+        if filter_type != "none" and filter_type not in filters.BIQUAD_TYPES:
+            raise ValueError("Unknown filter type: %s" % filter_type)
+
+        self.filter_type = filter_type
+        self.filter_frequency = frequency
+        self.sound_valid = False
+
+    def change_reverb(self, reverb, impulse_response_file="", wet=0.3):
+        """
+        Sets the room the sound is played in
+
+        Args:
+            reverb (float): Reverberation time of a synthetic room in seconds, or 0 for none
+            impulse_response_file (string): WAV file of a room's impulse response to use instead, or ""
+            wet (float): Share of the output that is reverb, from 0 to 1
+        """
+
+        self.reverb = reverb
+        self.reverb_ir = impulse_response_file
+        self.reverb_wet = wet
+        self.sound_valid = False
 
     def change_volume(self, new_volume):
         """
@@ -179,17 +557,25 @@ class Generator:
             (DynSound) A sine wave
         """
 
-        sound = DynSound(num_frames=int(length * self.mixer_sample_rate))
-        samples = pygame.sndarray.samples(sound.sound)
+        return self.create_wave("sine", frequency, length)
 
-        minimum_value = sound.sample_min
-        maximum_value = sound.sample_max
-        centre_value = (minimum_value + maximum_value) / 2
-        sample_range = sound.sample_max - centre_value
+    def create_wave(self, waveform, frequency, length, band_limited=False, use_table=False):
+        """
+        Creates a wave from the oscillator bank
+
+        Args:
+            waveform (string): Shape of the wave: "sine", "square", "saw", "triangle" or "noise"
+            frequency (float): Frequency of the wave in hZ
+            length (float): Length of the wave in seconds
+            band_limited (bool): Whether to remove harmonics above the Nyquist frequency (reduces aliasing)
+            use_table (bool): Whether to read the wave from a precomputed wavetable
+        Returns:
+            (DynSound) The wave
+        """
 
-        for index, sample in numpy.ndenumerate(samples):
-            samples[index[0], index[1]] = centre_value + math.sin(2.0 * math.pi * frequency * index[0] / self.mixer_sample_rate) * sample_range
+        source = sources.WaveSource(waveform, frequency, band_limited, use_table)
 
-        del samples
+        sound = source.render(int(length * self.mixer_sample_rate), self.mixer_sample_rate, self.mixer_num_channels, self.floating)
+        sound.dither = self.dither
 
         return sound
@@ -9,6 +9,7 @@ import tkFileDialog
 from dynsound import DynSound
 from ui import UI
 from generator import Generator
+from renderthread import RenderThread
 
 
 class App:
@@ -20,8 +21,13 @@ class App:
         SIZE (int): Size of sound in bits.
         CHANNELS (int): Number of channels.
         BUFFER (int): Size of buffer.
+        POLL_INTERVAL (int): Time between checks for finished renders, in milliseconds.
+        DEBOUNCE (float): Time the sliders must be still before a render starts, in seconds.
+        DRAFT_FREQUENCY (int): Sample rate of the quick draft rendered before each full-quality render.
 
-        generator (Generator): App sound generator
+        generator (Generator): App sound generator. Holds the current sound parameters
+        render_thread (RenderThread): Renders sounds in the background
+        playing_sound (DynSound): The sound last played
         ui (UI): App user interface
     """
 
@@ -29,8 +35,13 @@ class App:
     SIZE = -16
     CHANNELS = 2
     BUFFER = 4096
+    POLL_INTERVAL = 50
+    DEBOUNCE = 0.05
+    DRAFT_FREQUENCY = 8000
 
     generator = None
+    render_thread = None
+    playing_sound = None
     ui = None
 
     def __init__(self):
@@ -50,9 +61,16 @@ class App:
         self.generator = Generator(self.FREQUENCY, self.SIZE, self.CHANNELS, self.BUFFER)
         self.ui = UI()
 
+        # Sounds are rendered by the render thread's own generators, so the UI never waits for a render to finish
+        # Each sound is first rendered as a quick draft that can be previewed, then at full quality
+        self.render_thread = RenderThread(Generator(self.FREQUENCY, self.SIZE, self.CHANNELS, self.BUFFER),
+                                          Generator(self.DRAFT_FREQUENCY, self.SIZE, self.CHANNELS, self.BUFFER), self.DEBOUNCE)
+        self.render_thread.request(self.generator.get_parameters())
+        self.ui.main_screen.after(self.POLL_INTERVAL, self.poll_renders)
+
         # Initialise slider commands
-        self.ui.play_preview.config(command=lambda: self.generator.play_sound())
-        self.ui.save_sound.config(command=lambda: self.generator.save_sound())
+        self.ui.play_preview.config(command=lambda: self.play_sound())
+        self.ui.save_sound.config(command=lambda: self.save_sound())
 
         # Length slider
         self.ui.length_slider.config(command=lambda  value: self.on_slider_change(self.ui.length_slider, value))
@@ -75,6 +93,48 @@ class App:
         # Begin main UI loop
         self.ui.main_screen.mainloop()
 
+        # Report how quickly sounds became playable
+        self.render_thread.log_latency_summary()
+
+    def poll_renders(self):
+        """Collects finished renders from the render thread and shows the newest, then checks again after POLL_INTERVAL"""
+
+        self.ui.wave_view.show(self.render_thread.poll())
+        self.ui.main_screen.after(self.POLL_INTERVAL, self.poll_renders)
+
+    def play_sound(self):
+        """Previews the newest sound, waiting for it if it is still being rendered. This may be a draft"""
+
+        sound = self.render_thread.get_sound()
+
+        # Nothing to play if every render so far has failed
+        if sound is None:
+            return
+
+        # Stop the previous sound
+        if self.playing_sound and self.playing_sound.sound:
+            self.playing_sound.sound.stop()
+
+        self.playing_sound = sound
+        sound.play()
+
+    def save_sound(self):
+        """Saves the newest sound as a WAV with a user-selected name"""
+
+        # Never save a draft
+        sound = self.render_thread.get_sound(final=True)
+
+        # The render failed (and has already been reported), so there is nothing to save
+        if sound is None:
+            return
+
+        # Give the user a prompt to save the sound
+        filename = tkFileDialog.asksaveasfilename(initialdir="/", title="Save WAV as...", filetypes=[("Wave files", "*.wav")])
+
+        # Save it (unless the user cancelled)
+        if filename:
+            sound.save(filename)
+
     def on_slider_change(self, slider, value):
         """
         Callback function called by the UI when one of the sliders changes
@@ -86,8 +146,7 @@ class App:
         # Update sliders and change their colours on a per-slider basis
 
         if slider == self.ui.length_slider:
-            self.generator.sound_length = float(value)
-            self.generator.sound_valid = False
+            self.generator.change_length(float(value))
 
             # Make slidar DED ARD!!!
             black_factor = int(value) * 255 / 10
@@ -121,5 +180,8 @@ class App:
             # Sound like DEFF! AAAAGH!
             self.ui.change_slider_colour(self.ui.plop_slider, (0, 255 - (int(value) * 255 / 100), 0))
 
+        # Start rendering the new sound straight away (this supersedes any render still in progress)
+        self.render_thread.request(self.generator.get_parameters())
+
 # Main code run!
 App()
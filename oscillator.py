@@ -0,0 +1,211 @@
+import math
+
+import numpy
+
+
+WAVEFORMS = ("sine", "square", "saw", "triangle", "noise")
+
+# Number of entries in each wavetable (plus one guard entry for interpolation)
+TABLE_SIZE = 2048
+
+# Wavetables built so far, keyed by (waveform, number of harmonics)
+wavetables = {}
+
+
+def phase_ramp(frequency, num_frames, sample_rate, start_phase=0.0):
+    """
+    Runs a phase accumulator over a block of frames.
+
+    Args:
+        frequency (float or numpy.ndarray): Frequency in Hz, either constant or one value per frame
+        num_frames (int): Number of frames to generate
+        sample_rate (int): Sample rate of the sound
+        start_phase (float): Phase of the first frame, in cycles
+    Returns:
+        (numpy.ndarray) Phase of each frame in cycles, wrapped to [0, 1)
+    """
+
+    if numpy.ndim(frequency) == 0:
+        # Constant frequency: the accumulated phase is a straight line, so compute it directly to avoid drift
+        phases = numpy.arange(num_frames) * (float(frequency) / sample_rate)
+    else:
+        # Varying frequency: accumulate the per-frame phase increments, starting from zero on the first frame
+        phases = numpy.empty(num_frames)
+        phases[0:1] = 0.0
+        numpy.cumsum(numpy.asarray(frequency[:max(num_frames - 1, 0)], dtype=numpy.float64) / sample_rate, out=phases[1:])
+
+    phases += start_phase
+    numpy.mod(phases, 1.0, out=phases)
+
+    return phases
+
+
+def naive_waveform(waveform, phases, random_state=None):
+    """
+    Evaluates a waveform directly from its phase. Square, saw and triangle waves will alias at high frequencies.
+
+    Args:
+        waveform (string): One of WAVEFORMS
+        phases (numpy.ndarray): Phase of each frame in cycles, within [0, 1)
+        random_state (numpy.random.RandomState): Source of noise. If None, numpy's global generator is used
+    Returns:
+        (numpy.ndarray) Waveform values between -1 and 1
+    """
+
+    if waveform == "sine":
+        return numpy.sin(2.0 * math.pi * phases)
+    elif waveform == "square":
+        return numpy.where(phases < 0.5, 1.0, -1.0)
+    elif waveform == "saw":
+        return 2.0 * phases - 1.0
+    elif waveform == "triangle":
+        return 1.0 - 4.0 * numpy.abs(numpy.mod(phases + 0.25, 1.0) - 0.5)
+    elif waveform == "noise":
+        if random_state is None:
+            random_state = numpy.random
+        return random_state.uniform(-1.0, 1.0, phases.shape[0])
+    else:
+        raise ValueError("Unknown waveform: %s" % waveform)
+
+
+def harmonic_gains(waveform, num_harmonics):
+    """
+    Returns the Fourier sine-series gains of a waveform, up to a number of harmonics.
+
+    Args:
+        waveform (string): "sine", "square", "saw" or "triangle"
+        num_harmonics (int): Highest harmonic to include
+    Returns:
+        (numpy.ndarray) Gain of harmonics 1..num_harmonics
+    """
+
+    harmonics = numpy.arange(1, num_harmonics + 1, dtype=numpy.float64)
+    odd = harmonics % 2 == 1
+
+    if waveform == "sine":
+        return (harmonics == 1).astype(numpy.float64)
+    elif waveform == "square":
+        return numpy.where(odd, 4.0 / (math.pi * harmonics), 0.0)
+    elif waveform == "saw":
+        return -2.0 / (math.pi * harmonics)
+    elif waveform == "triangle":
+        signs = numpy.where((harmonics - 1) % 4 == 0, 1.0, -1.0)
+        return numpy.where(odd, signs * 8.0 / (math.pi * math.pi * harmonics * harmonics), 0.0)
+    else:
+        raise ValueError("Waveform has no harmonic series: %s" % waveform)
+
+
+def get_wavetable(waveform, num_harmonics=0):
+    """
+    Returns a single-cycle wavetable for a waveform, building and caching it on first use.
+
+    Args:
+        waveform (string): "sine", "square", "saw" or "triangle"
+        num_harmonics (int): If above 0, the table is band-limited to this many harmonics. Otherwise it is sampled naively
+    Returns:
+        (numpy.ndarray) TABLE_SIZE + 1 values; the last entry repeats the first so lookups can interpolate past the end
+    """
+
+    key = (waveform, num_harmonics)
+
+    if key not in wavetables:
+        phases = numpy.arange(TABLE_SIZE + 1, dtype=numpy.float64) / TABLE_SIZE
+
+        if num_harmonics > 0:
+            # Additive synthesis, one harmonic at a time to keep memory flat
+            table = numpy.zeros(TABLE_SIZE + 1)
+            for harmonic, gain in enumerate(harmonic_gains(waveform, num_harmonics), 1):
+                if gain != 0.0:
+                    table += gain * numpy.sin(2.0 * math.pi * harmonic * phases)
+
+            # Normalise the peak, since the Gibbs overshoot would otherwise clip
+            table /= numpy.max(numpy.abs(table))
+        else:
+            table = naive_waveform(waveform, phases % 1.0)
+
+        wavetables[key] = table
+
+    return wavetables[key]
+
+
+def table_lookup(table, phases):
+    """
+    Reads a wavetable at the given phases with linear interpolation.
+
+    Args:
+        table (numpy.ndarray): Wavetable from get_wavetable
+        phases (numpy.ndarray): Phase of each frame in cycles, within [0, 1)
+    Returns:
+        (numpy.ndarray) Interpolated table values
+    """
+
+    positions = phases * (table.shape[0] - 1)
+    indices = positions.astype(numpy.intp)
+    fractions = positions - indices
+
+    return table[indices] + fractions * (table[indices + 1] - table[indices])
+
+
+def generate(waveform, frequency, num_frames, sample_rate, band_limited=False, use_table=False, start_phase=0.0,
+             random_state=None):
+    """
+    Generates one channel of a waveform.
+
+    Args:
+        waveform (string): One of WAVEFORMS
+        frequency (float or numpy.ndarray): Frequency in Hz, either constant or one value per frame
+        num_frames (int): Number of frames to generate
+        sample_rate (int): Sample rate of the sound
+        band_limited (bool): Whether to leave out harmonics above the Nyquist frequency. Implies use_table
+        use_table (bool): Whether to read the waveform from a wavetable instead of evaluating it directly
+        start_phase (float): Phase of the first frame, in cycles
+        random_state (numpy.random.RandomState): Source of noise for the "noise" waveform
+    Returns:
+        (numpy.ndarray) Waveform values between -1 and 1
+    """
+
+    if waveform == "noise":
+        return naive_waveform(waveform, numpy.zeros(num_frames), random_state)
+
+    if waveform == "sine" and not use_table and numpy.ndim(frequency) == 0:
+        # Evaluate the sine directly in the same order as the original per-sample generator, so results are identical
+        frames = numpy.arange(num_frames, dtype=numpy.float64)
+        return numpy.sin(2.0 * math.pi * frequency * frames / sample_rate + 2.0 * math.pi * start_phase)
+
+    phases = phase_ramp(frequency, num_frames, sample_rate, start_phase)
+
+    if band_limited and waveform != "sine":
+        # Enough harmonics for the highest frequency to stay under Nyquist
+        highest_frequency = float(numpy.max(frequency)) if num_frames else 1.0
+        num_harmonics = max(1, int(sample_rate / 2.0 / max(highest_frequency, 1.0)))
+        return table_lookup(get_wavetable(waveform, num_harmonics), phases)
+    elif use_table:
+        return table_lookup(get_wavetable(waveform), phases)
+    else:
+        return naive_waveform(waveform, phases)
+
+
+def fill(samples, waveform, frequency, sample_rate, sample_min, sample_max, **kwargs):
+    """
+    Fills a block of samples with a waveform. The waveform is generated once and copied to every channel.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels) to fill
+        waveform (string): One of WAVEFORMS
+        frequency (float or numpy.ndarray): Frequency in Hz, either constant or one value per frame
+        sample_rate (int): Sample rate of the sound
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+        **kwargs: Passed on to generate
+    """
+
+    centre_value = (sample_min + sample_max) / 2
+    sample_range = sample_max - centre_value
+
+    wave = generate(waveform, frequency, samples.shape[0], sample_rate, **kwargs)
+    wave *= sample_range
+    wave += centre_value
+    numpy.clip(wave, sample_min, sample_max, out=wave)
+
+    # Broadcast the single channel across all channels (assignment truncates like int() does)
+    samples[...] = wave[:, numpy.newaxis]
@@ -0,0 +1,210 @@
+"""Opt-in profiling of the sound pipeline.
+
+When enabled, every DynSound effect, Generator render and effect chain stage records its wall time, the number of
+samples it processed and the bytes of new sample buffers it allocated. Profiling works by wrapping the methods when it
+is enabled and restoring them when it is disabled, so it costs nothing at all while it is off.
+
+    profiling.enable()
+    generator.validate_sound()
+    generator.edit_sound.save("sound.wav")
+    profiling.disable()
+    profiling.log_stats()
+
+Times are inclusive: validate_sound's time includes the time of the effects it runs.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+
+from dynsound import DynSound
+from effectchain import EffectChain
+from generator import Generator
+from soundbank import SoundBank
+from sources import FileCache
+
+
+# Methods that are wrapped while profiling is enabled
+PROFILED_METHODS = [
+    (DynSound, ["copy", "save", "resize", "crop", "mix", "add_echo", "change_frequency", "change_frequency_shifting",
+                "change_volume", "add_plopper", "change_sample_rate", "get_sound", "apply_filter", "apply_fir",
+                "add_reverb"]),
+    (Generator, ["validate_sound", "render_sound", "render_variants", "create_wave"]),
+    (FileCache, ["load"]),
+    (SoundBank, ["read_samples", "load"]),
+]
+
+# Whether profiling is on
+enabled = False
+
+# Totals by name: dict with calls, time, max_time, samples and bytes_allocated
+stats = {}
+
+# Original methods by (class, name), while they are wrapped
+originals = {}
+
+lock = threading.Lock()
+
+
+def record(name, elapsed, samples, bytes_allocated):
+    """
+    Adds one call to the totals.
+
+    Args:
+        name (string): Name of the stage or method
+        elapsed (float): Wall time, in seconds
+        samples (int): Number of samples (frames x channels) processed
+        bytes_allocated (int): Size of new sample buffers created, in bytes
+    """
+
+    with lock:
+        entry = stats.get(name)
+        if entry is None:
+            entry = stats[name] = {"calls": 0, "time": 0.0, "max_time": 0.0, "samples": 0, "bytes_allocated": 0}
+
+        entry["calls"] += 1
+        entry["time"] += elapsed
+        entry["max_time"] = max(entry["max_time"], elapsed)
+        entry["samples"] += samples
+        entry["bytes_allocated"] += bytes_allocated
+
+
+def find_samples(value):
+    """Returns the sample buffer of a DynSound, or None for anything else"""
+
+    return value.samples if isinstance(value, DynSound) else None
+
+
+def new_bytes(before, after):
+    """Returns the size of a sample buffer if it is a new one (rather than the same buffer, or one sharing it)"""
+
+    if after is None or after is before or (before is not None and after.base is before):
+        return 0
+
+    return after.nbytes
+
+
+def wrap(name, method):
+    """
+    Wraps a method so that each call is recorded.
+
+    Args:
+        name (string): Name to record the calls under
+        method (function): The method. Its first argument is the DynSound or Generator
+    Returns:
+        (function) The wrapped method
+    """
+
+    @functools.wraps(method)
+    def profiled(self, *args, **kwargs):
+        sound = self if isinstance(self, DynSound) else None
+        before = sound.samples if sound is not None else None
+
+        start = time.time()
+        result = method(self, *args, **kwargs)
+        elapsed = time.time() - start
+
+        after = sound.samples if sound is not None else find_samples(result)
+        samples = max(before.size if before is not None else 0, after.size if after is not None else 0)
+
+        record(name, elapsed, samples, new_bytes(before, after))
+
+        return result
+
+    return profiled
+
+
+def enable():
+    """Starts profiling. The totals carry on from any earlier profiling; see reset"""
+
+    global enabled
+
+    if enabled:
+        return
+
+    for cls, names in PROFILED_METHODS:
+        for name in names:
+            method = cls.__dict__[name]
+            originals[(cls, name)] = method
+            setattr(cls, name, wrap("%s.%s" % (cls.__name__, name), method))
+
+    # Effect chain stages are timed by the chain itself
+    EffectChain.stage_hook = staticmethod(record)
+
+    enabled = True
+
+
+def disable():
+    """Stops profiling, restoring the original methods. The totals are kept"""
+
+    global enabled
+
+    for (cls, name), method in originals.items():
+        setattr(cls, name, method)
+
+    originals.clear()
+    EffectChain.stage_hook = None
+    enabled = False
+
+
+def reset():
+    """Clears the totals"""
+
+    with lock:
+        stats.clear()
+
+
+def get_stats():
+    """
+    Returns the totals.
+
+    Returns:
+        (dict) Copies of the totals by name: calls, time and max_time (seconds), samples and bytes_allocated
+    """
+
+    with lock:
+        return dict((name, dict(entry)) for name, entry in stats.items())
+
+
+def merge_stats(other):
+    """
+    Adds totals collected elsewhere (e.g. by a render process) to these totals.
+
+    Args:
+        other (dict): Totals from get_stats
+    """
+
+    for name, entry in other.items():
+        with lock:
+            totals = stats.setdefault(name, {"calls": 0, "time": 0.0, "max_time": 0.0, "samples": 0, "bytes_allocated": 0})
+            for key in ("calls", "time", "samples", "bytes_allocated"):
+                totals[key] += entry[key]
+            totals["max_time"] = max(totals["max_time"], entry["max_time"])
+
+
+def dump(file_name):
+    """
+    Writes the totals to a JSON file.
+
+    Args:
+        file_name (string): The file to write
+    """
+
+    with open(file_name, "w") as dump_file:
+        json.dump(get_stats(), dump_file, indent=2, sort_keys=True)
+
+
+def log_stats(logger=None):
+    """
+    Logs the totals, slowest first.
+
+    Args:
+        logger (logging.Logger): Logger to write to. If None, the root logger is used
+    """
+
+    logger = logger or logging.getLogger()
+
+    for name, entry in sorted(get_stats().items(), key=lambda item: -item[1]["time"]):
+        logger.info("%-34s %6d calls %9.3fs total %9.3fs max %12d samples %10.1f MB allocated", name, entry["calls"],
+                    entry["time"], entry["max_time"], entry["samples"], entry["bytes_allocated"] / (1024.0 * 1024.0))
@@ -0,0 +1,318 @@
+"""Headless batch renderer: renders Generator sounds from a JSON or CSV manifest to WAV files, without Tk or pygame.mixer.
+
+Each manifest entry may have a "name", a "preset" (one of Generator.PRESETS) and any of the Generator.PARAMETERS:
+length, volume, frequency, frequency_shift, plops, echoes, source, waveform, pitch, filter, filter_frequency, reverb,
+reverb_ir and reverb_wet. A JSON manifest is a list of entries (or an object with a "sounds" list); a CSV manifest has one entry
+per row with the parameter names as column headers. In a JSON manifest, a parameter given as a list is swept: the entry
+is expanded to one sound per combination of the listed values.
+
+The rendered sounds can also be packed into one sound bank (see soundbank) for shipping.
+
+Usage: python render.py manifest.json --output-dir sounds/ [--processes N] [--bank sounds.bank [--compression delta]]
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import profiling
+import soundbank
+from generator import Generator
+from rendercache import RenderCache
+
+
+# Parameters used for anything an entry doesn't set, so entries don't inherit each other's settings
+DEFAULT_PARAMETERS = {
+    "length": Generator.sound_length,
+    "volume": Generator.volume,
+    "frequency": Generator.frequency,
+    "frequency_shift": Generator.frequency_shift,
+    "plops": Generator.plops_per_second,
+    "echoes": Generator.echo_count,
+    "source": Generator.source,
+    "waveform": Generator.waveform,
+    "pitch": Generator.pitch,
+    "filter": Generator.filter_type,
+    "filter_frequency": Generator.filter_frequency,
+    "reverb": Generator.reverb,
+    "reverb_ir": Generator.reverb_ir,
+    "reverb_wet": Generator.reverb_wet,
+}
+
+
+def load_manifest(file_name):
+    """
+    Loads the entries of a render manifest.
+
+    Args:
+        file_name (string): A .json or .csv manifest
+    Returns:
+        (list) One dict per entry
+    """
+
+    if file_name.lower().endswith(".csv"):
+        with open(file_name, "rb") as manifest:
+            # Blank cells mean "use the default"
+            return [dict((key, value) for key, value in row.items() if value not in ("", None)) for row in csv.DictReader(manifest)]
+
+    with open(file_name, "r") as manifest:
+        entries = json.load(manifest)
+
+    if isinstance(entries, dict):
+        entries = entries["sounds"]
+
+    return entries
+
+
+def expand_sweeps(entries):
+    """
+    Expands manifest entries with list-valued parameters into one entry per combination of values.
+
+    Args:
+        entries (list): Manifest entries
+    Returns:
+        (list) Entries with single-valued parameters only, in a fixed order
+    """
+
+    expanded = []
+
+    for index, entry in enumerate(entries):
+        swept = sorted(key for key, value in entry.items() if isinstance(value, list))
+
+        if not swept:
+            expanded.append(entry)
+            continue
+
+        base_name = entry.get("name") or "sound_%04d" % index
+        for values in itertools.product(*[entry[key] for key in swept]):
+            variant = dict(entry)
+            variant.update(zip(swept, values))
+            variant["name"] = base_name + "".join("_%s-%s" % (key, value) for key, value in zip(swept, values))
+            expanded.append(variant)
+
+    return expanded
+
+
+def entry_parameters(entry, index):
+    """
+    Resolves a manifest entry to a file name and a full set of sound parameters.
+
+    Args:
+        entry (dict): The manifest entry
+        index (int): Position of the entry in the manifest, used to name unnamed entries
+    Returns:
+        (string, dict) The entry's name and its parameters
+    """
+
+    parameters = dict(DEFAULT_PARAMETERS)
+    name = entry.get("name") or "sound_%04d" % index
+
+    if entry.get("preset"):
+        parameters.update(Generator.PRESETS[entry["preset"]])
+
+    for key, value in entry.items():
+        if key not in ("name", "preset"):
+            parameters[key] = value
+
+    return name, parameters
+
+
+def render(generator, parameters):
+    """
+    Renders one sound.
+
+    Args:
+        generator (Generator): The generator to render with
+        parameters (dict): Sound parameters, see Generator.PARAMETERS
+    Returns:
+        (DynSound) The rendered sound
+    """
+
+    generator.apply_parameters(parameters)
+    generator.validate_sound()
+
+    return generator.edit_sound
+
+
+# Generator used by render_job in this process, created by init_worker
+worker_generator = None
+
+
+def init_worker(sample_rate, num_channels, cache_dir=None, profile=False):
+    """
+    Sets up a rendering process. Workers only need a Generator; no display or mixer is initialised.
+
+    Args:
+        sample_rate (int): Sample rate of the rendered sounds
+        num_channels (int): Number of channels in the rendered sounds
+        cache_dir (string): Folder of previously rendered sounds to reuse and add to, or None
+        profile (bool): Whether to profile each render (see profiling); the totals are returned with each result
+    """
+
+    global worker_generator
+    worker_generator = Generator(sample_rate, -16, num_channels, 4096, RenderCache(disk_dir=cache_dir))
+
+    if profile:
+        profiling.enable()
+
+
+def render_job(job):
+    """
+    Renders one sound and saves it. Errors are caught and returned so that one bad entry doesn't stop the batch.
+
+    Args:
+        job (tuple): (name, parameters, file name, sample format)
+    Returns:
+        (dict) The result: name, file, parameters, frames, render_time and save_time, or error if rendering failed.
+               When profiling, profile holds the profiling totals for this job
+    """
+
+    name, parameters, file_name, sample_format = job
+    result = {"name": name, "file": file_name, "parameters": parameters}
+
+    try:
+        render_start = time.time()
+        sound = render(worker_generator, parameters)
+        result["render_time"] = time.time() - render_start
+
+        save_start = time.time()
+        sound.save(file_name, sample_format)
+        result["save_time"] = time.time() - save_start
+        result["frames"] = sound.samples.shape[0]
+    except Exception:
+        result["error"] = traceback.format_exc()
+
+        # The generator may have been left half-way through a render
+        worker_generator.sound_valid = False
+
+    if profiling.enabled:
+        result["profile"] = profiling.get_stats()
+        profiling.reset()
+
+    return result
+
+
+def render_batch(jobs, sample_rate=22050, num_channels=2, processes=1, on_result=None, cache_dir=None, profile=False):
+    """
+    Renders a list of jobs, spread across a pool of processes.
+
+    Args:
+        jobs (list): Jobs for render_job
+        sample_rate (int): Sample rate of the rendered sounds
+        num_channels (int): Number of channels in the rendered sounds
+        processes (int): Number of processes to render with. 1 renders in this process; 0 uses one per CPU core
+        on_result (function): Optional callback, called with each result as soon as it is available (in job order)
+        cache_dir (string): Folder of previously rendered sounds to reuse and add to, or None
+        profile (bool): Whether to profile each render; see render_job
+    Returns:
+        (list) Results from render_job, in the same order as the jobs
+    """
+
+    results = []
+
+    if processes == 1:
+        init_worker(sample_rate, num_channels, cache_dir, profile)
+        try:
+            for job in jobs:
+                results.append(render_job(job))
+                if on_result:
+                    on_result(results[-1])
+        finally:
+            profiling.disable()
+
+        return results
+
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes, init_worker, (sample_rate, num_channels, cache_dir, profile))
+
+    # Hand out several jobs at a time so short renders aren't dominated by inter-process overhead
+    chunk_size = max(1, len(jobs) // (processes * 4))
+
+    try:
+        # imap keeps the results in job order, whichever worker finishes first
+        for result in pool.imap(render_job, jobs, chunk_size):
+            results.append(result)
+            if on_result:
+                on_result(result)
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+
+def print_result(result):
+    """Prints a one-line summary of a render result"""
+
+    if "error" in result:
+        print("%-32s FAILED: %s" % (result["name"], result["error"].strip().splitlines()[-1]))
+    else:
+        print("%-32s %8.3fs render %8.3fs save  %s" % (result["name"], result["render_time"], result["save_time"], result["file"]))
+
+
+def main(argv):
+    """Renders every entry of a manifest and reports the time taken for each"""
+
+    parser = argparse.ArgumentParser(description="Render Generator sounds from a manifest without a display or audio device.")
+    parser.add_argument("manifest", help="JSON or CSV file listing the sounds to render")
+    parser.add_argument("-o", "--output-dir", default=".", help="Folder to write the WAV files to")
+    parser.add_argument("--sample-rate", type=int, default=22050, help="Sample rate of the rendered sounds")
+    parser.add_argument("--channels", type=int, default=2, help="Number of channels in the rendered sounds")
+    parser.add_argument("--format", default="int16", help="WAV sample format: uint8, int16, int24, int32 or float32")
+    parser.add_argument("--processes", type=int, default=1, help="Number of render processes (0 for one per CPU core)")
+    parser.add_argument("--cache-dir", help="Folder to keep rendered sounds in, so identical renders are reused across runs")
+    parser.add_argument("--bank", help="Optional sound bank file to pack the rendered sounds into as well")
+    parser.add_argument("--compression", default="none", choices=soundbank.COMPRESSIONS,
+                        help="Compression of each sound in the bank")
+    parser.add_argument("--report", help="Optional file to write per-sound timings to, as JSON")
+    parser.add_argument("--profile", help="Optional file to write the time spent in each effect and stage to, as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    jobs = []
+    for index, entry in enumerate(expand_sweeps(load_manifest(args.manifest))):
+        name, parameters = entry_parameters(entry, index)
+        jobs.append((name, parameters, os.path.join(args.output_dir, name + ".wav"), args.format))
+
+    total_start = time.time()
+    results = render_batch(jobs, args.sample_rate, args.channels, args.processes, print_result, args.cache_dir,
+                           bool(args.profile))
+    failures = [result for result in results if "error" in result]
+
+    print("Rendered %d sounds in %.3fs" % (len(results) - len(failures), time.time() - total_start))
+
+    if args.bank:
+        bank_start = time.time()
+        soundbank.pack_wavs(args.bank, [(result["name"], result["file"]) for result in results if "error" not in result],
+                            args.compression, threads=args.processes)
+        print("Packed %s in %.3fs" % (args.bank, time.time() - bank_start))
+
+    if args.report:
+        with open(args.report, "w") as report:
+            json.dump(results, report, indent=2)
+
+    if args.profile:
+        # Add up the totals from every job (and every process)
+        profiling.reset()
+        for result in results:
+            profiling.merge_stats(result.pop("profile", {}))
+        profiling.dump(args.profile)
+
+    if failures:
+        print("%d sounds failed:" % len(failures))
+        for result in failures:
+            print("%s\n%s" % (result["name"], result["error"]))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
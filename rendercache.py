@@ -0,0 +1,232 @@
+import collections
+import hashlib
+import os
+import tempfile
+
+from dynsound import DynSound
+
+
+def as_byte_string(value):
+    """
+    Converts unicode strings (e.g. from a JSON manifest) to UTF-8 byte strings, including inside tuples, so that keys
+    built from either kind of string have the same repr and therefore the same file on disk.
+
+    Args:
+        value: A string, a tuple of values, or any other value (returned as it is)
+    Returns:
+        The value with every unicode string encoded
+    """
+
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+
+    if isinstance(value, tuple):
+        return tuple(as_byte_string(item) for item in value)
+
+    return value
+
+
+class RenderCache:
+    """
+    Cache of rendered sounds keyed by the full set of parameters that produced them. Sounds are kept in memory up to a
+    byte budget, evicting the least recently used first, and can also be written to a folder so they survive restarts.
+
+    Attributes:
+        memory_budget (int): Maximum total size of the sounds kept in memory, in bytes
+        memory_used (int): Total size of the sounds currently kept in memory, in bytes
+        disk_dir (string): Folder for the on-disk tier, or None to keep sounds in memory only
+        disk_budget (int): Maximum total size of the on-disk tier in bytes, or None for no limit
+        entries (collections.OrderedDict): Sounds (DynSound) in memory by key, least recently used first
+        hits (int): Number of lookups answered from memory
+        disk_hits (int): Number of lookups answered from disk
+        misses (int): Number of lookups that weren't cached
+    """
+
+    memory_budget = 0
+    memory_used = 0
+    disk_dir = None
+    disk_budget = None
+    entries = None
+    hits = 0
+    disk_hits = 0
+    misses = 0
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, disk_dir=None, disk_budget=None):
+        """
+        Creates an empty render cache.
+
+        Args:
+            memory_budget (int): Maximum total size of the sounds kept in memory, in bytes
+            disk_dir (string): Folder for the on-disk tier, or None to keep sounds in memory only
+            disk_budget (int): Maximum total size of the on-disk tier in bytes, or None for no limit
+        """
+
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.disk_dir = disk_dir
+        self.disk_budget = disk_budget
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_dir and not os.path.isdir(disk_dir):
+            os.makedirs(disk_dir)
+
+    def make_key(self, sample_rate, num_channels, length, volume, frequency, frequency_shift, plops, echoes,
+                 resample_mode="nearest", floating=False, waveform="sine", pitch=440, filter_type="none",
+                 filter_frequency=2000, reverb=0, reverb_ir="", reverb_wet=0.3, source=None, dither=False):
+        """
+        Builds a cache key from the parameters of a render. Numbers are normalised so that e.g. 2 and 2.0 match, and
+        strings so that e.g. u"sine" and "sine" match.
+
+        Args:
+            sample_rate (int): Sample rate of the sound
+            num_channels (int): Number of channels in the sound
+            length (float): Length of the sound before frequency changes, in seconds
+            volume (float): Volume offset
+            frequency (float): Frequency multiplier
+            frequency_shift (float): Rate of frequency change
+            plops (float): Plops per second
+            echoes (int): Number of echoes
+            resample_mode (string): Resampling mode of the frequency effects
+            floating (bool): Whether the sound was processed as floats
+            waveform (string): Shape of the base wave
+            pitch (float): Frequency of the base wave in hZ
+            filter_type (string): Filter applied to the sound, or "none"
+            filter_frequency (float): Cutoff or centre frequency of the filter
+            reverb (float): Reverberation time of the synthetic room, or 0
+            reverb_ir (string): Impulse response file of the room, or ""
+            reverb_wet (float): Share of the output that is reverb
+            source (tuple): Key of the base sound's source (see sources), or None for the oscillator
+            dither (bool): Whether the sound dithers when its float samples are quantised
+        Returns:
+            (tuple) The key
+        """
+
+        return (int(sample_rate), int(num_channels), float(length), float(volume), float(frequency),
+                float(frequency_shift), float(plops), int(echoes), as_byte_string(resample_mode), bool(floating),
+                as_byte_string(waveform), float(pitch), as_byte_string(filter_type), float(filter_frequency),
+                float(reverb), as_byte_string(reverb_ir), float(reverb_wet), as_byte_string(source), bool(dither))
+
+    def get_file_name(self, key):
+        """
+        Returns the on-disk file for a key. The name is a hash of the key, so identical renders share a file.
+
+        Args:
+            key (tuple): Key from make_key
+        Returns:
+            (string) Path of the WAV file for the key
+        """
+
+        return os.path.join(self.disk_dir, hashlib.sha1(repr(key).encode("ascii")).hexdigest() + ".wav")
+
+    def get(self, key):
+        """
+        Looks up a rendered sound.
+
+        Args:
+            key (tuple): Key from make_key
+        Returns:
+            (DynSound) The cached sound, or None if it isn't cached. The sound is shared, so copy it before editing
+        """
+
+        if key in self.entries:
+            self.hits += 1
+
+            # Mark as most recently used
+            sound = self.entries.pop(key)
+            self.entries[key] = sound
+            return sound
+
+        if self.disk_dir:
+            file_name = self.get_file_name(key)
+
+            if os.path.isfile(file_name):
+                self.disk_hits += 1
+
+                # Touch the file so the disk tier evicts it last
+                os.utime(file_name, None)
+
+                # Loading maps the file rather than reading it. Float renders were saved as float32, so they come back
+                # exactly as they were rendered
+                sound = DynSound(load_file=file_name, num_channels=key[1], sample_rate=key[0], floating=key[9])
+                sound.dither = key[18]
+                self.add_to_memory(key, sound)
+                return sound
+
+        self.misses += 1
+        return None
+
+    def put(self, key, sound):
+        """
+        Adds a rendered sound to the cache.
+
+        Args:
+            key (tuple): Key from make_key
+            sound (DynSound): The rendered sound. It must not be edited after being cached
+        """
+
+        self.add_to_memory(key, sound)
+
+        if self.disk_dir:
+            file_name = self.get_file_name(key)
+
+            if not os.path.isfile(file_name):
+                # Write to a temporary file first, so other processes never see a half-written sound
+                handle, temp_name = tempfile.mkstemp(suffix=".wav", dir=self.disk_dir)
+                os.close(handle)
+                sound.save(temp_name, "float32" if sound.floating else "int16")
+                os.rename(temp_name, file_name)
+
+                self.trim_disk()
+
+    def add_to_memory(self, key, sound):
+        """
+        Adds a sound to the in-memory tier, evicting the least recently used sounds to stay within the budget.
+
+        Args:
+            key (tuple): Key from make_key
+            sound (DynSound): The sound
+        """
+
+        if key in self.entries:
+            self.memory_used -= self.entries.pop(key).samples.nbytes
+
+        size = sound.samples.nbytes
+        if size > self.memory_budget:
+            # Too big to keep in memory at all
+            return
+
+        self.entries[key] = sound
+        self.memory_used += size
+
+        while self.memory_used > self.memory_budget:
+            evicted_key, evicted_sound = self.entries.popitem(last=False)
+            self.memory_used -= evicted_sound.samples.nbytes
+
+    def trim_disk(self):
+        """Deletes the least recently used files in the on-disk tier until it is within its budget"""
+
+        if self.disk_budget is None:
+            return
+
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".wav"):
+                path = os.path.join(self.disk_dir, name)
+                files.append((os.path.getmtime(path), os.path.getsize(path), path))
+
+        total_size = sum(size for modified, size, path in files)
+        for modified, size, path in sorted(files):
+            if total_size <= self.disk_budget:
+                break
+
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        """Empties the in-memory tier. The on-disk tier is left alone"""
+
+        self.entries.clear()
+        self.memory_used = 0
@@ -0,0 +1,250 @@
+import collections
+import logging
+import Queue
+import threading
+import time
+import traceback
+
+from effectchain import RenderCancelled
+
+
+class RenderThread(threading.Thread):
+    """
+    Renders sounds on a worker thread, so the UI never waits for a render. Each request supersedes any render still in
+    flight: the old render is abandoned at its next effect stage and the newest parameters are rendered instead.
+
+    Bursts of requests (e.g. from a slider being dragged) can be coalesced by waiting for a short quiet period before
+    rendering. With a draft generator, each request is first rendered as a quick low-sample-rate draft that can be
+    played straight away, then refined to the full-quality render.
+
+    Attributes:
+        generator (Generator): Generator used only by the worker thread, for full-quality renders
+        draft_generator (Generator): Generator used only by the worker thread for drafts, or None to skip drafts
+        debounce (float): Time without new requests to wait before rendering, in seconds
+        requests (Queue.Queue): Pending (request id, parameters, request time) tuples
+        results (Queue.Queue): Finished (request id, DynSound, is final, seconds since request) tuples
+        request_id (int): Id of the newest request
+        latest_id (int): Id of the newest request whose sound has been collected from the results
+        latest_sound (DynSound): The newest collected sound
+        latest_is_final (bool): Whether latest_sound is the full-quality render (rather than a draft)
+        latest_failed (bool): Whether the newest collected request failed to render, so latest_sound is left over from
+                              an older request or is only a draft
+        latencies (collections.deque): Timings of recent requests, as dicts with the request id, first_audio (time from
+                                       request to the first playable sound) and final (time to the full-quality sound)
+        running (bool): Whether the worker thread should keep running
+    """
+
+    generator = None
+    draft_generator = None
+    debounce = 0.0
+    requests = None
+    results = None
+    request_id = 0
+    latest_id = 0
+    latest_sound = None
+    latest_is_final = False
+    latest_failed = False
+    latencies = None
+    running = True
+
+    def __init__(self, generator, draft_generator=None, debounce=0.0):
+        """
+        Creates and starts the render thread.
+
+        Args:
+            generator (Generator): Generator to render with. It must not be used by any other thread afterwards
+            draft_generator (Generator): Generator with a low sample rate to render drafts with, or None for no drafts.
+                                         It must not be used by any other thread afterwards
+            debounce (float): Time without new requests to wait before rendering, in seconds
+        """
+
+        threading.Thread.__init__(self, name="RenderThread")
+        self.daemon = True
+
+        self.generator = generator
+        self.draft_generator = draft_generator
+        self.debounce = debounce
+        self.requests = Queue.Queue()
+        self.results = Queue.Queue()
+        self.request_id = 0
+        self.latest_id = 0
+        self.latest_sound = None
+        self.latest_is_final = False
+        self.latest_failed = False
+        self.latencies = collections.deque(maxlen=100)
+        self.running = True
+
+        self.start()
+
+    def request(self, parameters):
+        """
+        Asks for a sound to be rendered. Called from the UI thread.
+
+        Args:
+            parameters (dict): Sound parameters, see Generator.PARAMETERS
+        Returns:
+            (int) Id of the request
+        """
+
+        self.request_id += 1
+        self.requests.put((self.request_id, dict(parameters), time.time()))
+
+        return self.request_id
+
+    def run(self):
+        """Worker thread: renders the newest request, skipping and cancelling superseded ones"""
+
+        while self.running:
+            request_id, parameters, request_time = self.requests.get()
+
+            # Skip straight to the newest request, and keep skipping until the requests stop for the debounce time
+            while True:
+                try:
+                    request_id, parameters, request_time = self.requests.get(timeout=self.debounce) if self.debounce > 0 else self.requests.get_nowait()
+                except Queue.Empty:
+                    break
+
+            if request_id is None:
+                # Stop request
+                break
+
+            is_superseded = lambda: not self.requests.empty()
+
+            try:
+                if self.draft_generator:
+                    self.results.put((request_id, self.render_draft(parameters, is_superseded), False, time.time() - request_time))
+
+                self.generator.apply_parameters(parameters)
+                sound = self.generator.render_sound(is_superseded)
+            except RenderCancelled:
+                continue
+            except Exception:
+                # Report the error, but keep the thread (and anyone waiting on this request) going
+                traceback.print_exc()
+                sound = None
+
+            self.results.put((request_id, sound, True, time.time() - request_time))
+
+    def render_draft(self, parameters, should_cancel):
+        """
+        Renders a draft with the draft generator and converts it to the full-quality sample rate so it can be played.
+
+        Args:
+            parameters (dict): Sound parameters
+            should_cancel (function): Checked between effect stages; see Generator.render_sound
+        Returns:
+            (DynSound) The draft
+        """
+
+        self.draft_generator.apply_parameters(parameters)
+
+        # The render is shared with the draft generator's caches, so convert a copy
+        draft = self.draft_generator.render_sound(should_cancel).copy()
+        draft.change_sample_rate(self.generator.mixer_sample_rate)
+
+        return draft
+
+    def poll(self):
+        """
+        Collects finished renders without waiting. Called from the UI thread.
+
+        Returns:
+            (DynSound) The newest finished sound, or None if nothing has been rendered yet
+        """
+
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except Queue.Empty:
+                break
+
+            self.store_result(*result)
+
+        return self.latest_sound
+
+    def get_sound(self, wait=True, final=False):
+        """
+        Returns the newest finished sound. Called from the UI thread.
+
+        Args:
+            wait (bool): Whether to wait for the newest request to finish rendering. If False, the newest sound that
+                         has already finished is returned
+            final (bool): Whether to wait for the full-quality render rather than a draft
+        Returns:
+            (DynSound) The sound, or None if nothing has been rendered yet and wait is False, or if final is True and
+            the full-quality render failed
+        """
+
+        self.poll()
+
+        while wait and (self.latest_id < self.request_id or (final and not self.latest_is_final)):
+            self.store_result(*self.results.get())
+
+        if final and self.latest_failed:
+            return None
+
+        return self.latest_sound
+
+    def store_result(self, result_id, sound, is_final, latency):
+        """
+        Keeps a finished render if it is newer than the current one, and records its timing.
+
+        Args:
+            result_id (int): Id of the request the sound was rendered for
+            sound (DynSound): The sound, or None if the render failed (the previous sound is kept for previews, but is
+                              never returned as the final sound)
+            is_final (bool): Whether the sound is the full-quality render (or the render has finished, if it failed)
+            latency (float): Time from the request to the sound being ready, in seconds
+        """
+
+        if result_id < self.latest_id or (result_id == self.latest_id and self.latest_is_final):
+            return
+
+        if result_id > self.latest_id:
+            self.latencies.append({"request": result_id, "first_audio": latency, "final": None})
+
+        if is_final:
+            self.latencies[-1]["final"] = latency
+
+        self.latest_id = result_id
+        self.latest_is_final = is_final
+        self.latest_failed = sound is None
+
+        if sound is not None:
+            self.latest_sound = sound
+
+    def get_latency_summary(self):
+        """
+        Summarises recent render latencies.
+
+        Returns:
+            (dict) Number of requests timed, and mean time to first audio and to the final render, in seconds
+        """
+
+        first_audio = [latency["first_audio"] for latency in self.latencies]
+        final = [latency["final"] for latency in self.latencies if latency["final"] is not None]
+
+        return {"requests": len(self.latencies),
+                "first_audio": sum(first_audio) / len(first_audio) if first_audio else None,
+                "final": sum(final) / len(final) if final else None}
+
+    def log_latency_summary(self, logger=None):
+        """
+        Logs the mean render latencies, if anything has been rendered.
+
+        Args:
+            logger (logging.Logger): Logger to write to. If None, the root logger is used
+        """
+
+        logger = logger or logging.getLogger()
+        latency = self.get_latency_summary()
+
+        if latency["requests"]:
+            logger.info("%d renders: %.3fs average to first audio, %.3fs average to final render", latency["requests"],
+                        latency["first_audio"], latency["final"] or 0.0)
+
+    def stop(self):
+        """Stops the worker thread once its current render is finished"""
+
+        self.running = False
+        self.requests.put((None, None, None))
@@ -0,0 +1,331 @@
+import math
+
+import numpy
+
+
+MODES = ("nearest", "linear", "cubic", "sinc")
+
+# Half the width of the windowed-sinc kernel, in input frames (before widening for anti-aliasing)
+SINC_HALF_WIDTH = 8
+
+# Number of fractional positions the polyphase sinc table is sampled at
+SINC_PHASES = 256
+
+# Frames resampled at a time, to keep the per-tap temporaries small
+CHUNK_FRAMES = 16384
+
+# Polyphase tables by (half width, cutoff)
+sinc_tables = {}
+
+
+def constant_positions(num_frames, ratio):
+    """
+    Builds the read positions for resampling by a constant ratio.
+
+    Args:
+        num_frames (int): Length of the source, in frames
+        ratio (float): Source frames advanced per output frame (2 plays the sound an octave higher)
+    Returns:
+        (numpy.ndarray) Position in the source of each output frame
+    """
+
+    new_length = int(math.ceil(num_frames / float(ratio)))
+
+    return numpy.arange(new_length) * float(ratio)
+
+
+def integrate_ratios(ratios):
+    """
+    Builds read positions from a ratio that varies over time, by integrating the ratio: each output frame reads from
+    the position of the previous frame plus the previous frame's ratio.
+
+    Args:
+        ratios (numpy.ndarray): Source frames advanced at each output frame
+    Returns:
+        (numpy.ndarray) Position in the source of each output frame
+    """
+
+    positions = numpy.empty(ratios.shape[0])
+    positions[0:1] = 0.0
+    numpy.cumsum(ratios[:max(ratios.shape[0] - 1, 0)], out=positions[1:])
+
+    return positions
+
+
+def sweep_length(num_frames, sample_rate, ratio, ratio_shift):
+    """
+    Calculates the length of a resample whose ratio changes linearly over time, which stops at the end of the source
+    (or where the ratio reaches zero, if it is falling).
+
+    Args:
+        num_frames (int): Length of the source, in frames
+        sample_rate (int): Sample rate of the source
+        ratio (float): Ratio at the start
+        ratio_shift (float): Amount the ratio increases per second of output
+    Returns:
+        (int) Length of the output, in frames
+    """
+
+    # The integrated position after n frames is ratio * n + shift * n * (n - 1) / (2 * rate); solve for the end
+    a = ratio_shift / (2.0 * sample_rate)
+    b = ratio - a
+
+    if a == 0.0:
+        new_length = num_frames / b if b > 0 else 0
+    else:
+        discriminant = b * b + 4.0 * a * num_frames
+        if discriminant >= 0:
+            roots = [(-b + sign * math.sqrt(discriminant)) / (2.0 * a) for sign in (-1, 1)]
+            positive = [root for root in roots if root >= 0]
+            new_length = min(positive) if positive else 0
+        else:
+            new_length = float("inf")
+
+        if ratio_shift < 0:
+            # Don't run backwards once the ratio reaches zero
+            new_length = min(new_length, max(0.0, -ratio * sample_rate / ratio_shift))
+
+    return int(math.ceil(new_length))
+
+
+def sweep_positions(num_frames, sample_rate, ratio, ratio_shift):
+    """
+    Builds the read positions for a ratio that changes linearly over time, stopping at the end of the source (or
+    where the ratio reaches zero, if it is falling).
+
+    Args:
+        num_frames (int): Length of the source, in frames
+        sample_rate (int): Sample rate of the source
+        ratio (float): Ratio at the start
+        ratio_shift (float): Amount the ratio increases per second of output
+    Returns:
+        (numpy.ndarray) Position in the source of each output frame
+    """
+
+    a = ratio_shift / (2.0 * sample_rate)
+    frames = numpy.arange(sweep_length(num_frames, sample_rate, ratio, ratio_shift), dtype=numpy.float64)
+
+    return ratio * frames + a * frames * (frames - 1.0)
+
+
+def get_sinc_table(half_width, cutoff):
+    """
+    Builds (or fetches) a polyphase windowed-sinc table: the kernel taps for each of SINC_PHASES + 1 fractional
+    positions between two frames. Each row is normalised to unity gain.
+
+    Args:
+        half_width (int): Half the number of taps
+        cutoff (float): Cutoff as a fraction of the source Nyquist frequency (1 for no anti-aliasing)
+    Returns:
+        (numpy.ndarray) Table of shape (SINC_PHASES + 1, 2 * half_width)
+    """
+
+    key = (half_width, cutoff)
+
+    if key not in sinc_tables:
+        fractions = numpy.arange(SINC_PHASES + 1) / float(SINC_PHASES)
+        sinc_tables[key] = sinc_weights(fractions, half_width, cutoff)
+
+    return sinc_tables[key]
+
+
+def sinc_weights(fractions, half_width, cutoff):
+    """
+    Evaluates a Blackman-windowed sinc kernel at each tap around a set of fractional positions. Each position's window
+    is ceil(SINC_HALF_WIDTH / cutoff) frames either side, so its kernel doesn't depend on the other positions.
+
+    Args:
+        fractions (numpy.ndarray): Fractional part of each read position
+        half_width (int): Half the number of taps: at least the widest window
+        cutoff (float or numpy.ndarray): Cutoff as a fraction of the source Nyquist frequency, either constant or one
+                                         value per position
+    Returns:
+        (numpy.ndarray) Weights of shape (positions, 2 * half_width), each row normalised to unity gain
+    """
+
+    taps = numpy.arange(-half_width + 1, half_width + 1)
+    distances = taps[numpy.newaxis, :] - fractions[:, numpy.newaxis]
+    cutoff = numpy.reshape(cutoff, (-1, 1))
+    widths = numpy.ceil(SINC_HALF_WIDTH / cutoff)
+
+    window = 0.42 + 0.5 * numpy.cos(numpy.pi * distances / widths) + 0.08 * numpy.cos(2 * numpy.pi * distances / widths)
+    window[numpy.abs(distances) >= widths] = 0.0
+
+    weights = cutoff * numpy.sinc(cutoff * distances) * window
+    weights /= numpy.sum(weights, axis=1)[:, numpy.newaxis]
+
+    return weights
+
+
+def interpolate(samples, positions, mode="linear", cutoffs=None):
+    """
+    Reads a block of samples at fractional positions. Positions outside the source read silence.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        positions (numpy.ndarray): Position in the source of each output frame
+        mode (string): One of MODES. "nearest" truncates each position to a whole frame, like the original repitch
+        cutoffs (float or numpy.ndarray): For "sinc" only: the low-pass cutoff as a fraction of the source Nyquist
+                                          frequency, constant or one per position. Resampling to a lower rate needs a
+                                          cutoff of 1 / ratio to avoid aliasing. If None, no anti-aliasing is done
+    Returns:
+        (numpy.ndarray) Float samples (positions x channels)
+    """
+
+    if mode not in MODES:
+        raise ValueError("Unknown resampling mode: %s" % mode)
+
+    output = numpy.empty((positions.shape[0], samples.shape[1]))
+
+    for start in xrange(0, positions.shape[0], CHUNK_FRAMES):
+        end = min(start + CHUNK_FRAMES, positions.shape[0])
+        chunk_cutoffs = cutoffs[start:end] if numpy.ndim(cutoffs) else cutoffs
+        output[start:end] = interpolate_chunk(samples, positions[start:end], mode, chunk_cutoffs)
+
+    return output
+
+
+def interpolate_chunk(samples, positions, mode, cutoffs):
+    """
+    Reads one chunk for interpolate.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        positions (numpy.ndarray): Position in the source of each output frame
+        mode (string): One of MODES
+        cutoffs (float or numpy.ndarray): Sinc cutoffs, see interpolate
+    Returns:
+        (numpy.ndarray) Float samples (positions x channels)
+    """
+
+    whole = numpy.floor(positions).astype(numpy.intp)
+    fractions = positions - whole
+
+    if mode == "nearest":
+        # Truncate towards zero, like int()
+        return gather(samples, positions.astype(numpy.intp)).astype(numpy.float64)
+
+    if mode in ("linear", "cubic"):
+        offsets, weights = polynomial_taps(fractions, mode)
+    else:
+        if cutoffs is None:
+            cutoffs = 1.0
+
+        if numpy.ndim(cutoffs) == 0:
+            # Constant cutoff: look the taps up in a polyphase table
+            cutoff = min(1.0, float(cutoffs))
+            half_width = int(math.ceil(SINC_HALF_WIDTH / cutoff))
+            table = get_sinc_table(half_width, cutoff)
+            weights = table[numpy.rint(fractions * SINC_PHASES).astype(numpy.intp)].T
+        else:
+            # Varying cutoff: evaluate the kernel for every frame, wide enough for the lowest cutoff
+            cutoffs = numpy.minimum(cutoffs, 1.0)
+            half_width = int(math.ceil(SINC_HALF_WIDTH / float(numpy.min(cutoffs)))) if cutoffs.shape[0] else SINC_HALF_WIDTH
+            weights = sinc_weights(fractions, half_width, cutoffs).T
+
+        offsets = range(-half_width + 1, half_width + 1)
+
+    # One tap at a time: each tap's weights (a row of weights) times the frames it reads
+    output = numpy.zeros((positions.shape[0], samples.shape[1]))
+    for tap, offset in enumerate(offsets):
+        output += weights[tap][:, numpy.newaxis] * gather(samples, whole + offset)
+
+    return output
+
+
+def polynomial_taps(fractions, mode):
+    """
+    Builds the taps of the linear or cubic interpolator.
+
+    Args:
+        fractions (numpy.ndarray): Fractional part of each read position
+        mode (string): "linear" or "cubic"
+    Returns:
+        (tuple) Frame offset of each tap from the whole part of the position, and the weights of each tap (a list of
+        one array per tap, each with a weight per position)
+    """
+
+    if mode == "linear":
+        return (0, 1), [1.0 - fractions, fractions]
+
+    # Catmull-Rom spline through the four surrounding frames
+    f2 = fractions * fractions
+    f3 = f2 * fractions
+
+    return (-1, 0, 1, 2), [-0.5 * f3 + f2 - 0.5 * fractions,
+                           1.5 * f3 - 2.5 * f2 + 1.0,
+                           -1.5 * f3 + 2.0 * f2 + 0.5 * fractions,
+                           0.5 * f3 - 0.5 * f2]
+
+
+def gather(samples, indices):
+    """
+    Looks up source frames by index. Indices outside the source read silence.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        indices (numpy.ndarray): Frame index for each output frame
+    Returns:
+        (numpy.ndarray) The frames, with the source's data type
+    """
+
+    valid = (indices >= 0) & (indices < samples.shape[0])
+
+    if numpy.all(valid):
+        return samples[indices]
+
+    output = numpy.zeros((indices.shape[0], samples.shape[1]), dtype=samples.dtype)
+    output[valid] = samples[indices[valid]]
+
+    return output
+
+
+def resample(samples, ratio, mode="linear"):
+    """
+    Resamples a block of samples by a constant ratio, e.g. to change its pitch or sample rate.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        ratio (float): Source frames advanced per output frame (2 plays the sound an octave higher)
+        mode (string): One of MODES. "sinc" filters out frequencies that would alias when the ratio is above 1
+    Returns:
+        (numpy.ndarray) Float samples
+    """
+
+    return interpolate(samples, constant_positions(samples.shape[0], ratio), mode, 1.0 / max(ratio, 1.0))
+
+
+def resample_sweep(samples, sample_rate, ratio, ratio_shift, mode="linear"):
+    """
+    Resamples a block of samples by a ratio that changes linearly over time, integrating the ratio so that the pitch
+    at each moment is exactly the ratio at that moment.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        sample_rate (int): Sample rate of the source
+        ratio (float): Ratio at the start
+        ratio_shift (float): Amount the ratio increases per second of output
+        mode (string): One of MODES
+    Returns:
+        (numpy.ndarray) Float samples
+    """
+
+    positions = sweep_positions(samples.shape[0], sample_rate, ratio, ratio_shift)
+    ratios = ratio + ratio_shift * numpy.arange(positions.shape[0]) / float(sample_rate)
+
+    return interpolate(samples, positions, mode, 1.0 / numpy.maximum(ratios, 1.0))
+
+
+def resample_varying(samples, ratios, mode="linear"):
+    """
+    Resamples a block of samples by any ratio that varies over time, one ratio per output frame.
+
+    Args:
+        samples (numpy.ndarray): Source samples (frames x channels)
+        ratios (numpy.ndarray): Source frames advanced at each output frame
+        mode (string): One of MODES
+    Returns:
+        (numpy.ndarray) Float samples
+    """
+
+    return interpolate(samples, integrate_ratios(ratios), mode, 1.0 / numpy.maximum(ratios, 1.0))
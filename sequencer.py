@@ -0,0 +1,190 @@
+import envelope
+from generator import Generator
+from timeline import Timeline
+
+
+class Voice:
+    """
+    One note in a sequence: a Generator sound with its own oscillator, envelope and effects, started at an onset time.
+
+    Attributes:
+        onset (float): Start time, in seconds
+        parameters (dict): Sound parameters, see Generator.PARAMETERS. The volume is applied when the voice is mixed
+        attack (float): Length of the fade in, in seconds
+        release (float): Length of the fade out, in seconds
+        pan (float): Stereo position, from -1 (left) through 0 (centre) to 1 (right)
+    """
+
+    onset = 0.0
+    parameters = None
+    attack = 0.0
+    release = 0.0
+    pan = 0.0
+
+    def __init__(self, onset, parameters, attack=0.0, release=0.0, pan=0.0):
+        """
+        Creates a voice.
+
+        Args:
+            onset (float): Start time, in seconds
+            parameters (dict): Sound parameters, see Generator.PARAMETERS. Parameters that aren't included use the
+                               Generator defaults
+            attack (float): Length of the fade in, in seconds
+            release (float): Length of the fade out, in seconds
+            pan (float): Stereo position, from -1 (left) through 0 (centre) to 1 (right)
+        """
+
+        self.onset = onset
+        self.parameters = dict(parameters)
+        self.attack = attack
+        self.release = release
+        self.pan = pan
+
+    def get_render_key(self):
+        """
+        Returns the settings that decide what the voice sounds like. Voices with the same key are rendered only once;
+        onset, volume and pan are applied when mixing, so they aren't part of it.
+
+        Returns:
+            (tuple) The key
+        """
+
+        parameters = tuple(sorted((name, value) for name, value in self.parameters.items() if name != "volume"))
+
+        return parameters + (("attack", self.attack), ("release", self.release))
+
+
+class Sequencer:
+    """
+    Arranges many voices on a timeline and renders them into one sound, e.g. for a sound pack. Each distinct voice is
+    rendered once and reused, and each voice is only mixed over the frames where it is playing, so render time grows
+    with the number of voices rather than with timeline length x voices.
+
+    Attributes:
+        generator (Generator): Generator that renders the voices
+        voices (list): The Voices, in the order they were added
+        renders (dict): Rendered voice samples by render key
+    """
+
+    # Parameters every voice starts from, so voices don't inherit each other's settings
+    DEFAULT_PARAMETERS = {
+        "length": Generator.sound_length,
+        "volume": Generator.volume,
+        "frequency": Generator.frequency,
+        "frequency_shift": Generator.frequency_shift,
+        "plops": Generator.plops_per_second,
+        "echoes": Generator.echo_count,
+        "source": Generator.source,
+        "waveform": Generator.waveform,
+        "pitch": Generator.pitch,
+        "filter": Generator.filter_type,
+        "filter_frequency": Generator.filter_frequency,
+        "reverb": Generator.reverb,
+        "reverb_ir": Generator.reverb_ir,
+        "reverb_wet": Generator.reverb_wet,
+    }
+
+    generator = None
+    voices = None
+    renders = None
+
+    def __init__(self, sample_rate=22050, num_channels=2, generator=None):
+        """
+        Creates an empty sequence.
+
+        Args:
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels
+            generator (Generator): Generator to render the voices with. If None, a float generator is created. The
+                                   sequencer changes its parameters
+        """
+
+        self.generator = generator or Generator(sample_rate, -16, num_channels, 4096)
+        self.voices = []
+        self.renders = {}
+
+    def add_voice(self, onset, preset=None, attack=0.0, release=0.0, pan=0.0, **parameters):
+        """
+        Schedules a voice.
+
+        Args:
+            onset (float): Start time, in seconds
+            preset (string): One of Generator.PRESETS to start from, or None
+            attack (float): Length of the fade in, in seconds
+            release (float): Length of the fade out, in seconds
+            pan (float): Stereo position, from -1 (left) through 0 (centre) to 1 (right)
+            **parameters: Sound parameters, see Generator.PARAMETERS
+        Returns:
+            (Voice) The voice
+        """
+
+        voice_parameters = dict(self.DEFAULT_PARAMETERS)
+        if preset:
+            voice_parameters.update(Generator.PRESETS[preset])
+        voice_parameters.update(parameters)
+
+        for name in voice_parameters:
+            if name not in Generator.PARAMETERS:
+                raise ValueError("Unknown sound parameter: %s" % name)
+
+        voice = Voice(onset, voice_parameters, attack, release, pan)
+        self.voices.append(voice)
+
+        return voice
+
+    def render_voice(self, voice):
+        """
+        Renders a voice (without its volume), reusing an earlier render of an identical voice.
+
+        Args:
+            voice (Voice): The voice
+        Returns:
+            (numpy.ndarray) Float samples (frames x channels). Shared between identical voices, so don't edit them
+        """
+
+        key = voice.get_render_key()
+
+        if key not in self.renders:
+            parameters = dict(voice.parameters)
+            parameters["volume"] = 0
+
+            self.generator.apply_parameters(parameters)
+            samples = self.generator.render_sound().samples.astype("float32")
+
+            envelope.apply(samples, envelope.adsr(samples.shape[0], self.generator.mixer_sample_rate, voice.attack,
+                                                  release=voice.release))
+
+            self.renders[key] = samples
+
+        return self.renders[key]
+
+    def get_length(self):
+        """
+        Works out how long the sequence is, rendering any voices that haven't been rendered yet.
+
+        Returns:
+            (float) Time the last voice finishes, in seconds
+        """
+
+        sample_rate = float(self.generator.mixer_sample_rate)
+
+        return max([0.0] + [voice.onset + self.render_voice(voice).shape[0] / sample_rate for voice in self.voices])
+
+    def render(self, limit=False):
+        """
+        Renders the sequence.
+
+        Args:
+            limit (bool): Whether to run the mix through the soft limiter, so loud chords don't clip harshly
+        Returns:
+            (DynSound) The mix, as a float sound that is quantised when played or saved
+        """
+
+        sample_rate = self.generator.mixer_sample_rate
+        num_frames = max([0] + [int(voice.onset * sample_rate) + self.render_voice(voice).shape[0] for voice in self.voices])
+        timeline = Timeline(0, self.generator.mixer_num_channels, sample_rate, num_frames=num_frames)
+
+        for voice in self.voices:
+            timeline.add_samples(self.render_voice(voice), int(voice.onset * sample_rate), voice.parameters["volume"], voice.pan)
+
+        return timeline.get_sound(limit)
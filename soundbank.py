@@ -0,0 +1,502 @@
+"""Sound banks: many sounds packed into one file, for shipping a game's sounds as a single pack.
+
+A bank is a small header, each sound's samples as one contiguous blob, and an index at the end:
+
+    header   magic "DSBK", version, number of entries, offset and size of the index
+    blobs    each entry's samples in its sample format, starting on an ALIGNMENT boundary. Uncompressed blobs are the
+             raw little-endian samples, the same bytes as a WAV's data chunk, so they can be memory-mapped
+    index    one record per entry: name, sample rate, channels, sample format, compression, frames, offset and size
+
+Entries can be compressed losslessly, each on its own: "zlib" deflates the samples, and "delta" deflates the
+difference between each frame and the one before it (with the bytes grouped by significance), which packs smooth
+sounds much smaller. Loading one entry only
+reads (and inflates) that entry's blob; uncompressed entries are mapped from disk and nothing is read until the samples
+are used.
+
+Entries are converted and compressed on a pool of threads: numpy's conversions and zlib both release the GIL, so the
+threads run on separate cores without copying the samples to other processes.
+
+    write_bank("sounds.bank", [("pickup", pickup), ("jump", jump)], compression="delta")
+    jump = SoundBank("sounds.bank").load("jump")
+"""
+import collections
+import multiprocessing
+import multiprocessing.pool
+import struct
+import zlib
+
+import numpy
+
+import wavfile
+from dynsound import DynSound
+
+
+MAGIC = b"DSBK"
+VERSION = 1
+
+# Magic, version, flags, number of entries, index offset, index size
+HEADER_FORMAT = "<4sHHIQQ"
+HEADER_SIZE = 32
+
+# Name length, sample rate, channels, sample format, compression, frames, offset, stored size (followed by the name)
+RECORD_FORMAT = "<HIHBBQQQ"
+
+# Blobs start on a multiple of this many bytes, so mapped samples are aligned
+ALIGNMENT = 64
+
+# Sample formats and compressions by their code in the index
+SAMPLE_FORMATS = ("uint8", "int16", "int24", "int32", "float32")
+COMPRESSIONS = ("none", "zlib", "delta")
+
+# Type the samples of each format are stored as (24-bit samples are raw bytes), and the integer type "delta" works in
+STORED_TYPES = {"uint8": numpy.uint8, "int16": "<i2", "int24": numpy.uint8, "int32": "<i4", "float32": "<f4"}
+DELTA_TYPES = {"uint8": numpy.uint8, "int16": "<i2", "int24": "<i4", "int32": "<i4", "float32": "<i4"}
+
+
+class BankEntry:
+    """
+    Index record of one sound in a bank.
+
+    Attributes:
+        name (string): Name of the sound
+        sample_rate (int): Sample rate
+        num_channels (int): Number of channels
+        sample_format (string): Sample format of the stored samples, one of SAMPLE_FORMATS
+        compression (string): How the blob is compressed, one of COMPRESSIONS
+        num_frames (int): Length of the sound, in frames
+        offset (int): Position of the blob in the file, in bytes
+        stored_size (int): Size of the blob, in bytes
+    """
+
+    name = ""
+    sample_rate = 22050
+    num_channels = 2
+    sample_format = "int16"
+    compression = "none"
+    num_frames = 0
+    offset = 0
+    stored_size = 0
+
+    def __init__(self, name, sample_rate, num_channels, sample_format, compression, num_frames, offset=0, stored_size=0):
+        """
+        Creates an index record.
+
+        Args:
+            name (string): Name of the sound
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels
+            sample_format (string): Sample format of the stored samples
+            compression (string): How the blob is compressed
+            num_frames (int): Length of the sound, in frames
+            offset (int): Position of the blob in the file, in bytes
+            stored_size (int): Size of the blob, in bytes
+        """
+
+        self.name = name
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.sample_format = sample_format
+        self.compression = compression
+        self.num_frames = num_frames
+        self.offset = offset
+        self.stored_size = stored_size
+
+    def get_shape(self):
+        """Returns the shape of the stored samples: frames x channels, with a third axis of 3 bytes for 24-bit"""
+
+        if self.sample_format == "int24":
+            return (self.num_frames, self.num_channels, 3)
+
+        return (self.num_frames, self.num_channels)
+
+    def pack(self):
+        """Returns the record as bytes for the index"""
+
+        name = self.name.encode("utf-8")
+
+        return struct.pack(RECORD_FORMAT, len(name), self.sample_rate, self.num_channels,
+                           SAMPLE_FORMATS.index(self.sample_format), COMPRESSIONS.index(self.compression),
+                           self.num_frames, self.offset, self.stored_size) + name
+
+
+def encode(samples, sample_format, compression="none", level=6):
+    """
+    Encodes samples as a blob.
+
+    Args:
+        samples (numpy.ndarray): Samples in the stored type of their format (see STORED_TYPES)
+        sample_format (string): Sample format of the samples
+        compression (string): One of COMPRESSIONS
+        level (int): zlib compression level, from 1 (fastest) to 9 (smallest)
+    Returns:
+        (bytes) The blob
+    """
+
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression: %s" % compression)
+
+    if compression == "none":
+        return numpy.ascontiguousarray(samples).tostring()
+
+    if compression == "delta":
+        return zlib.compress(delta_encode(samples, sample_format), level)
+
+    return zlib.compress(numpy.ascontiguousarray(samples).tostring(), level)
+
+
+def delta_encode(samples, sample_format):
+    """
+    Builds the bytes that "delta" compression deflates: the difference between each frame and the one before (wrapping
+    integer differences, so decoding is exact whatever the values), with the bytes of every difference grouped by
+    significance. The high bytes of small differences are nearly all the same, so they deflate to almost nothing.
+
+    Args:
+        samples (numpy.ndarray): Samples in the stored type of their format
+        sample_format (string): Sample format of the samples
+    Returns:
+        (bytes) The grouped differences
+    """
+
+    if sample_format == "int24":
+        # Assemble the three bytes of each sample, so the differences are between whole samples
+        values = samples[..., 0].astype("<i4")
+        values |= samples[..., 1].astype("<i4") << 8
+        values |= samples[..., 2].astype("<i4") << 16
+    else:
+        values = numpy.ascontiguousarray(samples).view(DELTA_TYPES[sample_format])
+
+    differences = values.copy()
+    differences[1:] -= values[:-1]
+
+    width = differences.dtype.itemsize
+
+    return differences.view(numpy.uint8).reshape(-1, width).T.tostring()
+
+
+def delta_decode(data, entry):
+    """
+    Restores samples from the bytes built by delta_encode.
+
+    Args:
+        data (bytes): The grouped differences
+        entry (BankEntry): The samples' index record
+    Returns:
+        (numpy.ndarray) The samples, in the stored type of their format
+    """
+
+    delta_type = numpy.dtype(DELTA_TYPES[entry.sample_format])
+    planes = numpy.frombuffer(data, dtype=numpy.uint8).reshape(delta_type.itemsize, -1)
+    differences = planes.T.copy().view(delta_type).reshape(entry.num_frames, entry.num_channels)
+
+    # A running sum, wrapping like the differences did, restores the samples
+    values = numpy.cumsum(differences, axis=0, dtype=delta_type)
+
+    if entry.sample_format == "int24":
+        return values.view(numpy.uint8).reshape(entry.num_frames, entry.num_channels, 4)[..., :3].copy()
+
+    return values.view(STORED_TYPES[entry.sample_format])
+
+
+def decode(blob, entry):
+    """
+    Decodes a blob.
+
+    Args:
+        blob (bytes): The blob, as written by encode
+        entry (BankEntry): The blob's index record
+    Returns:
+        (numpy.ndarray) The samples, in the stored type of their format
+    """
+
+    if entry.num_frames == 0:
+        return numpy.zeros(entry.get_shape(), dtype=STORED_TYPES[entry.sample_format])
+
+    data = blob if entry.compression == "none" else zlib.decompress(blob)
+
+    if entry.compression == "delta":
+        return delta_decode(data, entry)
+
+    return numpy.frombuffer(data, dtype=STORED_TYPES[entry.sample_format]).reshape(entry.get_shape())
+
+
+class SoundBankWriter:
+    """
+    Writes a bank one entry at a time. Blobs are written as they are added, so only the index is held until closing.
+
+    Attributes:
+        file (file): The open bank file
+        entries (list): Index records of the entries written so far
+    """
+
+    file = None
+    entries = None
+
+    def __init__(self, file_name):
+        """
+        Opens a bank file for writing and writes a placeholder header.
+
+        Args:
+            file_name (string): The bank file
+        """
+
+        self.entries = []
+        self.file = open(file_name, "wb")
+        self.write_header(0, 0)
+
+    def write_header(self, index_offset, index_size):
+        """Writes (or rewrites) the header"""
+
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, len(self.entries), index_offset, index_size)
+
+        self.file.seek(0)
+        self.file.write(header + b"\0" * (HEADER_SIZE - len(header)))
+
+    def add_blob(self, entry, blob):
+        """
+        Appends an encoded entry.
+
+        Args:
+            entry (BankEntry): The entry's index record. Its offset and stored size are filled in
+            blob (bytes): The entry's blob, from encode
+        """
+
+        if any(existing.name == entry.name for existing in self.entries):
+            raise ValueError("Duplicate sound name: %s" % entry.name)
+
+        self.file.seek(0, 2)
+        padding = -self.file.tell() % ALIGNMENT
+        self.file.write(b"\0" * padding)
+
+        entry.offset = self.file.tell()
+        entry.stored_size = len(blob)
+        self.file.write(blob)
+        self.entries.append(entry)
+
+    def close(self):
+        """Writes the index, patches the header and closes the file"""
+
+        if self.file is None:
+            return
+
+        self.file.seek(0, 2)
+        index_offset = self.file.tell()
+        index = b"".join(entry.pack() for entry in self.entries)
+        self.file.write(index)
+
+        self.write_header(index_offset, len(index))
+        self.file.close()
+        self.file = None
+
+
+def encode_sound(job):
+    """
+    Converts and encodes one sound, for write_bank's worker threads.
+
+    Args:
+        job (tuple): (name, DynSound, sample format, compression, zlib level)
+    Returns:
+        (BankEntry, bytes) The entry's index record and its blob
+    """
+
+    name, sound, sample_format, compression, level = job
+
+    entry = BankEntry(name, sound.sample_rate, sound.samples.shape[1], sample_format, compression,
+                      sound.samples.shape[0])
+    samples = wavfile.convert(sound.samples, sample_format, sound.sample_min, sound.sample_max,
+                              sound.floating and sound.dither)
+
+    return entry, encode(samples.reshape(entry.get_shape()), sample_format, compression, level)
+
+
+def encode_wav(job):
+    """
+    Encodes one WAV file as it is stored (no conversion), for pack_wavs' worker threads.
+
+    Args:
+        job (tuple): (name, WAV file name, compression, zlib level)
+    Returns:
+        (BankEntry, bytes) The entry's index record and its blob
+    """
+
+    name, file_name, compression, level = job
+
+    samples, sample_rate, sample_format = wavfile.read_wav(file_name)
+    entry = BankEntry(name, sample_rate, samples.shape[1], sample_format, compression, samples.shape[0])
+
+    return entry, encode(samples, sample_format, compression, level)
+
+
+def write_jobs(file_name, encoder, jobs, threads):
+    """
+    Encodes jobs on a pool of threads and writes them to a bank in order.
+
+    Args:
+        file_name (string): The bank file
+        encoder (function): Encodes one job, returning its index record and blob
+        jobs (list): The jobs
+        threads (int): Number of encoding threads. 1 encodes in this thread; 0 uses one per CPU core
+    """
+
+    writer = SoundBankWriter(file_name)
+
+    try:
+        if threads == 1:
+            for job in jobs:
+                writer.add_blob(*encoder(job))
+        else:
+            pool = multiprocessing.pool.ThreadPool(threads or multiprocessing.cpu_count())
+            try:
+                # imap keeps the blobs in job order, whichever thread finishes first
+                for entry, blob in pool.imap(encoder, jobs):
+                    writer.add_blob(entry, blob)
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        writer.close()
+
+
+def write_bank(file_name, sounds, sample_format="int16", compression="none", level=6, threads=0):
+    """
+    Writes sounds to a bank, encoding them in parallel.
+
+    Args:
+        file_name (string): The bank file
+        sounds (list): (name, DynSound) for each sound, in the order to store them
+        sample_format (string): Sample format to store the sounds in: "uint8", "int16", "int24", "int32" or "float32"
+        compression (string): "none", "zlib" or "delta" (see COMPRESSIONS)
+        level (int): zlib compression level, from 1 (fastest) to 9 (smallest)
+        threads (int): Number of encoding threads. 1 encodes in this thread; 0 uses one per CPU core
+    """
+
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError("Unknown sample format: %s" % sample_format)
+
+    write_jobs(file_name, encode_sound, [(name, sound, sample_format, compression, level) for name, sound in sounds],
+               threads)
+
+
+def pack_wavs(file_name, wav_files, compression="none", level=6, threads=0):
+    """
+    Packs WAV files into a bank, keeping each file's own sample rate, channels and sample format.
+
+    Args:
+        file_name (string): The bank file
+        wav_files (list): (name, WAV file name) for each sound, in the order to store them
+        compression (string): "none", "zlib" or "delta" (see COMPRESSIONS)
+        level (int): zlib compression level, from 1 (fastest) to 9 (smallest)
+        threads (int): Number of encoding threads. 1 encodes in this thread; 0 uses one per CPU core
+    """
+
+    write_jobs(file_name, encode_wav, [(name, wav_file, compression, level) for name, wav_file in wav_files], threads)
+
+
+class SoundBank:
+    """
+    A bank opened for reading. Only the header and index are read when it is opened; each sound is read when it is
+    loaded.
+
+    Attributes:
+        file_name (string): The bank file
+        entries (collections.OrderedDict): Index records (BankEntry) by name, in the order they are stored
+    """
+
+    file_name = ""
+    entries = None
+
+    def __init__(self, file_name):
+        """
+        Opens a bank and reads its index.
+
+        Args:
+            file_name (string): The bank file
+        """
+
+        self.file_name = file_name
+        self.entries = collections.OrderedDict()
+
+        with open(file_name, "rb") as bank:
+            header = bank.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+                raise ValueError("Not a sound bank: %s" % file_name)
+
+            magic, version, flags, num_entries, index_offset, index_size = struct.unpack(
+                HEADER_FORMAT, header[:struct.calcsize(HEADER_FORMAT)])
+            if version != VERSION:
+                raise ValueError("Unsupported sound bank version %d: %s" % (version, file_name))
+
+            bank.seek(index_offset)
+            index = bank.read(index_size)
+
+        position = 0
+        record_size = struct.calcsize(RECORD_FORMAT)
+        for i in xrange(num_entries):
+            (name_length, sample_rate, num_channels, sample_format, compression, num_frames, offset,
+             stored_size) = struct.unpack(RECORD_FORMAT, index[position:position + record_size])
+            position += record_size
+
+            name = index[position:position + name_length].decode("utf-8")
+            position += name_length
+
+            self.entries[name] = BankEntry(name, sample_rate, num_channels, SAMPLE_FORMATS[sample_format],
+                                           COMPRESSIONS[compression], num_frames, offset, stored_size)
+
+    def names(self):
+        """Returns the names of the sounds in the bank, in the order they are stored"""
+
+        return list(self.entries.keys())
+
+    def read_samples(self, name):
+        """
+        Reads one sound's samples as they are stored.
+
+        Args:
+            name (string): Name of the sound
+        Returns:
+            (numpy.ndarray, BankEntry) The samples (frames x channels, in the stored type of their format) and the
+                                       sound's index record. Uncompressed samples are a copy-on-write map of the file
+        """
+
+        if name not in self.entries:
+            raise KeyError("No sound named %s in %s" % (name, self.file_name))
+
+        entry = self.entries[name]
+
+        if entry.compression == "none" and entry.num_frames:
+            # Mapped, so nothing is read until the samples are used
+            samples = numpy.memmap(self.file_name, dtype=STORED_TYPES[entry.sample_format], mode="c",
+                                   offset=entry.offset, shape=entry.get_shape())
+            return samples, entry
+
+        # Only this entry's blob is read
+        with open(self.file_name, "rb") as bank:
+            bank.seek(entry.offset)
+            blob = bank.read(entry.stored_size)
+
+        return decode(blob, entry), entry
+
+    def load(self, name, num_channels=2, sample_rate=22050, data_type="<h", floating=False):
+        """
+        Loads one sound, converting it to a format only if it isn't stored in that format already.
+
+        Args:
+            name (string): Name of the sound
+            num_channels (int): Number of channels to load the sound with
+            sample_rate (int): Sample rate to load the sound at
+            data_type (string): Type of the samples
+            floating (bool): Whether to load float32 samples
+        Returns:
+            (DynSound) The sound
+        """
+
+        samples, entry = self.read_samples(name)
+
+        sound = DynSound(num_frames=0, num_channels=num_channels, sample_rate=sample_rate, data_type=data_type,
+                         floating=floating)
+        samples = sound.convert_file_samples(samples, entry.sample_rate, entry.sample_format, data_type)
+
+        if floating:
+            samples = samples.astype(numpy.float32)
+        sound.set_samples(samples)
+
+        return sound
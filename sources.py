@@ -0,0 +1,326 @@
+import collections
+import os
+import threading
+
+import numpy
+
+import oscillator
+from dynsound import DynSound
+
+
+# Colours of NoiseSource: the power of the noise falls by 0, 3 and 6 dB per octave
+NOISE_COLOURS = ("white", "pink", "brown")
+
+
+class FileCache:
+    """
+    Decoded sound files, shared between renders. Each file is decoded (and converted to the mixer's format) once;
+    every render of it then starts from a copy-on-write copy, so rendering one file with many sets of parameters costs
+    one decode in total. Entries are keyed by the file's modification time as well as its name, so an edited file is
+    decoded again.
+
+    Attributes:
+        memory_budget (int): Maximum total size of the decoded samples kept, in bytes
+        memory_used (int): Total size of the decoded samples currently kept, in bytes
+        entries (collections.OrderedDict): Decoded sounds (DynSound) by key, least recently used first
+        hits (int): Number of loads answered from the cache
+        misses (int): Number of loads that decoded the file
+        lock (threading.Lock): Guards the entries, so render threads can share the cache
+    """
+
+    memory_budget = 0
+    memory_used = 0
+    entries = None
+    hits = 0
+    misses = 0
+    lock = None
+
+    def __init__(self, memory_budget=128 * 1024 * 1024):
+        """
+        Creates an empty file cache.
+
+        Args:
+            memory_budget (int): Maximum total size of the decoded samples kept, in bytes
+        """
+
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def make_key(self, file_name, sample_rate, num_channels, data_type, floating):
+        """
+        Builds a cache key for a file decoded to a format.
+
+        Args:
+            file_name (string): The sound file
+            sample_rate (int): Sample rate to decode to
+            num_channels (int): Number of channels to decode to
+            data_type (string): Type of the samples
+            floating (bool): Whether the samples are float32
+        Returns:
+            (tuple) The key
+        """
+
+        file_name = os.path.realpath(file_name)
+
+        return (file_name, os.path.getmtime(file_name), int(sample_rate), int(num_channels), data_type, bool(floating))
+
+    def load(self, file_name, sample_rate, num_channels, data_type="<h", floating=False):
+        """
+        Returns a file decoded to a format, decoding it only if it isn't cached.
+
+        Args:
+            file_name (string): The sound file (WAVs are mapped from disk; other formats need pygame.mixer)
+            sample_rate (int): Sample rate to decode to
+            num_channels (int): Number of channels to decode to
+            data_type (string): Type of the samples
+            floating (bool): Whether to decode to float32 samples
+        Returns:
+            (DynSound) A copy of the decoded sound, which can be edited freely
+        """
+
+        key = self.make_key(file_name, sample_rate, num_channels, data_type, floating)
+
+        with self.lock:
+            sound = self.entries.pop(key, None)
+
+            if sound is None:
+                self.misses += 1
+                sound = DynSound(load_file=file_name, num_channels=num_channels, sample_rate=sample_rate,
+                                 data_type=data_type, floating=floating)
+                self.memory_used += sound.samples.nbytes
+            else:
+                self.hits += 1
+
+            # Most recently used goes last
+            self.entries[key] = sound
+            self.evict()
+
+            return sound.copy()
+
+    def evict(self):
+        """Forgets the least recently used files until the cache is within budget, always keeping the newest"""
+
+        while self.memory_used > self.memory_budget and len(self.entries) > 1:
+            key, sound = self.entries.popitem(last=False)
+            self.memory_used -= sound.samples.nbytes
+
+    def clear(self):
+        """Forgets every decoded file"""
+
+        with self.lock:
+            self.entries.clear()
+            self.memory_used = 0
+
+
+# Cache shared by every FileSource that isn't given its own
+file_cache = FileCache()
+
+
+class WaveSource:
+    """
+    Sample source: a wave from the oscillator bank, the same in every channel.
+
+    Attributes:
+        waveform (string): One of oscillator.WAVEFORMS
+        frequency (float): Frequency of the wave in hZ
+        band_limited (bool): Whether to remove harmonics above the Nyquist frequency
+        use_table (bool): Whether to read the wave from a precomputed wavetable
+    """
+
+    waveform = "sine"
+    frequency = 440
+    band_limited = False
+    use_table = False
+
+    def __init__(self, waveform, frequency, band_limited=False, use_table=False):
+        """
+        Creates a wave source.
+
+        Args:
+            waveform (string): One of oscillator.WAVEFORMS
+            frequency (float): Frequency of the wave in hZ
+            band_limited (bool): Whether to remove harmonics above the Nyquist frequency (reduces aliasing)
+            use_table (bool): Whether to read the wave from a precomputed wavetable
+        """
+
+        self.waveform = waveform
+        self.frequency = frequency
+        self.band_limited = band_limited
+        self.use_table = use_table
+
+    def get_key(self):
+        """Returns the settings the source's sound depends on"""
+
+        return ("wave", self.waveform, float(self.frequency), self.band_limited, self.use_table)
+
+    def render(self, num_frames, sample_rate, num_channels, floating=False):
+        """
+        Renders the source.
+
+        Args:
+            num_frames (int): Length of the sound, in frames
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels
+            floating (bool): Whether to make a float32 sound
+        Returns:
+            (DynSound) The sound
+        """
+
+        sound = DynSound(num_frames=num_frames, num_channels=num_channels, sample_rate=sample_rate, floating=floating)
+
+        oscillator.fill(sound.samples, self.waveform, self.frequency, sample_rate, sound.sample_min, sound.sample_max,
+                        band_limited=self.band_limited, use_table=self.use_table)
+
+        return sound
+
+
+class NoiseSource:
+    """
+    Sample source: seeded noise, independent in each channel so that it sounds wide in stereo. The same seed always
+    gives the same noise, so renders are repeatable and cacheable.
+
+    Attributes:
+        colour (string): One of NOISE_COLOURS: "white" (hiss), "pink" (rain, wind) or "brown" (rumble)
+        seed (int): Seed of the noise
+    """
+
+    colour = "white"
+    seed = 0
+
+    def __init__(self, colour="white", seed=0):
+        """
+        Creates a noise source.
+
+        Args:
+            colour (string): One of NOISE_COLOURS
+            seed (int): Seed of the noise
+        """
+
+        if colour not in NOISE_COLOURS:
+            raise ValueError("Unknown noise colour: %s" % colour)
+
+        self.colour = colour
+        self.seed = seed
+
+    def get_key(self):
+        """Returns the settings the source's sound depends on"""
+
+        return ("noise", self.colour, int(self.seed))
+
+    def render(self, num_frames, sample_rate, num_channels, floating=False):
+        """
+        Renders the source.
+
+        Args:
+            num_frames (int): Length of the sound, in frames
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels
+            floating (bool): Whether to make a float32 sound
+        Returns:
+            (DynSound) The sound, peaking at full scale
+        """
+
+        sound = DynSound(num_frames=num_frames, num_channels=num_channels, sample_rate=sample_rate, floating=floating)
+        noise = numpy.random.RandomState(self.seed).uniform(-1.0, 1.0, (num_frames, num_channels))
+
+        if self.colour != "white" and num_frames > 1:
+            # Shape the spectrum: amplitude falls as 1/sqrt(f) for pink noise and 1/f for brown noise
+            spectrum = numpy.fft.rfft(noise, axis=0)
+            frequencies = numpy.fft.rfftfreq(num_frames)
+            spectrum[1:] /= (frequencies[1:] ** (0.5 if self.colour == "pink" else 1.0))[:, numpy.newaxis]
+            spectrum[0] = 0.0
+            noise = numpy.fft.irfft(spectrum, num_frames, axis=0)
+            noise /= max(numpy.abs(noise).max(), 1e-12)
+
+        centre_value = (sound.sample_min + sound.sample_max) / 2
+        noise *= sound.sample_max - centre_value
+        noise += centre_value
+        numpy.clip(noise, sound.sample_min, sound.sample_max, out=noise)
+
+        sound.samples[...] = noise
+
+        return sound
+
+
+class FileSource:
+    """
+    Sample source: a recorded sound file, decoded once through a FileCache and shared by every render.
+
+    Attributes:
+        file_name (string): The sound file
+        cache (FileCache): Cache the file is decoded through
+    """
+
+    file_name = ""
+    cache = None
+
+    def __init__(self, file_name, cache=None):
+        """
+        Creates a file source.
+
+        Args:
+            file_name (string): The sound file
+            cache (FileCache): Cache to decode the file through. If None, the shared file_cache is used
+        """
+
+        self.file_name = file_name
+        self.cache = cache or file_cache
+
+    def get_key(self):
+        """Returns the settings the source's sound depends on, including when the file was last changed"""
+
+        return ("file", os.path.realpath(self.file_name), os.path.getmtime(self.file_name))
+
+    def render(self, num_frames, sample_rate, num_channels, floating=False):
+        """
+        Renders the source: the file, cut to length or padded with silence.
+
+        Args:
+            num_frames (int): Length of the sound, in frames, or None for the whole file
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels
+            floating (bool): Whether to make a float32 sound
+        Returns:
+            (DynSound) The sound. It shares the decoded samples until it is changed
+        """
+
+        sound = self.cache.load(self.file_name, sample_rate, num_channels, floating=floating)
+
+        if num_frames is not None and num_frames != sound.samples.shape[0]:
+            if num_frames < sound.samples.shape[0]:
+                # A view of the decoded samples, so nothing is copied
+                sound.set_samples(sound.samples[:num_frames])
+            else:
+                sound.resize(num_frames)
+
+        return sound
+
+
+def make_source(name, waveform="sine", pitch=440, seed=0, cache=None):
+    """
+    Creates a source from its name, as used by the Generator's source parameter.
+
+    Args:
+        name (string): "oscillator", "white_noise", "pink_noise", "brown_noise" or the name of a sound file
+        waveform (string): Waveform of the oscillator
+        pitch (float): Frequency of the oscillator in hZ
+        seed (int): Seed of the noise
+        cache (FileCache): Cache to decode files through. If None, the shared file_cache is used
+    Returns:
+        (WaveSource, NoiseSource or FileSource) The source
+    """
+
+    if name == "oscillator":
+        return WaveSource(waveform, pitch)
+
+    if name.endswith("_noise") and name[:-len("_noise")] in NOISE_COLOURS:
+        return NoiseSource(name[:-len("_noise")], seed)
+
+    if not os.path.isfile(name):
+        raise ValueError("Unknown source (not a file): %s" % name)
+
+    return FileSource(name, cache)
@@ -0,0 +1,501 @@
+import math
+
+import numpy
+import pygame
+
+import effects
+import envelope
+import filters
+import oscillator
+import wavfile
+
+
+class OscillatorSource:
+    """
+    Streaming source: an oscillator whose pitch multiplier can shift over time. The phase is carried from block to
+    block, so blocks join up seamlessly.
+
+    Attributes:
+        waveform (string): One of oscillator.WAVEFORMS
+        frequency (float): Base frequency in Hz
+        multiplier (float): Frequency multiplier
+        multiplier_shift (float): Amount the multiplier increases per second
+        sample_rate (int): Sample rate
+        num_frames (int): Length of the source in frames; after this the source is silent
+        position (int): Index of the next frame to generate
+        phase (float): Phase of the next frame, in cycles
+        random_state (numpy.random.RandomState): Source of noise for the "noise" waveform
+    """
+
+    waveform = "sine"
+    frequency = 440
+    multiplier = 1.0
+    multiplier_shift = 0.0
+    sample_rate = 22050
+    num_frames = 0
+    position = 0
+    phase = 0.0
+    random_state = None
+
+    def __init__(self, waveform, frequency, multiplier, multiplier_shift, num_frames, sample_rate):
+        """
+        Creates an oscillator source.
+
+        Args:
+            waveform (string): One of oscillator.WAVEFORMS
+            frequency (float): Base frequency in Hz
+            multiplier (float): Frequency multiplier
+            multiplier_shift (float): Amount the multiplier increases per second
+            num_frames (int): Length of the source in frames
+            sample_rate (int): Sample rate
+        """
+
+        self.waveform = waveform
+        self.frequency = frequency
+        self.multiplier = multiplier
+        self.multiplier_shift = multiplier_shift
+        self.num_frames = num_frames
+        self.sample_rate = sample_rate
+        self.position = 0
+        self.phase = 0.0
+        self.random_state = numpy.random.RandomState(0)
+
+    def read(self, output):
+        """
+        Generates the next block.
+
+        Args:
+            output (numpy.ndarray): One-channel float buffer to fill, between -1 and 1
+        """
+
+        num_frames = min(output.shape[0], max(0, self.num_frames - self.position))
+
+        # The source frame read at output frame i is i * (multiplier + shift * i / rate), so the phase advances by
+        # frequency * (multiplier + shift * (2i + 1) / rate) / rate cycles per frame
+        frames = numpy.arange(self.position, self.position + num_frames, dtype=numpy.float64)
+        frequencies = self.frequency * (self.multiplier + self.multiplier_shift * (2.0 * frames + 1.0) / self.sample_rate)
+
+        output[:num_frames] = oscillator.generate(self.waveform, frequencies, num_frames, self.sample_rate,
+                                                  start_phase=self.phase, random_state=self.random_state)
+        output[num_frames:] = 0.0
+
+        if num_frames:
+            self.phase = (self.phase + numpy.sum(frequencies) / self.sample_rate) % 1.0
+        self.position += output.shape[0]
+
+
+class GainStage:
+    """
+    Streaming effect: changes the volume, clipping to the sample range unless the stream is floating.
+
+    Attributes:
+        multiplier (float): Sample multiplier
+        sample_min (float): Lowest allowed sample value (-inf for no clipping)
+        sample_max (float): Highest allowed sample value (inf for no clipping)
+    """
+
+    multiplier = 1.0
+    sample_min = -32768
+    sample_max = 32767
+
+    def __init__(self, db, sample_min, sample_max):
+        """
+        Creates a gain stage.
+
+        Args:
+            db (float): Decibels to change the volume by
+            sample_min (float): Lowest allowed sample value (-inf for no clipping)
+            sample_max (float): Highest allowed sample value (inf for no clipping)
+        """
+
+        self.multiplier = effects.db_to_multiplier(db)
+        self.sample_min = sample_min
+        self.sample_max = sample_max
+
+    def process(self, block):
+        """Applies the stage to a block in place"""
+
+        block *= self.multiplier
+
+        if numpy.isfinite(self.sample_min) or numpy.isfinite(self.sample_max):
+            numpy.clip(block, self.sample_min, self.sample_max, out=block)
+
+
+class GateStage:
+    """
+    Streaming effect: the 'plop' on-off gate, built a block at a time by envelope.gate. The gate's position is carried
+    from block to block. When a cycle is a whole number of frames, the gate matches the rendered plops exactly; when
+    it isn't, an edge far into the stream can very occasionally land one frame away, as its position is worked out
+    directly rather than summed up cycle by cycle.
+
+    Attributes:
+        sample_rate (int): Sample rate
+        plopper_rate (float): Number of plops per second
+        position (int): Index of the next frame
+    """
+
+    sample_rate = 22050
+    plopper_rate = 0.0
+    position = 0
+
+    def __init__(self, sample_rate, plopper_rate):
+        """
+        Creates a gate stage.
+
+        Args:
+            sample_rate (int): Sample rate
+            plopper_rate (float): Number of plops per second
+        """
+
+        self.sample_rate = sample_rate
+        self.plopper_rate = plopper_rate
+        self.position = 0
+
+    def process(self, block):
+        """Applies the stage to a block in place"""
+
+        gains = envelope.gate(block.shape[0], self.sample_rate, self.plopper_rate, start=self.position)
+        block[gains == 0.0] = 0.0
+
+        self.position += block.shape[0]
+
+
+class EchoStage:
+    """
+    Streaming effect: multi-tap echo. A fixed-size delay line holds the input needed by the longest tap, so memory use
+    doesn't depend on the sound length.
+
+    Attributes:
+        delays (list): Delay of each tap, in frames
+        multipliers (list): Sample multiplier of each tap
+        max_delay (int): Longest delay, in frames
+        line (numpy.ndarray): Delay line: max_delay frames of past input followed by room for one block
+    """
+
+    delays = None
+    multipliers = None
+    max_delay = 0
+    line = None
+
+    def __init__(self, delays, gains, block_size):
+        """
+        Creates an echo stage.
+
+        Args:
+            delays (list): Delay of each tap, in frames
+            gains (list): Volume change of each tap, in dB
+            block_size (int): Largest block that will be processed
+        """
+
+        self.delays = [int(delay) for delay in delays]
+        self.multipliers = [effects.db_to_multiplier(gain) for gain in gains]
+        self.max_delay = max(self.delays)
+        self.line = numpy.zeros(self.max_delay + block_size)
+
+    def process(self, block):
+        """Applies the stage to a block in place"""
+
+        num_frames = block.shape[0]
+        self.line[self.max_delay:self.max_delay + num_frames] = block
+
+        for delay, multiplier in zip(self.delays, self.multipliers):
+            start = self.max_delay - delay
+            block += multiplier * self.line[start:start + num_frames]
+
+        # Shift the delay line along for the next block
+        self.line[:self.max_delay] = self.line[num_frames:num_frames + self.max_delay]
+
+
+class FilterStage:
+    """
+    Streaming effect: a biquad filter, whose state is carried from block to block.
+
+    Attributes:
+        biquad (filters.Biquad): The filter
+    """
+
+    biquad = None
+
+    def __init__(self, filter_type, frequency, sample_rate, block_size):
+        """
+        Creates a filter stage.
+
+        Args:
+            filter_type (string): One of filters.BIQUAD_TYPES
+            frequency (float): Cutoff or centre frequency in hZ
+            sample_rate (int): Sample rate
+            block_size (int): Largest block that will be processed
+        """
+
+        b, a = filters.design_biquad(filter_type, frequency, sample_rate)
+        self.biquad = filters.Biquad(b, a, block_size)
+
+    def process(self, block):
+        """Applies the stage to a block in place"""
+
+        block[:] = self.biquad.process(block)
+
+
+class ReverbStage:
+    """
+    Streaming effect: convolution reverb. The convolver's partitions are one block long, so each block's reverb is
+    ready as soon as the block is, with no added latency.
+
+    Attributes:
+        convolver (filters.Convolver): Partitioned convolution with the room's impulse response
+        wet (float): Share of the output that is reverb
+        padded (numpy.ndarray): One block, for the final block (which may be short)
+    """
+
+    convolver = None
+    wet = 0.3
+    padded = None
+
+    def __init__(self, impulse_response, wet, block_size):
+        """
+        Creates a reverb stage.
+
+        Args:
+            impulse_response (numpy.ndarray): Mono impulse response (1-D, or frames x 1)
+            wet (float): Share of the output that is reverb, from 0 to 1
+            block_size (int): Frames per block
+        """
+
+        self.convolver = filters.Convolver(filters.normalise_impulse_response(impulse_response), block_size)
+        self.convolver.reset(1)
+        self.wet = wet
+        self.padded = numpy.zeros((block_size, 1))
+
+    def process(self, block):
+        """Applies the stage to a block in place"""
+
+        num_frames = block.shape[0]
+        self.padded[:num_frames, 0] = block
+        self.padded[num_frames:] = 0.0
+
+        reverb = self.convolver.process_block(self.padded)[:num_frames, 0]
+
+        block *= 1.0 - self.wet
+        block += self.wet * reverb
+
+
+class StreamingEngine:
+    """
+    Block-based synthesis: renders a sound one block at a time from a source and a chain of stateful effect stages,
+    so playback or saving can start straight away and memory use stays constant whatever the sound length.
+
+    Attributes:
+        source (OscillatorSource): Where the sound comes from
+        stages (list): Effect stages, applied in order
+        num_frames (int): Total length of the sound, in frames
+        block_size (int): Frames per block
+        num_channels (int): Number of channels
+        sample_rate (int): Sample rate
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+        data_type (string): Type of the output samples
+        position (int): Number of frames rendered so far
+        work (numpy.ndarray): Single-channel float buffer the blocks are processed in
+    """
+
+    source = None
+    stages = None
+    num_frames = 0
+    block_size = 4096
+    num_channels = 2
+    sample_rate = 22050
+    sample_min = -32768
+    sample_max = 32767
+    data_type = "<h"
+    position = 0
+    work = None
+
+    def __init__(self, source, stages, num_frames, block_size, num_channels, sample_rate, sample_min=-32768,
+                 sample_max=32767, data_type="<h"):
+        """
+        Creates a streaming engine.
+
+        Args:
+            source (OscillatorSource): Where the sound comes from
+            stages (list): Effect stages, applied in order
+            num_frames (int): Total length of the sound, in frames
+            block_size (int): Frames per block
+            num_channels (int): Number of channels
+            sample_rate (int): Sample rate
+            sample_min (int): Lowest sample value
+            sample_max (int): Highest sample value
+            data_type (string): Type of the output samples
+        """
+
+        self.source = source
+        self.stages = stages
+        self.num_frames = num_frames
+        self.block_size = block_size
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.sample_min = sample_min
+        self.sample_max = sample_max
+        self.data_type = data_type
+        self.position = 0
+        self.work = numpy.zeros(block_size)
+
+    def read_block(self):
+        """
+        Renders the next block.
+
+        Returns:
+            (numpy.ndarray) The block (frames x channels), or None when the sound has finished. The last block may be
+                            shorter than block_size
+        """
+
+        num_frames = min(self.block_size, self.num_frames - self.position)
+        if num_frames <= 0:
+            return None
+
+        block = self.work[:num_frames]
+
+        # Scale the source to the sample range the same way oscillator.fill does, then run the effects
+        centre_value = (self.sample_min + self.sample_max) / 2
+        self.source.read(block)
+        block *= self.sample_max - centre_value
+        block += centre_value
+
+        for stage in self.stages:
+            stage.process(block)
+
+        self.position += num_frames
+
+        # Every channel is the same, so the effects run on one channel and are only copied out at the end
+        numpy.clip(block, self.sample_min, self.sample_max, out=block)
+        output = numpy.empty((num_frames, self.num_channels), dtype=self.data_type)
+        output[...] = block[:, numpy.newaxis]
+
+        return output
+
+    def blocks(self):
+        """
+        Iterates over the remaining blocks.
+
+        Yields:
+            (numpy.ndarray) Each block (frames x channels)
+        """
+
+        block = self.read_block()
+        while block is not None:
+            yield block
+            block = self.read_block()
+
+    def write(self, file_name, sample_format="int16"):
+        """
+        Streams the sound into a WAV file.
+
+        Args:
+            file_name (string): The file name to save the sound with. File extension must be included.
+            sample_format (string): Sample format of the file: "uint8", "int16", "int24", "int32" or "float32"
+        """
+
+        writer = wavfile.WavWriter(file_name, self.num_channels, self.sample_rate, sample_format, self.sample_min, self.sample_max)
+
+        try:
+            for block in self.blocks():
+                writer.write(block)
+        finally:
+            writer.close()
+
+    def play(self, channel=None):
+        """
+        Streams the sound to a pygame mixer channel, queueing each block as the previous one starts playing. Between
+        checks of the queue, this sleeps for a quarter of a block, which still leaves most of a block's playing time to
+        render and queue the next one. This returns once the last block has been queued. Requires pygame.mixer to be
+        initialised.
+
+        Args:
+            channel (pygame.mixer.Channel): Channel to play on. If None, a free channel is used
+        """
+
+        if channel is None:
+            channel = pygame.mixer.find_channel(True)
+
+        # A quarter of a block, in milliseconds
+        wait_time = max(1, int(250 * self.block_size / self.sample_rate))
+
+        for block in self.blocks():
+            sound = pygame.mixer.Sound(block)
+
+            if not channel.get_busy():
+                channel.play(sound)
+            else:
+                # Only one sound can be queued, so wait for the queued block to start
+                while channel.get_queue() is not None:
+                    pygame.time.wait(wait_time)
+
+                channel.queue(sound)
+
+
+def create_engine(sample_rate, num_channels, block_size, length, volume, frequency, frequency_shift, plops, echoes,
+                  waveform="sine", pitch=440, echo_delay=0.3, echo_volume_change=-4, filter_type="none",
+                  filter_frequency=2000, impulse_response=None, reverb_wet=0.3, floating=True):
+    """
+    Creates a streaming engine for a set of Generator parameters. The result matches Generator.validate_sound in
+    length and effects, but the pitch shift is synthesised directly rather than resampled.
+
+    Args:
+        sample_rate (int): Sample rate
+        num_channels (int): Number of channels
+        block_size (int): Frames per block
+        length (float): Length of the sound before frequency changes, in seconds
+        volume (float): Volume offset, in dB
+        frequency (float): Frequency multiplier
+        frequency_shift (float): Rate of frequency multiplier change, per second
+        plops (float): Plops per second
+        echoes (int): Number of echoes
+        waveform (string): One of oscillator.WAVEFORMS
+        pitch (float): Frequency of the base wave in Hz, before the frequency multiplier
+        echo_delay (float): Delay of each echo, in seconds
+        echo_volume_change (float): Volume change per echo, in dB
+        filter_type (string): "none", or one of filters.BIQUAD_TYPES
+        filter_frequency (float): Cutoff or centre frequency of the filter in hZ
+        impulse_response (numpy.ndarray): Mono impulse response of the room, or None for no reverb. The blocks are
+                                          rendered in one channel, so the reverb has no stereo width
+        reverb_wet (float): Share of the output that is reverb
+        floating (bool): Whether to clip only once, at the output, like a float render. Otherwise the gain clips to the
+                         sample range, like DynSound.change_volume on integer samples
+    Returns:
+        (StreamingEngine) The engine
+    """
+
+    # Same lengths as the pre-rendered path: the base is stretched by the frequency, then repitched
+    base_frames = int(frequency * length * sample_rate)
+    if frequency_shift != 0.0:
+        num_frames = effects.shifting_length(base_frames, sample_rate, frequency, frequency_shift)
+    elif frequency != 1.0:
+        num_frames = int(math.ceil(base_frames / float(frequency)))
+    else:
+        num_frames = base_frames
+
+    source = OscillatorSource(waveform, pitch, frequency, frequency_shift, num_frames, sample_rate)
+    stages = []
+    total_frames = num_frames
+
+    if volume != 0:
+        if floating:
+            stages.append(GainStage(volume, -numpy.inf, numpy.inf))
+        else:
+            stages.append(GainStage(volume, StreamingEngine.sample_min, StreamingEngine.sample_max))
+
+    if plops > 0.0001:
+        stages.append(GateStage(sample_rate, plops))
+
+    if echoes > 0:
+        delays = [int(echo_delay * (i + 1) * sample_rate) for i in xrange(0, echoes)]
+        stages.append(EchoStage(delays, [echo_volume_change * (i + 1) for i in xrange(0, echoes)], block_size))
+        total_frames = num_frames + max(delays)
+
+    if filter_type != "none":
+        stages.append(FilterStage(filter_type, filter_frequency, sample_rate, block_size))
+
+    if impulse_response is not None:
+        stages.append(ReverbStage(impulse_response, reverb_wet, block_size))
+        total_frames += len(impulse_response) - 1
+
+    return StreamingEngine(source, stages, total_frames, block_size, num_channels, sample_rate)
@@ -0,0 +1,157 @@
+"""The original per-sample DynSound effects, kept as the reference the vectorised effects are checked against.
+
+Each function is the loop from the first version of DynSound, unchanged except that it works on a numpy array of
+samples instead of a pygame.Sound. They are far too slow for real use; they exist only for tests and benchmarks.
+"""
+import math
+
+import numpy
+
+
+def change_volume(samples, db, sample_min, sample_max):
+    """
+    Changes the volume of samples in place, one sample at a time.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        db (float): Decibels to change sound volume by
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+    Returns:
+        (numpy.ndarray) The samples
+    """
+
+    multiplier = pow(10, float(db) / 20)
+    for index, sample in numpy.ndenumerate(samples):
+        samples[index[0], index[1]] = numpy.clip(samples[index[0], index[1]] * multiplier, sample_min, sample_max)
+
+    return samples
+
+
+def change_frequency(samples, multiplier):
+    """
+    Changes the pitch of samples by grabbing (or repeating) frames one sample at a time.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        multiplier (float): The multiplier to be applied to the sound's frequency
+    Returns:
+        (numpy.ndarray) The new samples
+    """
+
+    sample_array = samples.copy()
+
+    if multiplier > 1.0:
+        for index, sample in numpy.ndenumerate(sample_array):
+            if int(index[0] * multiplier) >= sample_array.shape[0]:
+                break
+            else:
+                sample_array[index[0], index[1]] = sample_array[int(index[0] * multiplier), index[1]]
+
+        sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier))), int(sample_array.shape[1])), refcheck=False)
+    elif multiplier < 1.0:
+        sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier))), int(sample_array.shape[1])), refcheck=False)
+
+        for frame in xrange(sample_array.shape[0] - 1, 0, -1):
+            for channel in xrange(sample_array.shape[1]):
+                sample_array[frame, channel] = sample_array[int(frame * multiplier), channel]
+
+    return sample_array
+
+
+def change_frequency_shifting(samples, sample_rate, multiplier, multiplier_shift):
+    """
+    Changes the pitch of samples with a constant shift up or down, one sample at a time.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        sample_rate (int): Sample rate
+        multiplier (float): The base multiplier to be applied to the sound's frequency
+        multiplier_shift (float): The amount by which the multiplier increases per second
+    Returns:
+        (numpy.ndarray) The new samples
+    """
+
+    sample_array = samples.copy()
+
+    for index, sample in numpy.ndenumerate(sample_array):
+        grab = int(index[0] * (multiplier + float(index[0]) / sample_rate * multiplier_shift))
+
+        if grab >= sample_array.shape[0] or grab < 0:
+            break
+        else:
+            sample_array[index[0], index[1]] = sample_array[grab, index[1]]
+
+    sample_array.resize((int(math.ceil(sample_array.shape[0] / float(multiplier + float(sample_array.shape[0]) / sample_rate * multiplier_shift))), int(sample_array.shape[1])), refcheck=False)
+
+    return sample_array
+
+
+def add_plopper(samples, sample_rate, plopper_rate):
+    """
+    Silences every other section of samples in place, one sample at a time.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels)
+        sample_rate (int): Sample rate
+        plopper_rate (float): Number of plops per second
+    Returns:
+        (numpy.ndarray) The samples
+    """
+
+    if plopper_rate <= 0.0001:
+        return samples
+
+    high_index = sample_rate / plopper_rate / 2
+    length = samples.shape[0]
+    while high_index < length:
+        section_end = high_index + sample_rate / plopper_rate / 2
+
+        if section_end > length:
+            section_end = length
+
+        for low_index in xrange(int(high_index), int(section_end)):
+            for channel in xrange(0, samples.shape[1]):
+                samples[low_index, channel] = 0
+
+        high_index += sample_rate / plopper_rate
+
+    return samples
+
+
+def mix(samples, source_samples, sample_rate, sample_min, sample_max, target_start=0.0, source_start=0.0, length=-1):
+    """
+    Mixes source samples into samples, one sample at a time.
+
+    Args:
+        samples (numpy.ndarray): Samples mixed into (frames x channels)
+        source_samples (numpy.ndarray): Samples to mix in (frames x channels)
+        sample_rate (int): Sample rate of both
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+        target_start (float in seconds): Time, in samples, to start mixing at
+        source_start (float in seconds): Time, in source_samples, to start the mix
+        length (float in seconds): Length of the section being mixed. -1 will use the length of the source
+    Returns:
+        (numpy.ndarray) The new samples
+    """
+
+    target_start_frame = int(target_start * sample_rate)
+    source_start_frame = int(source_start * sample_rate)
+    num_frames = int(length * sample_rate)
+    num_channels = samples.shape[1]
+
+    if source_start_frame + num_frames >= source_samples.shape[0] or length == -1:
+        num_frames = source_samples.shape[0] - source_start_frame
+
+    sample_array = samples.copy()
+
+    if sample_array.shape[0] < target_start_frame + num_frames:
+        sample_array.resize((target_start_frame + num_frames, sample_array.shape[1]), refcheck=False)
+
+    for frame in xrange(0, num_frames):
+        for channel in xrange(0, num_channels):
+            sample_array[target_start_frame + frame, channel] = numpy.clip(int(sample_array[target_start_frame + frame, channel]) + source_samples[source_start_frame + frame, channel],
+                                                                           sample_min, sample_max)
+
+    return sample_array
@@ -0,0 +1,99 @@
+"""Checks DynSound's file loading and saving.
+
+Usage: python -m unittest discover tests
+"""
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dynsound import DynSound
+
+
+def make_tone(frequency, sample_rate, seconds=0.5, amplitude=16000):
+    """Returns a 16-bit stereo sine tone"""
+
+    phases = numpy.arange(int(seconds * sample_rate)) * (2 * math.pi * frequency / sample_rate)
+    tone = (numpy.sin(phases) * amplitude).astype("<h")
+
+    return numpy.column_stack((tone, tone))
+
+
+def get_level(samples, frequency, sample_rate):
+    """Returns the amplitude of one frequency in the first channel of samples"""
+
+    phases = numpy.arange(samples.shape[0]) * (2 * math.pi * frequency / sample_rate)
+
+    return 2 * abs(numpy.dot(samples[:, 0].astype(numpy.float64), numpy.exp(-1j * phases))) / samples.shape[0]
+
+
+class DynSoundFileTest(unittest.TestCase):
+    """Loads and saves sounds through temporary files"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def save_tone(self, frequency, sample_rate):
+        """Saves a tone as a WAV and returns its file name"""
+
+        sound = DynSound(num_frames=1, sample_rate=sample_rate)
+        sound.set_samples(make_tone(frequency, sample_rate))
+        file_name = os.path.join(self.directory, "tone_%d_%d.wav" % (frequency, sample_rate))
+        sound.save(file_name)
+
+        return file_name
+
+    def test_load_downsampled_keeps_low_tones(self):
+        sound = DynSound(self.save_tone(1000, 44100), sample_rate=22050)
+
+        self.assertEqual(sound.samples.shape[0], 11025)
+        self.assertAlmostEqual(get_level(sound.samples, 1000, 22050) / 16000, 1.0, delta=0.02)
+
+    def test_load_downsampled_does_not_alias(self):
+        # 15 kHz is above the 11025 Hz limit of the new sample rate; without filtering it folds down to 7050 Hz
+        sound = DynSound(self.save_tone(15000, 44100), sample_rate=22050)
+
+        self.assertLess(get_level(sound.samples, 7050, 22050), 16000 * 0.01)
+
+    def test_save_matches_playback(self):
+        sound = DynSound(num_frames=1, floating=True)
+        samples = numpy.random.RandomState(0).uniform(-40000, 40000, (1000, 2)).astype(numpy.float32)
+        samples[:2] = [[-1.5, 1.5], [-0.2, 100.7]]
+        sound.set_samples(samples)
+
+        file_name = os.path.join(self.directory, "float.wav")
+        sound.save(file_name)
+        saved = DynSound(file_name).samples
+
+        self.assertTrue(numpy.array_equal(saved[:2], [[-1, 1], [0, 100]]))
+        self.assertTrue(numpy.array_equal(saved, sound.get_output_samples()))
+
+    def test_load_rounds_like_playback(self):
+        # Float samples with fractional and negative values on the 16-bit scale
+        sound = DynSound(num_frames=1, floating=True)
+        samples = numpy.random.RandomState(1).uniform(-40000, 40000, (1000, 2)).astype(numpy.float32)
+        samples[:2] = [[-1.5, 1.5], [-0.2, 100.7]]
+        sound.set_samples(samples)
+
+        file_name = os.path.join(self.directory, "float32.wav")
+        sound.save(file_name, "float32")
+
+        # Loading straight to 16 bits must give what the float load plays as
+        loaded = DynSound(file_name).samples
+        played = DynSound(file_name, floating=True).get_output_samples()
+
+        self.assertTrue(numpy.array_equal(loaded[:2], [[-1, 1], [0, 100]]))
+        self.assertTrue(numpy.array_equal(loaded, played))
+
+
+if __name__ == "__main__":
+    unittest.main()
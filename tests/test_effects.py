@@ -0,0 +1,104 @@
+"""Checks that the vectorised DynSound effects match the original per-sample effects bit for bit.
+
+Usage: python -m unittest discover tests
+"""
+import itertools
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dynsound import DynSound
+from tests import baseline
+
+
+SAMPLE_RATE = 22050
+
+# Lengths of the test sounds, in frames: single frames, odd lengths and a tenth of a second
+LENGTHS = [1, 2, 777, 2205]
+
+
+def make_samples(num_frames, seed):
+    """Returns full-range random 16-bit stereo samples"""
+
+    return numpy.random.RandomState(seed).randint(-32768, 32768, (num_frames, 2)).astype("<h")
+
+
+def make_sound(samples):
+    """Returns a 16-bit sound holding a copy of samples"""
+
+    sound = DynSound(num_frames=1, sample_rate=SAMPLE_RATE)
+    sound.set_samples(samples.copy())
+
+    return sound
+
+
+class EffectsTest(unittest.TestCase):
+    """Runs each vectorised effect and its per-sample original over a grid of parameters"""
+
+    def assert_same(self, expected, sound, parameters):
+        """Checks the sound's samples are exactly the expected samples"""
+
+        self.assertEqual(expected.shape, sound.samples.shape, parameters)
+        self.assertEqual(expected.dtype, sound.samples.dtype, parameters)
+        self.assertTrue(numpy.array_equal(expected, sound.samples), parameters)
+
+    def test_change_volume(self):
+        for num_frames, db in itertools.product(LENGTHS, [-60, -6.5, -1, 0, 0.3, 6, 20]):
+            samples = make_samples(num_frames, num_frames)
+            sound = make_sound(samples)
+            sound.change_volume(db)
+
+            self.assert_same(baseline.change_volume(samples.copy(), db, -32768, 32767), sound, (num_frames, db))
+
+    def test_change_frequency(self):
+        for num_frames, multiplier in itertools.product(LENGTHS, [0.1, 0.37, 0.5, 0.99, 1.0, 1.01, 1.5, 2, 3.3, 7]):
+            samples = make_samples(num_frames, num_frames)
+            sound = make_sound(samples)
+            sound.change_frequency(multiplier)
+
+            self.assert_same(baseline.change_frequency(samples, multiplier), sound, (num_frames, multiplier))
+
+    def test_change_frequency_shifting(self):
+        grid = itertools.product(LENGTHS, [0.25, 0.5, 1.0, 1.7, 3.0], [-40, -2.5, 0.0, 0.8, 5.0, 60])
+
+        for num_frames, multiplier, multiplier_shift in grid:
+            samples = make_samples(num_frames, num_frames)
+            sound = make_sound(samples)
+
+            try:
+                expected = baseline.change_frequency_shifting(samples, SAMPLE_RATE, multiplier, multiplier_shift)
+            except (ValueError, ZeroDivisionError) as error:
+                # A shift that takes the pitch to zero or below has no length; both versions must refuse it
+                self.assertRaises(type(error), sound.change_frequency_shifting, multiplier, multiplier_shift)
+                continue
+
+            sound.change_frequency_shifting(multiplier, multiplier_shift)
+            self.assert_same(expected, sound, (num_frames, multiplier, multiplier_shift))
+
+    def test_add_plopper(self):
+        for num_frames, rate in itertools.product(LENGTHS, [0.0, 0.5, 1, 3, 7.3, 10, 99, 441, 1000.5]):
+            samples = make_samples(num_frames, num_frames)
+            sound = make_sound(samples)
+            sound.add_plopper(rate)
+
+            self.assert_same(baseline.add_plopper(samples.copy(), SAMPLE_RATE, rate), sound, (num_frames, rate))
+
+    def test_mix(self):
+        grid = itertools.product(LENGTHS, [1, 500, 3000], [0.0, 0.01, 0.2], [0.0, 0.005], [-1, 0.0, 0.02, 1.0])
+
+        for num_frames, source_frames, target_start, source_start, length in grid:
+            samples = make_samples(num_frames, num_frames)
+            source_samples = make_samples(source_frames, source_frames + 1)
+            sound = make_sound(samples)
+            sound.mix(make_sound(source_samples), target_start, source_start, length)
+
+            expected = baseline.mix(samples, source_samples, SAMPLE_RATE, -32768, 32767, target_start, source_start, length)
+            self.assert_same(expected, sound, (num_frames, source_frames, target_start, source_start, length))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Checks the envelope gain curves against their definitions and the original plop loop.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import envelope
+from tests import baseline
+
+
+class EnvelopeTest(unittest.TestCase):
+    """Builds gain curves at 1000 hZ, so times are easy to read as frames"""
+
+    def test_adsr(self):
+        gains = envelope.adsr(1000, 1000, attack=0.1, decay=0.2, sustain=0.5, release=0.3)
+
+        self.assertEqual(gains.shape, (1000,))
+        self.assertEqual((gains[0], gains[50], gains[100]), (0.0, 0.5, 1.0))
+        self.assertAlmostEqual(gains[200], 0.75)
+        self.assertTrue(numpy.all(gains[300:700] == 0.5))
+        self.assertAlmostEqual(gains[850], 0.25)
+        self.assertTrue(numpy.all(numpy.diff(gains[700:]) < 0))
+
+    def test_adsr_cuts_late_segments_short(self):
+        gains = envelope.adsr(150, 1000, attack=0.1, decay=0.2, sustain=0.5, release=0.3)
+
+        # The attack fits; the decay is squeezed into the 50 frames left and there is no room for the release
+        self.assertEqual(gains[99], 0.99)
+        self.assertEqual(gains[100], 1.0)
+        self.assertAlmostEqual(gains[149], 1.0 - 0.5 * 49 / 50.0)
+
+    def test_tremolo(self):
+        gains = envelope.tremolo(1000, 1000, 4, depth=0.6)
+
+        self.assertAlmostEqual(gains.max(), 1.0)
+        self.assertAlmostEqual(gains.min(), 0.4)
+        self.assertAlmostEqual(gains[125], 0.4)
+        self.assertAlmostEqual(gains[250], 1.0)
+
+    def test_gate_matches_original_plopper(self):
+        for num_frames, rate in ((1000, 7), (2205, 10), (22050, 28.3), (777, 1000), (50, 0.5)):
+            expected = baseline.add_plopper(numpy.ones((num_frames, 1)), 22050, rate)[:, 0]
+            self.assertTrue(numpy.array_equal(envelope.gate(num_frames, 22050, rate), expected), (num_frames, rate))
+
+    def test_gate_duty_and_crossfade(self):
+        hard = envelope.gate(1000, 1000, 10, duty=0.25)
+        self.assertEqual(hard.sum(), 250)
+        self.assertTrue(numpy.all(hard[:25] == 1) and numpy.all(hard[25:100] == 0))
+
+        # A 10 frame fade centred on each edge
+        soft = envelope.gate(1000, 1000, 10, duty=0.25, crossfade=0.01)
+        self.assertTrue(numpy.all((soft >= 0) & (soft <= 1)))
+        self.assertTrue(numpy.all(soft[:20] == 1) and numpy.all(soft[30:95] == 0))
+        self.assertTrue(numpy.all(numpy.diff(soft[20:30]) < 0))
+        self.assertAlmostEqual(soft[25], 0.5)
+
+    def test_gates_match_gate(self):
+        lengths = numpy.array([1000, 2205, 50, 22050, 3000])
+        rates = numpy.array([7, 10, 0.5, 28.3, 1000])
+
+        for duty in (0.5, 0.3):
+            gains = envelope.gates(lengths, 22050, rates, duty)
+
+            for row in xrange(lengths.shape[0]):
+                self.assertTrue(numpy.array_equal(gains[row, :lengths[row]],
+                                                  envelope.gate(lengths[row], 22050, rates[row], duty)), (duty, row))
+
+    def test_apply_truncates_integers(self):
+        samples = numpy.array([[100, -100], [7, -7]], dtype="<h")
+        envelope.apply(samples, numpy.array([0.5, 0.5]))
+
+        self.assertTrue(numpy.array_equal(samples, [[50, -50], [3, -3]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Checks partitioned FFT convolution against direct convolution.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import filters
+
+
+def direct(samples, impulse_response):
+    """Convolves each channel with numpy.convolve"""
+
+    return numpy.column_stack([numpy.convolve(samples[:, channel], impulse_response[:, channel % impulse_response.shape[1]])
+                               for channel in xrange(samples.shape[1])])
+
+
+class ConvolveTest(unittest.TestCase):
+    """Convolves random sounds with impulse responses spanning several partitions"""
+
+    def setUp(self):
+        random_state = numpy.random.RandomState(0)
+        self.samples = random_state.uniform(-32768, 32767, (20000, 2))
+        self.mono_ir = random_state.standard_normal((3 * filters.PARTITION_SIZE + 123, 1))
+        self.stereo_ir = random_state.standard_normal((2 * filters.PARTITION_SIZE + 5, 2))
+
+    def assert_matches(self, output, expected):
+        """Checks output equals expected up to floating point rounding"""
+
+        self.assertEqual(output.shape, expected.shape)
+        self.assertTrue(numpy.allclose(output, expected, rtol=0, atol=1e-6 * numpy.abs(expected).max()))
+
+    def test_default_partitions(self):
+        for impulse_response in (self.mono_ir, self.stereo_ir):
+            self.assert_matches(filters.convolve(self.samples, impulse_response), direct(self.samples, impulse_response))
+
+    def test_partition_sizes(self):
+        for block_size in (64, 1000, 4096):
+            self.assert_matches(filters.convolve(self.samples, self.mono_ir, block_size), direct(self.samples, self.mono_ir))
+
+    def test_long_impulse_response(self):
+        # Long enough for the default partitions to grow past PARTITION_SIZE
+        impulse_response = numpy.random.RandomState(1).standard_normal((20 * filters.PARTITION_SIZE + 7, 1))
+        self.assert_matches(filters.convolve(self.samples[:3000], impulse_response),
+                            direct(self.samples[:3000], impulse_response))
+
+    def test_short_sound(self):
+        self.assert_matches(filters.convolve(self.samples[:10], self.mono_ir), direct(self.samples[:10], self.mono_ir))
+
+    def test_streaming_convolver(self):
+        convolver = filters.Convolver(self.mono_ir, 512)
+        convolver.reset(2)
+        padded = numpy.zeros((self.samples.shape[0] + self.mono_ir.shape[0] + 512, 2))
+        padded[:self.samples.shape[0]] = self.samples
+
+        # Fed in uneven pieces; the output lags by one block
+        output = numpy.concatenate([convolver.process(padded[start:start + 700]) for start in xrange(0, padded.shape[0], 700)])
+        expected = direct(self.samples, self.mono_ir)
+        self.assert_matches(output[512:512 + expected.shape[0]], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
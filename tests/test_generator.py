@@ -0,0 +1,53 @@
+"""Checks that Generator's cached effect stages are rebuilt whenever a setting they depend on changes.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generator import Generator
+
+
+def make_generator(floating, dither):
+    """Returns a generator set up for the laser preset"""
+
+    generator = Generator(22050, -16, 2, 4096, floating=floating)
+    generator.dither = dither
+    generator.apply_parameters(dict(Generator.PRESETS["laser"], volume=-7.3))
+
+    return generator
+
+
+class GeneratorStageTest(unittest.TestCase):
+    """Renders, changes a setting, and renders again with the same parameters"""
+
+    def assert_same_sound(self, sound, expected):
+        """Checks two sounds have the same format and samples"""
+
+        self.assertEqual(sound.floating, expected.floating)
+        self.assertEqual(sound.dither, expected.dither)
+        self.assertEqual(sound.samples.dtype, expected.samples.dtype)
+        self.assertTrue(numpy.array_equal(sound.samples, expected.samples))
+
+    def test_floating_change_rebuilds_base(self):
+        generator = make_generator(True, False)
+        generator.render_sound()
+
+        generator.floating = False
+        self.assert_same_sound(generator.render_sound(), make_generator(False, False).render_sound())
+
+    def test_dither_change_rebuilds_base(self):
+        generator = make_generator(True, False)
+        generator.render_sound()
+
+        generator.dither = True
+        self.assert_same_sound(generator.render_sound(), make_generator(True, True).render_sound())
+
+
+if __name__ == "__main__":
+    unittest.main()
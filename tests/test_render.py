@@ -0,0 +1,143 @@
+"""Checks the headless batch renderer against sounds rendered directly with Generator.
+
+Usage: python -m unittest discover tests
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import render
+import wavfile
+from generator import Generator
+
+
+def expected_samples(parameters):
+    """Returns the 16-bit samples a Generator renders for a full set of parameters"""
+
+    generator = Generator(22050, -16, 2, 4096)
+    generator.apply_parameters(parameters)
+
+    return generator.render_sound().get_output_samples()
+
+
+class RenderManifestTest(unittest.TestCase):
+    """Renders small manifests into a temporary folder"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, text):
+        """Writes a file in the temporary folder and returns its path"""
+
+        file_name = os.path.join(self.directory, name)
+        with open(file_name, "w") as output:
+            output.write(text)
+
+        return file_name
+
+    def run_main(self, argv):
+        """Runs the command line renderer with its output silenced, and returns its exit code"""
+
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            return render.main(argv)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    def test_entry_parameters(self):
+        name, parameters = render.entry_parameters({"preset": "laser", "echoes": 3}, 7)
+
+        self.assertEqual(name, "sound_0007")
+        self.assertEqual(parameters["echoes"], 3)
+        self.assertEqual(parameters["plops"], Generator.PRESETS["laser"]["plops"])
+        self.assertEqual(parameters["pitch"], render.DEFAULT_PARAMETERS["pitch"])
+
+    def test_csv_blank_cells_use_defaults(self):
+        manifest = self.write_file("sounds.csv", "name,preset,length,echoes\nshort,jump,0.25,\nplain,,,2\n")
+
+        self.assertEqual(render.load_manifest(manifest), [{"name": "short", "preset": "jump", "length": "0.25"},
+                                                          {"name": "plain", "echoes": "2"}])
+
+    def test_json_manifest_renders_wavs(self):
+        entries = [{"name": "pickup", "preset": "pickup"}, {"preset": "death", "volume": -6, "length": 0.4}]
+        manifest = self.write_file("sounds.json", json.dumps({"sounds": entries}))
+        output_dir = os.path.join(self.directory, "out")
+        report = os.path.join(self.directory, "report.json")
+
+        self.assertEqual(self.run_main([manifest, "--output-dir", output_dir, "--report", report]), 0)
+
+        for index, entry in enumerate(entries):
+            name, parameters = render.entry_parameters(entry, index)
+            samples = wavfile.read_wav(os.path.join(output_dir, name + ".wav"))[0]
+            self.assertTrue(numpy.array_equal(samples, expected_samples(parameters)), name)
+
+        with open(report) as timings:
+            results = json.load(timings)
+        self.assertEqual([result["name"] for result in results], ["pickup", "sound_0001"])
+        self.assertTrue(all(result["render_time"] >= 0 for result in results))
+
+    def test_failed_entry_is_reported(self):
+        manifest = self.write_file("sounds.json", json.dumps([{"name": "good"}, {"name": "bad", "waveform": "kazoo"}]))
+        output_dir = os.path.join(self.directory, "out")
+
+        self.assertEqual(self.run_main([manifest, "--output-dir", output_dir]), 1)
+
+        # The bad entry doesn't stop the good one
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "good.wav")))
+        self.assertFalse(os.path.exists(os.path.join(output_dir, "bad.wav")))
+
+
+class RenderSweepTest(unittest.TestCase):
+    """Expands swept parameters and renders them across a process pool"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_expand_sweeps(self):
+        entries = render.expand_sweeps([{"name": "laser", "pitch": [220, 440], "echoes": [0, 1, 2]}, {"name": "plain"}])
+
+        self.assertEqual([entry["name"] for entry in entries],
+                         ["laser_echoes-0_pitch-220", "laser_echoes-0_pitch-440", "laser_echoes-1_pitch-220",
+                          "laser_echoes-1_pitch-440", "laser_echoes-2_pitch-220", "laser_echoes-2_pitch-440", "plain"])
+        self.assertEqual((entries[3]["echoes"], entries[3]["pitch"]), (1, 440))
+
+    def make_jobs(self, folder):
+        """Returns render jobs for a small sweep, writing to a folder"""
+
+        os.makedirs(folder)
+        entries = render.expand_sweeps([{"preset": "jump", "frequency": [0.5, 1, 2], "plops": [0, 10]},
+                                        {"name": "broken", "source": "nowhere"}])
+
+        return [(name, parameters, os.path.join(folder, name + ".wav"), "int16")
+                for name, parameters in (render.entry_parameters(entry, index) for index, entry in enumerate(entries))]
+
+    def test_pool_matches_single_process(self):
+        single = render.render_batch(self.make_jobs(os.path.join(self.directory, "single")), processes=1)
+        pooled = render.render_batch(self.make_jobs(os.path.join(self.directory, "pooled")), processes=2)
+
+        # Results come back in job order, and a failed job doesn't stop the others
+        self.assertEqual([result["name"] for result in pooled], [result["name"] for result in single])
+        self.assertEqual(["error" in result for result in pooled], [False] * 6 + [True])
+
+        for single_result, pooled_result in zip(single[:-1], pooled[:-1]):
+            self.assertTrue(numpy.array_equal(wavfile.read_wav(single_result["file"])[0],
+                                              wavfile.read_wav(pooled_result["file"])[0]), single_result["name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Checks that the render cache gives back the same sound for the same key from memory and from disk.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from generator import Generator
+from rendercache import RenderCache
+
+
+class RenderCacheDiskTest(unittest.TestCase):
+    """Renders through a cache with a disk tier, then reads the render back from a fresh cache on the same folder"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def render_twice(self, floating, dither):
+        """Returns a render and the same render read back from disk"""
+
+        generator = Generator(22050, -16, 2, 4096, RenderCache(disk_dir=self.directory), floating=floating)
+        generator.dither = dither
+        generator.apply_parameters(dict(Generator.PRESETS["laser"], volume=-7.3, frequency=1.3))
+        sound = generator.render_sound()
+
+        generator.render_cache = RenderCache(disk_dir=self.directory)
+        cached = generator.render_sound()
+        self.assertEqual(generator.render_cache.disk_hits, 1)
+
+        return sound, cached
+
+    def assert_same_sound(self, sound, cached):
+        """Checks two sounds have the same format and samples"""
+
+        self.assertEqual(cached.floating, sound.floating)
+        self.assertEqual(cached.dither, sound.dither)
+        self.assertEqual(cached.samples.dtype, sound.samples.dtype)
+        self.assertTrue(numpy.array_equal(cached.samples, sound.samples))
+
+    def test_floating_render(self):
+        sound, cached = self.render_twice(True, False)
+
+        # The float samples must survive, not come back rounded to 16 bits
+        self.assertFalse(numpy.array_equal(sound.samples, numpy.floor(sound.samples)))
+        self.assert_same_sound(sound, cached)
+
+    def test_dithered_render(self):
+        self.assert_same_sound(*self.render_twice(True, True))
+
+    def test_integer_render(self):
+        self.assert_same_sound(*self.render_twice(False, False))
+
+
+class RenderCacheKeyTest(unittest.TestCase):
+    """Builds keys from byte strings and from unicode strings (as read from JSON manifests)"""
+
+    def make_key(self, convert):
+        """Returns a key with every string parameter passed through convert"""
+
+        return RenderCache().make_key(22050, 2, 1.0, 0, 1, 0, 0, 0, convert(u"cubic"), True, convert(u"square"), 440,
+                                      convert(u"lowpass"), 2000, 1.5, convert(u"cave.wav"), 0.3,
+                                      (convert(u"file"), convert(u"/sounds/caf\xe9.wav"), 12.5), False)
+
+    def test_unicode_strings_share_a_file(self):
+        cache = RenderCache(disk_dir=tempfile.gettempdir())
+        byte_key = self.make_key(lambda string: string.encode("utf-8"))
+        unicode_key = self.make_key(lambda string: string)
+
+        self.assertEqual(unicode_key, byte_key)
+        self.assertEqual(cache.get_file_name(unicode_key), cache.get_file_name(byte_key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Checks that a failed render is never handed out as the final sound.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from renderthread import RenderThread
+
+
+class FakeGenerator:
+    """Stands in for a Generator, rendering the "sound" parameter or raising if it is None"""
+
+    parameters = None
+
+    def apply_parameters(self, parameters):
+        self.parameters = parameters
+
+    def render_sound(self, should_cancel=None):
+        if self.parameters["sound"] is None:
+            raise RuntimeError("render failed")
+
+        return self.parameters["sound"]
+
+
+class RenderThreadFailureTest(unittest.TestCase):
+    """Sends a good request then a failing one"""
+
+    def setUp(self):
+        self.render_thread = RenderThread(FakeGenerator())
+
+    def tearDown(self):
+        self.render_thread.stop()
+
+    def test_failed_render_is_not_final(self):
+        self.render_thread.request({"sound": "first"})
+        self.assertEqual(self.render_thread.get_sound(final=True), "first")
+
+        # Silence the traceback the worker thread prints for the failure
+        stderr = sys.stderr
+        sys.stderr = open(os.devnull, "w")
+        try:
+            self.render_thread.request({"sound": None})
+            final = self.render_thread.get_sound(final=True)
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+
+        self.assertIsNone(final)
+
+        # Previews still fall back on the last good sound
+        self.assertEqual(self.render_thread.get_sound(), "first")
+
+    def test_later_render_clears_failure(self):
+        stderr = sys.stderr
+        sys.stderr = open(os.devnull, "w")
+        try:
+            self.render_thread.request({"sound": None})
+            self.assertIsNone(self.render_thread.get_sound(final=True))
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+
+        self.render_thread.request({"sound": "second"})
+        self.assertEqual(self.render_thread.get_sound(final=True), "second")
+
+
+if __name__ == "__main__":
+    unittest.main()
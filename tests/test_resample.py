@@ -0,0 +1,109 @@
+"""Checks each resampling mode against signals whose resampled values are known.
+
+Usage: python -m unittest discover tests
+"""
+import math
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import effects
+import resample
+
+
+def make_tone(frequency, num_frames, sample_rate=22050):
+    """Returns a one-channel float sine tone"""
+
+    return numpy.sin(numpy.arange(num_frames) * (2 * math.pi * frequency / sample_rate))[:, numpy.newaxis]
+
+
+def get_level(samples, frequency, sample_rate=22050):
+    """Returns the amplitude of one frequency in the first channel of samples"""
+
+    phases = numpy.arange(samples.shape[0]) * (2 * math.pi * frequency / sample_rate)
+
+    return 2 * abs(numpy.dot(samples[:, 0], numpy.exp(-1j * phases))) / samples.shape[0]
+
+
+class ResampleTest(unittest.TestCase):
+    """Resamples ramps, tones and noise by constant and sweeping ratios"""
+
+    def test_unit_ratio_is_unchanged(self):
+        samples = numpy.random.RandomState(0).uniform(-1, 1, (1000, 2))
+
+        for mode in resample.MODES:
+            self.assertTrue(numpy.allclose(resample.resample(samples, 1.0, mode), samples, rtol=0, atol=1e-12), mode)
+
+    def test_polynomial_modes_follow_a_ramp(self):
+        # Linear and cubic interpolation are both exact for a straight line (away from the silent ends)
+        ramp = numpy.arange(1000, dtype=numpy.float64)[:, numpy.newaxis] * 3.0 - 100.0
+        positions = numpy.linspace(1.0, 997.0, 2345)
+
+        for mode in ("linear", "cubic"):
+            output = resample.interpolate(ramp, positions, mode)
+            self.assertTrue(numpy.allclose(output[:, 0], positions * 3.0 - 100.0, rtol=0, atol=1e-9), mode)
+
+    def test_nearest_matches_original_repitch(self):
+        samples = numpy.random.RandomState(1).randint(-32768, 32767, (777, 2)).astype("<h")
+
+        for ratio in (0.5, 1.3, 2.0, 3.7):
+            expected = effects.resample_by_index(samples, effects.frequency_index_map(samples.shape[0], ratio))
+            output = resample.resample(samples, ratio, "nearest")
+            self.assertTrue(numpy.array_equal(output[:expected.shape[0]], expected), ratio)
+
+    def test_lengths(self):
+        samples = numpy.zeros((1000, 1))
+
+        for mode in resample.MODES:
+            self.assertEqual(resample.resample(samples, 2.5, mode).shape, (400, 1))
+            self.assertEqual(resample.resample_sweep(samples, 22050, 1.5, 3.0, mode).shape[0],
+                             resample.sweep_length(1000, 22050, 1.5, 3.0))
+
+    def test_sweep_without_shift_matches_constant(self):
+        samples = numpy.random.RandomState(2).uniform(-1, 1, (3000, 2))
+
+        for mode in resample.MODES:
+            # A constant sinc resample looks its kernels up at SINC_PHASES fractions rather than evaluating them exactly
+            tolerance = 2.0 / resample.SINC_PHASES if mode == "sinc" else 1e-12
+            self.assertTrue(numpy.allclose(resample.resample_sweep(samples, 22050, 1.7, 0.0, mode),
+                                           resample.resample(samples, 1.7, mode), rtol=0, atol=tolerance), mode)
+
+    def test_falling_sweep_stops_at_zero_ratio(self):
+        # The ratio falls from 1 to 0 after half a second, so the sweep reads the first quarter second only
+        self.assertEqual(resample.sweep_length(22050 * 10, 22050, 1.0, -2.0), 11025)
+
+    def test_sinc_filters_aliases(self):
+        # Halving the sample rate: 8 kHz folds down to 3025 Hz unless it is filtered out first
+        tone = make_tone(8000, 44100) + make_tone(1000, 44100)
+
+        sinc = resample.resample(tone, 2.0, "sinc")
+        linear = resample.resample(tone, 2.0, "linear")
+
+        self.assertAlmostEqual(get_level(sinc, 1000, 11025), 1.0, delta=0.01)
+        self.assertLess(get_level(sinc, 3025, 11025), 0.01)
+        self.assertGreater(get_level(linear, 3025, 11025), 0.1)
+
+    def test_chunks_join_seamlessly(self):
+        samples = numpy.random.RandomState(3).uniform(-1, 1, (3 * resample.CHUNK_FRAMES, 2))
+        positions = numpy.arange(2 * resample.CHUNK_FRAMES + 77) * 1.3
+        cutoffs = numpy.linspace(0.5, 1.0, positions.shape[0])
+
+        for mode in resample.MODES:
+            chunked = resample.interpolate(samples, positions, mode, cutoffs)
+
+            # Chunks of a different size must give the same frames
+            rechunked = numpy.concatenate([resample.interpolate_chunk(samples, positions[start:start + 1000], mode,
+                                                                      cutoffs[start:start + 1000])
+                                           for start in xrange(0, positions.shape[0], 1000)])
+            self.assertTrue(numpy.allclose(chunked, rechunked, rtol=0, atol=1e-12), mode)
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, resample.resample, numpy.zeros((10, 1)), 2.0, "quadratic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Checks that a sequence mixes each voice's Generator render at its onset, with its envelope, volume and pan.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import effects
+import envelope
+from generator import Generator
+from sequencer import Sequencer
+
+
+def render_parameters(parameters):
+    """Returns the float samples a fresh Generator renders for some parameters (on top of the sequencer defaults)"""
+
+    generator = Generator(22050, -16, 2, 4096)
+    generator.apply_parameters(dict(Sequencer.DEFAULT_PARAMETERS, **parameters))
+
+    return generator.render_sound().samples.astype(numpy.float32)
+
+
+class SequencerTest(unittest.TestCase):
+    """Renders short sequences of presets"""
+
+    def test_voices_are_mixed_at_their_onsets(self):
+        sequencer = Sequencer()
+        sequencer.add_voice(0.0, "pickup")
+        sequencer.add_voice(0.5, "jump", volume=-6, pan=-1.0)
+        mix = sequencer.render().samples
+
+        pickup = render_parameters(Generator.PRESETS["pickup"])
+        jump = render_parameters(Generator.PRESETS["jump"])
+        self.assertEqual(mix.shape[0], max(pickup.shape[0], 11025 + jump.shape[0]))
+
+        expected = numpy.zeros(mix.shape)
+        expected[:pickup.shape[0]] += pickup
+        expected[11025:11025 + jump.shape[0]] += jump * effects.pan_gains(2, -6, -1.0)
+        self.assertTrue(numpy.allclose(mix, expected, rtol=1e-6, atol=1e-2))
+
+    def test_envelope(self):
+        sequencer = Sequencer()
+        sequencer.add_voice(0.25, "laser", attack=0.05, release=0.1)
+        mix = sequencer.render().samples
+
+        samples = render_parameters(Generator.PRESETS["laser"])
+        envelope.apply(samples, envelope.adsr(samples.shape[0], 22050, 0.05, release=0.1))
+
+        self.assertEqual(numpy.count_nonzero(mix[:5512]), 0)
+        self.assertTrue(numpy.allclose(mix[5512:], samples, rtol=1e-6, atol=1e-2))
+        self.assertAlmostEqual(sequencer.get_length(), 0.25 + samples.shape[0] / 22050.0)
+
+    def test_identical_voices_render_once(self):
+        sequencer = Sequencer()
+        for onset in (0.0, 0.1, 0.2):
+            sequencer.add_voice(onset, "pickup", volume=-onset * 10, pan=onset)
+        sequencer.add_voice(0.3, "pickup", echoes=2)
+        sequencer.render()
+
+        # Volume and pan are applied when mixing, so only the echoes make a second render
+        self.assertEqual(len(sequencer.renders), 2)
+
+    def test_unknown_parameter(self):
+        self.assertRaises(ValueError, Sequencer().add_voice, 0.0, "pickup", loudness=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Checks that sounds come back from a sound bank, and WAV files from the WAV reader, exactly as they were stored.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import soundbank
+import wavfile
+from dynsound import DynSound
+
+
+# Formats that take every value of 16-bit samples, and one that doesn't
+FORMATS = ("int16", "int24", "float32", "uint8")
+
+
+def make_sound(num_frames, seed, floating=False):
+    """Returns a stereo sound of a smooth random walk, touching both ends of the 16-bit range"""
+
+    steps = numpy.random.RandomState(seed).randint(-300, 300, (num_frames, 2))
+    samples = numpy.clip(numpy.cumsum(steps, axis=0), -32768, 32767)
+    samples[:2] = [[-32768, 32767], [32767, -32768]]
+
+    sound = DynSound(num_frames=1, floating=floating)
+    sound.set_samples(samples.astype(numpy.float32 if floating else "<h"))
+
+    return sound
+
+
+class SoundBankTest(unittest.TestCase):
+    """Writes small banks into a temporary folder"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "sounds.bank")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        sounds = [("walk", make_sound(3000, 0)), ("short", make_sound(5, 1)), ("float", make_sound(2000, 2, True)),
+                  ("empty", DynSound(num_frames=0))]
+
+        for sample_format in FORMATS:
+            for compression in soundbank.COMPRESSIONS:
+                soundbank.write_bank(self.file_name, sounds, sample_format, compression, threads=2)
+                bank = soundbank.SoundBank(self.file_name)
+                self.assertEqual(bank.names(), [name for name, sound in sounds])
+
+                for name, sound in sounds:
+                    expected = wavfile.convert(sound.samples, sample_format)
+                    samples, entry = bank.read_samples(name)
+
+                    self.assertEqual((entry.sample_format, entry.compression), (sample_format, compression))
+                    self.assertTrue(numpy.array_equal(samples.reshape(expected.shape), expected),
+                                    (sample_format, compression, name))
+
+    def test_load_converts_to_the_mixer_format(self):
+        sound = make_sound(3000, 4)
+
+        for sample_format in ("int16", "int24", "float32"):
+            soundbank.write_bank(self.file_name, [("walk", sound)], sample_format, "delta", threads=1)
+            bank = soundbank.SoundBank(self.file_name)
+
+            self.assertTrue(numpy.array_equal(bank.load("walk").samples, sound.samples), sample_format)
+
+            floating = bank.load("walk", floating=True)
+            self.assertEqual(floating.samples.dtype, numpy.float32)
+            self.assertTrue(numpy.array_equal(floating.samples, sound.samples), sample_format)
+
+            self.assertEqual(bank.load("walk", num_channels=1, sample_rate=11025).samples.shape, (1500, 1))
+
+    def test_pack_wavs_keeps_each_format(self):
+        sound = make_sound(1000, 5)
+        wav_files = []
+        for sample_format in FORMATS:
+            wav_file = os.path.join(self.directory, sample_format + ".wav")
+            wavfile.write_wav(wav_file, sound.samples, 11025 * len(wav_files) + 11025, sample_format)
+            wav_files.append((sample_format, wav_file))
+
+        for compression in soundbank.COMPRESSIONS:
+            soundbank.pack_wavs(self.file_name, wav_files, compression)
+            bank = soundbank.SoundBank(self.file_name)
+
+            for name, wav_file in wav_files:
+                expected, sample_rate, sample_format = wavfile.read_wav(wav_file)
+                samples, entry = bank.read_samples(name)
+
+                self.assertEqual((entry.sample_rate, entry.sample_format), (sample_rate, sample_format))
+                self.assertTrue(numpy.array_equal(samples, expected), (compression, name))
+
+    def test_delta_packs_smooth_sounds_smaller(self):
+        sizes = {}
+        for compression in soundbank.COMPRESSIONS:
+            soundbank.write_bank(self.file_name, [("walk", make_sound(20000, 6))], "int16", compression)
+            sizes[compression] = soundbank.SoundBank(self.file_name).entries["walk"].stored_size
+
+        self.assertEqual(sizes["none"], 20000 * 2 * 2)
+        self.assertLess(sizes["delta"], sizes["zlib"])
+
+    def test_bad_files_and_names(self):
+        soundbank.write_bank(self.file_name, [("walk", make_sound(10, 7))])
+
+        self.assertRaises(KeyError, soundbank.SoundBank(self.file_name).read_samples, "run")
+        self.assertRaises(ValueError, soundbank.write_bank, self.file_name, [], "int12")
+        self.assertRaises(ValueError, soundbank.write_bank, self.file_name, [("walk", make_sound(10, 7))], "int16",
+                          "lzma")
+
+        wav_file = os.path.join(self.directory, "walk.wav")
+        wavfile.write_wav(wav_file, make_sound(10, 7).samples, 22050)
+        self.assertRaises(ValueError, soundbank.SoundBank, wav_file)
+
+
+class WavReaderTest(unittest.TestCase):
+    """Writes WAV files in each format and maps them back"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_formats(self):
+        sound = make_sound(1000, 8)
+
+        for sample_format in FORMATS + ("int32",):
+            file_name = os.path.join(self.directory, sample_format + ".wav")
+            wavfile.write_wav(file_name, sound.samples, 44100, sample_format)
+            samples, sample_rate, read_format = wavfile.read_wav(file_name)
+
+            expected = wavfile.convert(sound.samples, sample_format)
+            self.assertEqual((sample_rate, read_format), (44100, sample_format))
+            self.assertTrue(numpy.array_equal(samples.reshape(expected.shape), expected), sample_format)
+
+            # Copy on write: changing the samples leaves the file alone
+            samples[0] = 0
+            self.assertTrue(numpy.array_equal(wavfile.read_wav(file_name)[0].reshape(expected.shape), expected))
+
+    def test_normalise(self):
+        sound = make_sound(1000, 9)
+        expected = sound.samples / 32768.0
+
+        for sample_format in ("int16", "int24", "float32"):
+            file_name = os.path.join(self.directory, sample_format + ".wav")
+            wavfile.write_wav(file_name, sound.samples, 22050, sample_format)
+            samples, sample_rate, sample_format = wavfile.read_wav(file_name)
+
+            self.assertTrue(numpy.allclose(wavfile.normalise(samples, sample_format), expected, rtol=0, atol=1e-6),
+                            sample_format)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Checks the sample sources, and that FileCache decodes each file once and keeps the decoded copy safe.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import oscillator
+import sources
+import wavfile
+
+
+class SourceTest(unittest.TestCase):
+    """Renders wave and noise sources"""
+
+    def test_wave_source(self):
+        source = sources.WaveSource("square", 441)
+        sound = source.render(1000, 22050, 2)
+
+        samples = numpy.zeros((1000, 2), dtype="<h")
+        oscillator.fill(samples, "square", 441, 22050, sound.sample_min, sound.sample_max)
+        self.assertTrue(numpy.array_equal(sound.samples, samples))
+
+        self.assertEqual(source.get_key(), sources.WaveSource("square", 441.0).get_key())
+        self.assertNotEqual(source.get_key(), sources.WaveSource("square", 441, band_limited=True).get_key())
+        self.assertNotEqual(source.get_key(), sources.WaveSource("saw", 441).get_key())
+
+    def test_noise_is_repeatable(self):
+        for colour in sources.NOISE_COLOURS:
+            first = sources.NoiseSource(colour, 3).render(4000, 22050, 2).samples
+            again = sources.NoiseSource(colour, 3).render(4000, 22050, 2).samples
+            other = sources.NoiseSource(colour, 4).render(4000, 22050, 2).samples
+
+            self.assertTrue(numpy.array_equal(first, again), colour)
+            self.assertFalse(numpy.array_equal(first, other), colour)
+            self.assertFalse(numpy.array_equal(first[:, 0], first[:, 1]), colour)
+
+    def test_coloured_noise_peaks_at_full_scale(self):
+        for colour in ("pink", "brown"):
+            samples = sources.NoiseSource(colour).render(4000, 22050, 1, floating=True).samples
+
+            self.assertEqual(samples.dtype, numpy.float32)
+            self.assertTrue(samples.min() >= -32768 and samples.max() <= 32767, colour)
+            self.assertTrue(samples.min() == -32768 or samples.max() == 32767, colour)
+
+    def test_unknown_noise_colour(self):
+        self.assertRaises(ValueError, sources.NoiseSource, "blue")
+
+
+class FileSourceTest(unittest.TestCase):
+    """Decodes temporary WAV files through private caches"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.samples = numpy.random.RandomState(0).randint(-32768, 32767, (1000, 2)).astype("<h")
+        self.file_name = os.path.join(self.directory, "noise.wav")
+        wavfile.write_wav(self.file_name, self.samples, 22050)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_second_load_is_a_hit(self):
+        cache = sources.FileCache()
+        first = cache.load(self.file_name, 22050, 2)
+        second = cache.load(self.file_name, 22050, 2)
+
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        self.assertTrue(numpy.array_equal(first.samples, self.samples))
+        self.assertTrue(numpy.array_equal(second.samples, self.samples))
+
+    def test_changing_a_load_leaves_the_cache_alone(self):
+        cache = sources.FileCache()
+        cache.load(self.file_name, 22050, 2).get_writable_samples()[...] = 0
+
+        self.assertTrue(numpy.array_equal(cache.load(self.file_name, 22050, 2).samples, self.samples))
+
+    def test_edited_file_is_decoded_again(self):
+        cache = sources.FileCache()
+        cache.load(self.file_name, 22050, 2)
+
+        wavfile.write_wav(self.file_name, self.samples[::-1], 22050)
+        modified = os.path.getmtime(self.file_name) + 10
+        os.utime(self.file_name, (modified, modified))
+
+        self.assertTrue(numpy.array_equal(cache.load(self.file_name, 22050, 2).samples, self.samples[::-1]))
+        self.assertEqual((cache.misses, cache.hits), (2, 0))
+
+    def test_each_format_is_decoded_separately(self):
+        cache = sources.FileCache()
+        mono = cache.load(self.file_name, 22050, 1)
+        floating = cache.load(self.file_name, 22050, 2, floating=True)
+        half_rate = cache.load(self.file_name, 11025, 2)
+
+        self.assertEqual((cache.misses, cache.hits), (3, 0))
+        self.assertEqual(mono.samples.shape, (1000, 1))
+        self.assertEqual(floating.samples.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal(floating.samples, self.samples))
+        self.assertEqual(half_rate.samples.shape, (500, 2))
+
+    def test_eviction_keeps_the_newest(self):
+        other_name = os.path.join(self.directory, "other.wav")
+        wavfile.write_wav(other_name, self.samples[:500], 22050)
+
+        # Room for one decoded file only
+        cache = sources.FileCache(memory_budget=self.samples.nbytes)
+        cache.load(self.file_name, 22050, 2)
+        cache.load(other_name, 22050, 2)
+
+        self.assertEqual(len(cache.entries), 1)
+        self.assertEqual(cache.memory_used, self.samples.nbytes / 2)
+        cache.load(other_name, 22050, 2)
+        self.assertEqual((cache.misses, cache.hits), (2, 1))
+
+    def test_render_cuts_or_pads(self):
+        source = sources.FileSource(self.file_name, sources.FileCache())
+
+        self.assertTrue(numpy.array_equal(source.render(None, 22050, 2).samples, self.samples))
+        self.assertTrue(numpy.array_equal(source.render(300, 22050, 2).samples, self.samples[:300]))
+
+        padded = source.render(1500, 22050, 2).samples
+        self.assertTrue(numpy.array_equal(padded[:1000], self.samples))
+        self.assertEqual(numpy.count_nonzero(padded[1000:]), 0)
+
+    def test_key_follows_the_file(self):
+        source = sources.FileSource(self.file_name)
+        key = source.get_key()
+
+        modified = os.path.getmtime(self.file_name) + 10
+        os.utime(self.file_name, (modified, modified))
+        self.assertNotEqual(source.get_key(), key)
+
+    def test_make_source(self):
+        self.assertIsInstance(sources.make_source("oscillator", "saw", 220), sources.WaveSource)
+        self.assertEqual(sources.make_source("pink_noise", seed=5).get_key(), ("noise", "pink", 5))
+        self.assertIsInstance(sources.make_source(self.file_name), sources.FileSource)
+        self.assertRaises(ValueError, sources.make_source, os.path.join(self.directory, "missing.wav"))
+
+
+if __name__ == "__main__":
+    unittest.main()
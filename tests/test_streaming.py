@@ -0,0 +1,69 @@
+"""Checks that streamed sounds only lose precision where the rendered sounds do.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import envelope
+import streaming
+
+
+def stream(floating):
+    """Streams a loud square wave through a low-pass filter, and returns every block"""
+
+    engine = streaming.create_engine(22050, 2, 1024, 0.5, 20, 1, 0, 0, 0, "square", 440, filter_type="lowpass",
+                                     filter_frequency=100, floating=floating)
+
+    return numpy.concatenate(list(engine.blocks()))
+
+
+class StreamingClipTest(unittest.TestCase):
+    """Compares a floating stream with one that clips at every stage"""
+
+    def test_gain_stage_clips_only_with_limits(self):
+        block = numpy.array([-20000.0, 10.0, 20000.0])
+
+        streaming.GainStage(6, -numpy.inf, numpy.inf).process(block)
+        self.assertGreater(block.max(), 32767)
+
+        streaming.GainStage(0, -32768, 32767).process(block)
+        self.assertEqual(block.max(), 32767)
+
+    def test_floating_stream_clips_only_at_output(self):
+        floating = stream(True)
+        clipped = stream(False)
+
+        # Clipping the 20 dB gain squashes the square wave to full scale before the filter; the floating stream filters
+        # the full wave and only clips the result
+        self.assertGreater(numpy.abs(floating.astype(numpy.int64)).max(), 2 * numpy.abs(clipped.astype(numpy.int64)).max())
+        self.assertLessEqual(floating.max(), 32767)
+        self.assertGreaterEqual(floating.min(), -32768)
+
+
+class GateStageTest(unittest.TestCase):
+    """Gates a stream of ones in uneven blocks and compares it with the whole gate"""
+
+    def test_blocks_match_whole_gate(self):
+        for rate in (3, 10, 1000, 7.5):
+            expected = envelope.gate(30000, 22050, rate)
+
+            for block_size in (1, 333, 4096):
+                stage = streaming.GateStage(22050, rate)
+                blocks = [numpy.ones(min(block_size, 30000 - start)) for start in xrange(0, 30000, block_size)]
+                for block in blocks:
+                    stage.process(block)
+
+                self.assertTrue(numpy.array_equal(numpy.concatenate(blocks), expected), (rate, block_size))
+
+    def test_crossfade_needs_whole_gate(self):
+        self.assertRaises(ValueError, envelope.gate, 100, 22050, 10, 0.5, 0.01, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Checks timeline mixing against the same mix worked out directly.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import effects
+from dynsound import DynSound
+from timeline import Timeline
+
+
+def make_sound(num_frames, num_channels, seed):
+    """Returns a float sound of random samples"""
+
+    sound = DynSound(num_frames=1, num_channels=num_channels, floating=True)
+    sound.set_samples(numpy.random.RandomState(seed).uniform(-8000, 8000, (num_frames, num_channels)).astype(numpy.float32))
+
+    return sound
+
+
+class TimelineTest(unittest.TestCase):
+    """Mixes random sounds into short timelines"""
+
+    def test_mix_matches_direct_sum(self):
+        # Longer than a chunk, overlapping, and running off both ends of the timeline
+        sounds = [make_sound(3 * Timeline.CHUNK_FRAMES + 5, 2, 0), make_sound(5000, 1, 1), make_sound(9000, 2, 2)]
+        placements = [(0.1, -3.0, 0.0), (-0.1, 2.0, -0.5), (0.9, 0.0, 1.0)]
+
+        timeline = Timeline(1.0)
+        expected = numpy.zeros((22050, 2))
+
+        for sound, (start, volume, pan) in zip(sounds, placements):
+            timeline.add(sound, start, volume, pan)
+
+            start_frame = int(start * 22050)
+            first = max(0, -start_frame)
+            end_frame = min(22050, start_frame + sound.samples.shape[0])
+            expected[start_frame + first:end_frame] += (sound.samples[first:end_frame - start_frame] *
+                                                        effects.pan_gains(2, volume, pan))
+
+        self.assertTrue(numpy.allclose(timeline.buffer, expected, rtol=1e-6, atol=1e-2))
+
+    def test_pan(self):
+        sound = make_sound(100, 1, 3)
+
+        for pan, gains in ((-1.0, (1.0, 0.0)), (0.0, (1.0, 1.0)), (0.5, (0.5, 1.0)), (1.0, (0.0, 1.0))):
+            timeline = Timeline(0, num_frames=100)
+            timeline.add(sound, pan=pan)
+            self.assertTrue(numpy.allclose(timeline.buffer, sound.samples * gains), pan)
+
+    def test_section_of_source(self):
+        sound = make_sound(22050, 2, 4)
+        timeline = Timeline(1.0)
+        timeline.add(sound, start=0.5, source_start=0.25, length=0.1)
+
+        self.assertTrue(numpy.array_equal(timeline.buffer[11025:11025 + 2205], sound.samples[5512:5512 + 2205]))
+        self.assertEqual(numpy.count_nonzero(timeline.buffer[:11025]), 0)
+        self.assertEqual(numpy.count_nonzero(timeline.buffer[11025 + 2205:]), 0)
+
+    def test_saturate_clips_each_add(self):
+        loud = make_sound(1000, 2, 5)
+        loud.samples *= 10
+
+        timeline = Timeline(0, num_frames=1000, saturate=True)
+        timeline.add(loud)
+        timeline.add(loud)
+
+        self.assertLessEqual(timeline.buffer.max(), 32767)
+        self.assertGreaterEqual(timeline.buffer.min(), -32768)
+
+    def test_soft_limit(self):
+        timeline = Timeline(0, num_frames=5)
+        timeline.buffer[:, 0] = [0, 20000, 30000, 40000, 1e9]
+        timeline.buffer[:, 1] = -timeline.buffer[:, 0]
+
+        limited = timeline.get_sound(limit=True, threshold=0.8).samples
+
+        # Below the knee is untouched; above it the level is squashed, stays in order and never passes full scale
+        self.assertTrue(numpy.array_equal(limited[:2], timeline.buffer[:2]))
+        self.assertTrue(30000 > limited[2, 0] > 0.8 * 32767)
+        self.assertTrue(32767 >= limited[4, 0] > limited[3, 0] > limited[2, 0])
+        self.assertTrue(numpy.array_equal(limited[:, 1], -limited[:, 0]))
+
+    def test_sound_is_kept_when_mixing_on(self):
+        timeline = Timeline(0, num_frames=1000)
+        timeline.add(make_sound(1000, 2, 6))
+
+        sound = timeline.get_sound()
+        before = sound.samples.copy()
+        timeline.add(make_sound(1000, 2, 7))
+
+        self.assertTrue(numpy.array_equal(sound.samples, before))
+        self.assertFalse(numpy.array_equal(timeline.buffer, before))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Checks that batched variant renders come out exactly as Generator.render_sound renders each variant alone.
+
+Usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import resample
+from generator import Generator
+
+
+# Mixed waveforms, lengths, shifts, plops and echoes; two variants share a voice and differ only in their echoes
+PARAMETER_SETS = [
+    {"waveform": "sine", "pitch": 440, "length": 0.3},
+    {"waveform": "square", "pitch": 523.25, "length": 0.2, "frequency": 2, "echoes": 1},
+    {"waveform": "saw", "pitch": 220, "length": 0.25, "frequency": 0.5, "frequency_shift": 3, "plops": 28},
+    {"waveform": "triangle", "pitch": 97.3, "length": 0.15, "frequency_shift": -0.2, "volume": -6, "echoes": 2},
+    {"waveform": "saw", "pitch": 220, "length": 0.25, "frequency": 0.5, "frequency_shift": 3, "plops": 28, "echoes": 3},
+    {"waveform": "square", "pitch": 880, "length": 0.1, "frequency": 1.7, "plops": 7.5, "filter": "lowpass"},
+]
+
+
+def make_generator(mode, floating=True):
+    """Returns a generator resampling in a mode"""
+
+    generator = Generator(22050, -16, 2, 4096, floating=floating)
+    generator.resample_mode = mode
+
+    return generator
+
+
+class VariantTest(unittest.TestCase):
+    """Renders small batches of variants"""
+
+    def assert_matches_single_renders(self, generator, parameter_sets):
+        """Checks batched renders against rendering each set alone with a fresh generator"""
+
+        sounds = generator.render_variants(parameter_sets)
+        self.assertEqual(len(sounds), len(parameter_sets))
+
+        for parameters, sound in zip(parameter_sets, sounds):
+            single = make_generator(generator.resample_mode, generator.floating)
+            single.apply_parameters(parameters)
+            expected = single.render_sound()
+
+            self.assertEqual(sound.samples.dtype, expected.samples.dtype, parameters)
+            self.assertTrue(numpy.array_equal(sound.samples, expected.samples), (generator.resample_mode, parameters))
+
+    def test_batch_matches_render_sound(self):
+        for mode in resample.MODES:
+            self.assert_matches_single_renders(make_generator(mode), PARAMETER_SETS)
+
+    def test_unbatchable_variants_render_alone(self):
+        self.assert_matches_single_renders(make_generator("linear"), [{"source": "pink_noise", "length": 0.2},
+                                                                      {"source": "white_noise", "echoes": 1},
+                                                                      {"waveform": "saw", "length": 0.2}])
+        self.assert_matches_single_renders(make_generator("nearest", floating=False), PARAMETER_SETS[:3])
+
+    def test_variants_are_cached(self):
+        generator = make_generator("nearest")
+        base_parameters = generator.get_parameters()
+        sounds = generator.render_variants(PARAMETER_SETS)
+
+        for parameters, sound in zip(PARAMETER_SETS, sounds):
+            generator.apply_parameters(base_parameters)
+            generator.apply_parameters(parameters)
+            self.assertIs(generator.render_cache.get(generator.get_render_key()), sound)
+
+        generator.apply_parameters(base_parameters)
+        hits = generator.render_cache.hits
+        again = generator.render_variants(PARAMETER_SETS)
+        self.assertEqual(generator.render_cache.hits, hits + len(PARAMETER_SETS))
+        self.assertTrue(all(sound is other for sound, other in zip(sounds, again)))
+
+    def test_generator_parameters_are_kept(self):
+        generator = make_generator("cubic")
+        generator.apply_parameters({"waveform": "triangle", "echoes": 2})
+        parameters = generator.get_parameters()
+
+        generator.render_variants(PARAMETER_SETS)
+        self.assertEqual(generator.get_parameters(), parameters)
+
+
+if __name__ == "__main__":
+    unittest.main()
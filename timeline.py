@@ -0,0 +1,140 @@
+import numpy
+
+import effects
+from dynsound import DynSound
+
+
+class Timeline:
+    """
+    A preallocated buffer that many sounds are mixed into in place, e.g. to lay out a whole soundscape. Each source is
+    added in one pass with its own volume and stereo position; no intermediate sounds are created.
+
+    The buffer holds float32 samples on the scale of data_type, so quiet sources keep their precision and loud mixes
+    can be brought back into range with the soft limiter when the mix is finished.
+
+    Attributes:
+        buffer (numpy.ndarray): The mix (frames x channels). Read-only while it is shared with a sound from get_sound
+        scratch (numpy.ndarray): Work buffer used while mixing
+        num_channels (int): Number of channels
+        sample_rate (int): Sample rate
+        data_type (string): Type of the samples of sounds made from the mix
+        sample_min (int): Lowest sample value
+        sample_max (int): Highest sample value
+        saturate (bool): Whether each add clips the mix to the sample range, like DynSound.mix
+    """
+
+    CHUNK_FRAMES = 4096
+
+    buffer = None
+    scratch = None
+    num_channels = 2
+    sample_rate = 22050
+    data_type = "<h"
+    sample_min = -32768
+    sample_max = 32767
+    saturate = False
+
+    def __init__(self, length, num_channels=2, sample_rate=22050, data_type="<h", saturate=False, num_frames=None):
+        """
+        Creates a silent timeline.
+
+        Args:
+            length (float): Length of the timeline, in seconds
+            num_channels (int): Number of channels
+            sample_rate (int): Sample rate
+            data_type (string): Type of the samples of sounds made from the mix
+            saturate (bool): Whether each add clips the mix to the sample range
+            num_frames (int): Exact length of the timeline in frames, overriding length
+        """
+
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.data_type = data_type
+        self.saturate = saturate
+
+        # Take the sample range from a sound of the same format
+        format_sound = DynSound(num_frames=0, num_channels=num_channels, sample_rate=sample_rate, data_type=data_type)
+        self.sample_min = format_sound.sample_min
+        self.sample_max = format_sound.sample_max
+
+        if num_frames is None:
+            num_frames = int(length * sample_rate)
+
+        self.buffer = numpy.zeros((num_frames, num_channels), dtype=numpy.float32)
+        self.scratch = numpy.empty((self.CHUNK_FRAMES, num_channels), dtype=numpy.float32)
+
+    def add(self, source, start=0.0, volume=0.0, pan=0.0, source_start=0.0, length=-1):
+        """
+        Mixes a sound into the timeline. Any part of the sound that falls outside the timeline is left out.
+
+        Args:
+            source (DynSound): Sound to mix in. It must have the timeline's sample rate, and either the timeline's
+                               number of channels or one channel
+            start (float in seconds): Time, in the timeline, to start the sound at
+            volume (float): Decibels to change the sound's volume by
+            pan (float): Stereo position, from -1 (left) through 0 (centre) to 1 (right)
+            source_start (float in seconds): Time, in the sound, to start from
+            length (float in seconds): Length of the section to mix in. -1 will use the rest of the sound
+        """
+
+        source_start_frame = int(source_start * self.sample_rate)
+        num_frames = source.samples.shape[0] - source_start_frame if length == -1 else int(length * self.sample_rate)
+
+        self.add_samples(source.samples[source_start_frame:source_start_frame + num_frames], int(start * self.sample_rate),
+                         volume, pan)
+
+    def add_samples(self, samples, start_frame, volume=0.0, pan=0.0):
+        """
+        Mixes a block of samples into the timeline.
+
+        Args:
+            samples (numpy.ndarray): Samples (frames x channels) to mix in, on the scale of data_type
+            start_frame (int): Frame, in the timeline, to start at. May be negative
+            volume (float): Decibels to change the volume by
+            pan (float): Stereo position, from -1 (left) through 0 (centre) to 1 (right)
+        """
+
+        # Clip the source to the part that overlaps the timeline
+        first = max(0, -start_frame)
+        end_frame = min(self.buffer.shape[0], start_frame + samples.shape[0])
+        if end_frame <= start_frame + first:
+            return
+
+        if not self.buffer.flags.writeable:
+            # A sound made from the mix is still using the buffer
+            self.buffer = self.buffer.copy()
+
+        effects.mix_into(self.buffer[start_frame + first:end_frame], samples[first:end_frame - start_frame],
+                         effects.pan_gains(self.num_channels, volume, pan), self.sample_min, self.sample_max,
+                         self.scratch, self.saturate)
+
+    def clear(self):
+        """Silences the whole timeline"""
+
+        if self.buffer.flags.writeable:
+            self.buffer[...] = 0.0
+        else:
+            self.buffer = numpy.zeros_like(self.buffer)
+
+    def get_sound(self, limit=False, threshold=0.8):
+        """
+        Makes a sound from the mix. Without the limiter, the sound shares the timeline's buffer until either changes.
+
+        Args:
+            limit (bool): Whether to run the mix through the soft limiter (see effects.soft_limit)
+            threshold (float): Level the limiter starts at, as a fraction of full scale
+        Returns:
+            (DynSound) The mix, as a float sound that is quantised when played or saved
+        """
+
+        sound = DynSound(num_frames=0, num_channels=self.num_channels, sample_rate=self.sample_rate,
+                         data_type=self.data_type, floating=True)
+
+        if limit:
+            sound.samples = self.buffer.copy()
+            effects.soft_limit(sound.samples, self.sample_max, threshold)
+        else:
+            self.buffer.flags.writeable = False
+            sound.samples = self.buffer
+
+        return sound
@@ -2,6 +2,7 @@ import Tkinter
 import numpy
 
 from generator import Generator
+from waveview import WaveView
 
 
 class UI:
@@ -32,6 +33,8 @@ class UI:
         jump_preset_button (Tkinter.Button): Button to set sliders to jump sound preset.
         pickup_preset_button (Tkinter.Button): Button to set sliders to pickup sound preset.
         laser_preset_button (Tkinter.Button): Button to set sliders to laser sound preset.
+
+        wave_view (WaveView): Panel showing the waveform and spectrogram of the current sound.
     """
 
     main_screen = None
@@ -61,6 +64,8 @@ class UI:
     pickup_preset_button = None
     laser_preset_button = None
 
+    wave_view = None
+
     def __init__(self):
         """Initialises and sets up the user interface"""
 
@@ -126,37 +131,41 @@ class UI:
         self.echo_slider.set(0)
         self.echo_slider.grid(row=8, columnspan=4)
 
+        # Waveform and spectrogram of the current sound
+        self.wave_view = WaveView(self.main_screen)
+        self.wave_view.canvas.grid(row=9, columnspan=4)
+
     def death_preset(self):
         """Sets sliders to presets for death sound."""
 
-        self.frequency_slider.set(2)
-        self.frequency_shift_slider.set(0)
-        self.plop_slider.set(4)
-        self.echo_slider.set(4)
+        self.apply_preset(Generator.PRESETS["death"])
 
     def pickup_preset(self):
         """Sets sliders to presets for pickup sound."""
 
-        self.frequency_slider.set(3)
-        self.frequency_shift_slider.set(3)
-        self.plop_slider.set(28)
-        self.echo_slider.set(0)
+        self.apply_preset(Generator.PRESETS["pickup"])
 
     def jump_preset(self):
         """Sets sliders to presets for jump sound."""
 
-        self.frequency_slider.set(2)
-        self.frequency_shift_slider.set(3)
-        self.plop_slider.set(0)
-        self.echo_slider.set(0)
+        self.apply_preset(Generator.PRESETS["jump"])
 
     def laser_preset(self):
         """Sets sliders to presets for laser sound."""
 
-        self.frequency_slider.set(2.5)
-        self.frequency_shift_slider.set(2)
-        self.plop_slider.set(80)
-        self.echo_slider.set(0)
+        self.apply_preset(Generator.PRESETS["laser"])
+
+    def apply_preset(self, preset):
+        """Sets sliders to a preset's parameters
+
+        Args:
+            preset (dict): Preset parameters from Generator.PRESETS
+        """
+
+        self.frequency_slider.set(preset["frequency"])
+        self.frequency_shift_slider.set(preset["frequency_shift"])
+        self.plop_slider.set(preset["plops"])
+        self.echo_slider.set(preset["echoes"])
 
     def change_slider_colour(self, slider, (red, green, blue)):
         """Changes the colour of a slider by a red, green and blue value
@@ -0,0 +1,544 @@
+"""Batched rendering of many variants of a sound, e.g. 64 pitch and echo variants of a pickup.
+
+The variants are rendered together as 2-D (variants x frames) arrays: the oscillator, volume, frequency, plop and echo
+stages each run once for the whole batch, broadcasting every variant's parameters down the variant axis, instead of
+once per variant with its own arrays. The oscillator and volume stages are also fused into the repitch: the wave is
+only evaluated at the frames the repitch reads, rather than rendered in full and then mostly skipped (a pickup plays
+its base wave up to twelve times faster). Every variant comes out the same as a single render by
+Generator.render_sound (the same arithmetic in the same order), and finished variants are put in the generator's
+render cache.
+
+    sounds = generator.render_variants([{"pitch": 440 * 2 ** (i / 12.0), "echoes": i % 3} for i in xrange(64)])
+
+Only float generators rendering a periodic oscillator waveform are batched. Variants that can't be batched (file and
+noise sources, the noise waveform, 16-bit generators) are rendered one at a time through the generator, so any
+parameter sets can be given.
+"""
+import math
+
+import numpy
+
+import effects
+import envelope
+import oscillator
+import resample
+from dynsound import DynSound
+
+
+# Most samples (variants x frames) rendered in one batch. Longer batches are split, shortest variants first
+BATCH_SAMPLES = 1 << 22
+
+# Parameters that shape a variant before its echoes. Variants that share all of them are rendered as one voice
+VOICE_PARAMETERS = ("length", "volume", "frequency", "frequency_shift", "plops", "waveform", "pitch")
+
+# Longest variant in a batch, relative to the shortest. Longer variants start a new batch, so little of each batch is
+# padding
+MAX_LENGTH_RATIO = 2
+
+
+class Variant:
+    """
+    One variant in a batch.
+
+    Attributes:
+        index (int): Position of the variant in the list of parameter sets
+        parameters (dict): Every sound parameter of the variant (see Generator.PARAMETERS)
+        key (tuple): Render cache key of the variant
+        num_frames (int): Length of the base wave, in frames
+        width (int): Frames the variant takes up in the batch's arrays before its echoes: the longer of its base wave
+                     and its repitched wave
+    """
+
+    index = 0
+    parameters = None
+    key = None
+    num_frames = 0
+    width = 0
+
+    def __init__(self, index, parameters, key, num_frames, width):
+        """
+        Creates a variant.
+
+        Args:
+            index (int): Position of the variant in the list of parameter sets
+            parameters (dict): Every sound parameter of the variant
+            key (tuple): Render cache key of the variant
+            num_frames (int): Length of the base wave, in frames
+            width (int): Frames the variant takes up in the batch's arrays
+        """
+
+        self.index = index
+        self.parameters = parameters
+        self.key = key
+        self.num_frames = num_frames
+        self.width = width
+
+
+def render_variants(generator, parameter_sets):
+    """
+    Renders many variants of a sound.
+
+    Args:
+        generator (Generator): Generator to render with. Its parameters are left as they were
+        parameter_sets (list): Parameters of each variant (dicts, see Generator.PARAMETERS). Parameters a set doesn't
+                               include keep the generator's current values
+    Returns:
+        (list) The rendered sounds (DynSound), in the same order. They may be shared with the render cache, so copy
+               them before editing
+    """
+
+    sounds = [None] * len(parameter_sets)
+    batch = []
+
+    saved_parameters = generator.get_parameters()
+    saved_valid = generator.sound_valid
+
+    try:
+        for index, parameters in enumerate(parameter_sets):
+            generator.apply_parameters(saved_parameters)
+            generator.apply_parameters(parameters)
+
+            key = generator.get_render_key()
+            sounds[index] = generator.render_cache.get(key)
+
+            if sounds[index] is not None:
+                continue
+
+            if generator.floating and generator.source == "oscillator" and generator.waveform != "noise":
+                num_frames = int(generator.frequency * generator.sound_length * generator.mixer_sample_rate)
+                new_length = repitched_lengths(numpy.array([num_frames]), numpy.array([float(generator.frequency)]),
+                                               numpy.array([generator.frequency_shift]), generator.mixer_sample_rate,
+                                               generator.resample_mode)[0]
+                batch.append(Variant(index, generator.get_parameters(), key, num_frames, max(num_frames, new_length)))
+            else:
+                sounds[index] = generator.render_sound()
+
+        # Batch variants of similar length together, so little of each batch is padding
+        batch.sort(key=lambda variant: variant.width)
+
+        start = 0
+        while start < len(batch):
+            end = start + 1
+            while (end < len(batch) and (end + 1 - start) * batch[end].width <= BATCH_SAMPLES and
+                   batch[end].width <= MAX_LENGTH_RATIO * batch[start].width):
+                end += 1
+
+            for variant, sound in zip(batch[start:end], render_batch(generator, batch[start:end])):
+                generator.render_cache.put(variant.key, sound)
+                sounds[variant.index] = sound
+
+            start = end
+    finally:
+        generator.apply_parameters(saved_parameters)
+        generator.sound_valid = saved_valid
+
+    return sounds
+
+
+def render_batch(generator, batch):
+    """
+    Renders a batch of oscillator variants together.
+
+    Args:
+        generator (Generator): Generator whose format (sample rate, channels, resample mode, dither) to render in
+        batch (list): The Variants
+    Returns:
+        (list) Float sounds (DynSound) for the variants, in the same order
+    """
+
+    sample_rate = generator.mixer_sample_rate
+
+    # Variants that only differ from the echoes on (e.g. the same pickup with more echoes) share one voice up to there
+    voice_rows = []
+    voices = []
+    voice_indices = {}
+    for variant in batch:
+        voice_key = tuple(variant.parameters[name] for name in VOICE_PARAMETERS)
+        if voice_key not in voice_indices:
+            voice_indices[voice_key] = len(voices)
+            voices.append(variant)
+        voice_rows.append(voice_indices[voice_key])
+
+    def column(name):
+        """Returns one parameter of every voice, as an array"""
+
+        return numpy.array([float(voice.parameters[name]) for voice in voices])
+
+    waves = BatchWaves(voices, sample_rate, generator.mixer_num_channels)
+    multipliers = column("frequency")
+    shifts = column("frequency_shift")
+
+    if generator.resample_mode == "nearest":
+        samples, lengths = repitch_nearest(waves, multipliers, shifts, sample_rate)
+    elif generator.resample_mode == "sinc":
+        samples, lengths = repitch_sinc(waves, multipliers, shifts, sample_rate)
+    else:
+        samples, lengths = repitch_polynomial(waves, multipliers, shifts, sample_rate, generator.resample_mode)
+
+    # Plops: one gate per row, from the same running sums as envelope.gate
+    rates = column("plops")
+    plopped = rates > 0.0001
+    if numpy.any(plopped):
+        gains = envelope.gates(lengths[plopped], sample_rate, rates[plopped])
+        rows = samples[plopped]
+        numpy.multiply(rows[:, :gains.shape[1]], gains, out=rows[:, :gains.shape[1]], casting="unsafe")
+        samples[plopped] = rows
+
+    echo_counts = numpy.array([variant.parameters["echoes"] for variant in batch], dtype=numpy.intp)
+    samples, lengths = echo(samples[voice_rows], lengths[voice_rows], echo_counts, sample_rate)
+
+    sounds = []
+    for row, variant in enumerate(batch):
+        # Each sound gets a buffer of its own, so the render cache can keep or drop it alone
+        sound = DynSound(num_frames=lengths[row], num_channels=generator.mixer_num_channels, sample_rate=sample_rate,
+                         floating=True)
+        sound.dither = generator.dither
+        sound.samples[...] = samples[row, :lengths[row], numpy.newaxis]
+
+        # The stages that don't broadcast run on each sound, as in the effect chain
+        if variant.parameters["filter"] != "none":
+            sound.apply_filter(variant.parameters["filter"], variant.parameters["filter_frequency"])
+
+        if variant.parameters["reverb_wet"] > 0 and (variant.parameters["reverb"] > 0 or variant.parameters["reverb_ir"]):
+            generator.apply_parameters(variant.parameters)
+            sound.add_reverb(generator.get_impulse_response(), variant.parameters["reverb_wet"])
+
+        sounds.append(sound)
+
+    return sounds
+
+
+class BatchWaves:
+    """
+    The base waves of a batch of variants, after the volume stage, evaluated on demand at any frames. A frame's value
+    is the same however it is looked up, so it equals the frame of a fully rendered wave.
+
+    Attributes:
+        lengths (numpy.ndarray): Length of each variant's wave, in frames
+        pitches (numpy.ndarray): Frequency of each variant's wave in hZ
+        waveforms (list): Waveform of each variant (see oscillator.WAVEFORMS)
+        gains (numpy.ndarray): Float32 volume multiplier of each variant
+        sample_rate (int): Sample rate
+        sample_min (float): Lowest sample value of the output format
+        sample_max (float): Highest sample value of the output format
+    """
+
+    lengths = None
+    pitches = None
+    waveforms = None
+    gains = None
+    sample_rate = 0
+    sample_min = 0
+    sample_max = 0
+
+    def __init__(self, batch, sample_rate, num_channels):
+        """
+        Collects the wave parameters of a batch.
+
+        Args:
+            batch (list): The Variants
+            sample_rate (int): Sample rate
+            num_channels (int): Number of channels of the output format
+        """
+
+        template = DynSound(num_frames=0, num_channels=num_channels, sample_rate=sample_rate, floating=True)
+
+        self.lengths = numpy.array([variant.num_frames for variant in batch], dtype=numpy.intp)
+        self.pitches = numpy.array([float(variant.parameters["pitch"]) for variant in batch])
+        self.waveforms = [variant.parameters["waveform"] for variant in batch]
+        self.gains = numpy.array([effects.db_to_multiplier(variant.parameters["volume"]) for variant in batch],
+                                 dtype=numpy.float32)
+        self.sample_rate = sample_rate
+        self.sample_min = template.sample_min
+        self.sample_max = template.sample_max
+
+    def sample(self, rows, frames):
+        """
+        Evaluates the waves at some frames.
+
+        Args:
+            rows (numpy.ndarray): Variant of each frame to evaluate, broadcast against frames (e.g. a column for rows
+                                  of frames, or a row for columns of frames)
+            frames (numpy.ndarray): Frame indices within each variant's wave
+        Returns:
+            (numpy.ndarray) Float32 samples, silent for frames outside the wave
+        """
+
+        frames = numpy.broadcast_arrays(rows, frames)[1]
+        frame_times = frames.astype(numpy.float64)
+        waveforms = sorted(set(self.waveforms))
+
+        if len(waveforms) == 1:
+            waves = self.evaluate(waveforms[0], rows, frame_times)
+        else:
+            waves = numpy.empty(frames.shape)
+            frame_rows = numpy.broadcast_to(rows, frames.shape)
+
+            for waveform in waveforms:
+                selected = numpy.array([name == waveform for name in self.waveforms])[frame_rows]
+                waves[selected] = self.evaluate(waveform, frame_rows[selected], frame_times[selected])
+
+        # Scale to the sample range the same way oscillator.fill does, then apply the volume like change_volume
+        centre_value = (self.sample_min + self.sample_max) / 2
+        waves *= self.sample_max - centre_value
+        waves += centre_value
+        numpy.clip(waves, self.sample_min, self.sample_max, out=waves)
+
+        samples = waves.astype(numpy.float32)
+        samples *= self.gains[rows]
+        samples[(frames < 0) | (frames >= self.lengths[rows])] = 0.0
+
+        return samples
+
+    def evaluate(self, waveform, rows, frame_times):
+        """
+        Evaluates one waveform, between -1 and 1.
+
+        Args:
+            waveform (string): The waveform of the rows
+            rows (numpy.ndarray): Variant of each frame to evaluate, broadcast against frame_times
+            frame_times (numpy.ndarray): Float frame indices within each row's wave (rows x frames)
+        Returns:
+            (numpy.ndarray) The wave values
+        """
+
+        pitches = self.pitches[rows]
+
+        if waveform == "sine":
+            # The same expression as oscillator.generate, so each frame matches a full render exactly
+            return numpy.sin(2.0 * math.pi * pitches * frame_times / self.sample_rate)
+
+        # The same phases as oscillator.phase_ramp
+        phases = frame_times * (pitches / self.sample_rate)
+        numpy.mod(phases, 1.0, out=phases)
+
+        return oscillator.naive_waveform(waveform, phases)
+
+
+def repitched_lengths(lengths, multipliers, shifts, sample_rate, mode):
+    """
+    Calculates the length of every variant after its repitch, like DynSound.change_frequency and
+    change_frequency_shifting.
+
+    Args:
+        lengths (numpy.ndarray): Length of each variant, in frames
+        multipliers (numpy.ndarray): Frequency multiplier of each variant
+        shifts (numpy.ndarray): Frequency shift of each variant, per second
+        sample_rate (int): Sample rate
+        mode (string): Resampling mode (see resample.MODES)
+    Returns:
+        (numpy.ndarray) The new lengths
+    """
+
+    new_lengths = lengths.copy()
+
+    for row in xrange(lengths.shape[0]):
+        if shifts[row] != 0.0:
+            if mode == "nearest":
+                new_lengths[row] = effects.shifting_length(lengths[row], sample_rate, multipliers[row], shifts[row])
+            else:
+                new_lengths[row] = resample.sweep_length(lengths[row], sample_rate, multipliers[row], shifts[row])
+        elif multipliers[row] != 1.0:
+            new_lengths[row] = int(math.ceil(lengths[row] / float(multipliers[row])))
+
+    return new_lengths
+
+
+def repitch_nearest(waves, multipliers, shifts, sample_rate):
+    """
+    Repitches with the original index maps (see effects.frequency_index_map and effects.shifting_index_map), built for
+    every variant at once and only as far as each repitched sound reaches.
+
+    Args:
+        waves (BatchWaves): The base waves
+        multipliers (numpy.ndarray): Frequency multiplier of each variant
+        shifts (numpy.ndarray): Frequency shift of each variant, per second
+        sample_rate (int): Sample rate
+    Returns:
+        (tuple) The repitched float32 waves (variants x frames, silent past each end) and their lengths
+    """
+
+    lengths = waves.lengths
+    new_lengths = repitched_lengths(lengths, multipliers, shifts, sample_rate, "nearest")
+    constant = (shifts == 0.0) & (multipliers != 1.0)
+    shifting = shifts != 0.0
+
+    # A shifting repitch maps the original length and is then cut or padded with silence to its new length
+    valid_lengths = numpy.where(shifting, numpy.minimum(new_lengths, lengths), new_lengths)
+
+    width = max(int(new_lengths.max()), 1)
+    frames = numpy.arange(width)
+    index_map = numpy.tile(frames, (lengths.shape[0], 1))
+
+    if numpy.any(constant):
+        rows = numpy.flatnonzero(constant)
+        grabs = (frames * multipliers[rows, numpy.newaxis]).astype(numpy.intp)
+
+        # Frames from the first grab past the end of the sound keep their original position
+        past_end = numpy.logical_or.accumulate(grabs >= lengths[rows, numpy.newaxis], axis=1)
+        past_end &= multipliers[rows, numpy.newaxis] > 1.0
+        index_map[rows] = numpy.where(past_end, frames, grabs)
+
+    if numpy.any(shifting):
+        rows = numpy.flatnonzero(shifting)
+        frame_times = frames.astype(numpy.float64)
+        grabs = (frame_times * (multipliers[rows, numpy.newaxis] +
+                                frame_times / sample_rate * shifts[rows, numpy.newaxis])).astype(numpy.intp)
+
+        # Stop at the first grab outside the sound; the rest of the sound is left alone
+        stopped = numpy.logical_or.accumulate((grabs >= lengths[rows, numpy.newaxis]) | (grabs < 0), axis=1)
+        stopped |= frames >= lengths[rows, numpy.newaxis]
+        shifted = numpy.where(stopped, frames, grabs)
+
+        # Grabs from earlier frames read the already-repitched value: chase them back, every variant at once
+        flat_grabs = grabs.ravel()
+        flat_map = shifted.ravel()
+        row_starts = numpy.repeat(numpy.arange(rows.shape[0]) * width, width)
+        chasing = numpy.flatnonzero(~stopped.ravel() & (flat_map < numpy.tile(frames, rows.shape[0])))
+        while chasing.shape[0]:
+            previous = flat_map[chasing]
+            flat_map[chasing] = flat_grabs[row_starts[chasing] + previous]
+            chasing = chasing[flat_map[chasing] < previous]
+
+        index_map[rows] = shifted
+
+    # The wave is only evaluated at the frames the maps read
+    index_map[frames >= valid_lengths[:, numpy.newaxis]] = -1
+    samples = waves.sample(numpy.arange(lengths.shape[0])[:, numpy.newaxis], index_map)
+
+    return samples, new_lengths
+
+
+def repitch_polynomial(waves, multipliers, shifts, sample_rate, mode):
+    """
+    Repitches with linear or cubic interpolation, like resample.resample and resample_sweep, reading every variant at
+    once.
+
+    Args:
+        waves (BatchWaves): The base waves
+        multipliers (numpy.ndarray): Frequency multiplier of each variant
+        shifts (numpy.ndarray): Frequency shift of each variant, per second
+        sample_rate (int): Sample rate
+        mode (string): "linear" or "cubic"
+    Returns:
+        (tuple) The repitched float32 waves (variants x frames, silent past each end) and their lengths
+    """
+
+    lengths = waves.lengths
+    positions = []
+    for row in xrange(lengths.shape[0]):
+        if shifts[row] != 0.0:
+            positions.append(resample.sweep_positions(lengths[row], sample_rate, multipliers[row], shifts[row]))
+        elif multipliers[row] != 1.0:
+            positions.append(resample.constant_positions(lengths[row], multipliers[row]))
+        else:
+            # Not repitched: reading whole frames gives the wave back unchanged
+            positions.append(numpy.arange(lengths[row], dtype=numpy.float64))
+
+    new_lengths = numpy.array([row_positions.shape[0] for row_positions in positions], dtype=numpy.intp)
+    rows = numpy.repeat(numpy.arange(lengths.shape[0]), new_lengths)
+    all_positions = numpy.concatenate(positions)
+
+    # The same taps as resample.interpolate, with the wave evaluated at just the frames each tap reads. Each tap is a
+    # row (taps x frames), so every step runs along contiguous memory
+    whole = numpy.floor(all_positions).astype(numpy.intp)
+    offsets, weights = resample.polynomial_taps(all_positions - whole, mode)
+    tap_frames = whole[numpy.newaxis] + numpy.array(offsets)[:, numpy.newaxis]
+
+    # Variants whose taps would read most frames more than once (those played slower, or not repitched) are
+    # evaluated in full once instead, and their taps read from that
+    dense = len(offsets) * new_lengths > lengths
+
+    if not numpy.any(dense):
+        tap_samples = waves.sample(rows[numpy.newaxis], tap_frames)
+    else:
+        dense_frames = dense[rows]
+        tap_samples = numpy.empty(tap_frames.shape, dtype=numpy.float32)
+
+        if not numpy.all(dense):
+            tap_samples[:, ~dense_frames] = waves.sample(rows[numpy.newaxis, ~dense_frames], tap_frames[:, ~dense_frames])
+
+        # Full waves with a silent frame before and two after, for the taps that reach past the ends
+        dense_rows = numpy.flatnonzero(dense)
+        full_waves = waves.sample(dense_rows[:, numpy.newaxis],
+                                  numpy.arange(-1, int(lengths[dense].max()) + 2)[numpy.newaxis])
+        slots = numpy.cumsum(dense) - 1
+        tap_samples[:, dense_frames] = full_waves[slots[rows[dense_frames]][numpy.newaxis], tap_frames[:, dense_frames] + 1]
+
+    resampled = numpy.zeros(all_positions.shape[0])
+    for tap in xrange(len(offsets)):
+        resampled += weights[tap] * tap_samples[tap]
+
+    # Each variant's frames follow on from the last's in resampled
+    output = numpy.zeros((lengths.shape[0], max(int(new_lengths.max()), 1)), dtype=numpy.float32)
+    starts = numpy.cumsum(new_lengths) - new_lengths
+    for row in xrange(lengths.shape[0]):
+        output[row, :new_lengths[row]] = resampled[starts[row]:starts[row] + new_lengths[row]]
+
+    return output, new_lengths
+
+
+def repitch_sinc(waves, multipliers, shifts, sample_rate):
+    """
+    Repitches with windowed-sinc interpolation. The anti-aliasing filter depends on each variant's ratio, so each
+    variant is rendered in full and resampled on its own.
+
+    Args:
+        waves (BatchWaves): The base waves
+        multipliers (numpy.ndarray): Frequency multiplier of each variant
+        shifts (numpy.ndarray): Frequency shift of each variant, per second
+        sample_rate (int): Sample rate
+    Returns:
+        (tuple) The repitched float32 waves (variants x frames, silent past each end) and their lengths
+    """
+
+    lengths = waves.lengths
+    new_lengths = repitched_lengths(lengths, multipliers, shifts, sample_rate, "sinc")
+    output = numpy.zeros((lengths.shape[0], max(int(new_lengths.max()), 1)), dtype=numpy.float32)
+
+    for row in xrange(lengths.shape[0]):
+        wave = waves.sample(numpy.array([[row]]), numpy.arange(lengths[row])[numpy.newaxis]).T
+
+        if shifts[row] != 0.0:
+            wave = resample.resample_sweep(wave, sample_rate, multipliers[row], shifts[row], "sinc")
+        elif multipliers[row] != 1.0:
+            wave = resample.resample(wave, multipliers[row], "sinc")
+
+        output[row, :new_lengths[row]] = wave[:, 0]
+
+    return output, new_lengths
+
+
+def echo(samples, lengths, echo_counts, sample_rate, delay=0.3, volume_change=-4):
+    """
+    Adds every variant's echoes, like DynSound.add_echo. Each tap is added to all the variants that have it at once.
+
+    Args:
+        samples (numpy.ndarray): Float32 waves (variants x frames), silent past each variant's end
+        lengths (numpy.ndarray): Length of each variant, in frames
+        echo_counts (numpy.ndarray): Number of echoes of each variant
+        sample_rate (int): Sample rate
+        delay (float): Delay of each echo, in seconds
+        volume_change (float): Volume change per echo, in dB
+    Returns:
+        (tuple) The echoed waves and their lengths
+    """
+
+    max_echoes = int(echo_counts.max())
+    if max_echoes <= 0:
+        return samples, lengths
+
+    delays = [int(delay * (i + 1) * sample_rate) for i in xrange(0, max_echoes)]
+    new_lengths = numpy.where(echo_counts > 0, lengths + numpy.take(delays, numpy.maximum(echo_counts - 1, 0)), lengths)
+
+    output = numpy.zeros((samples.shape[0], samples.shape[1] + delays[-1]), dtype=numpy.float32)
+    output[:, :samples.shape[1]] = samples
+    tap = numpy.empty(samples.shape, dtype=numpy.float32)
+
+    for i, tap_delay in enumerate(delays):
+        # The tap is silent in the variants with fewer echoes
+        multipliers = numpy.where(echo_counts > i, effects.db_to_multiplier(volume_change * (i + 1)), 0.0)
+        numpy.multiply(samples, multipliers.astype(numpy.float32)[:, numpy.newaxis], out=tap)
+        output[:, tap_delay:tap_delay + samples.shape[1]] += tap
+
+    return output, new_lengths
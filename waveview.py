@@ -0,0 +1,416 @@
+import math
+
+import numpy
+import Tkinter
+
+
+# Frames per spectrogram window
+FFT_SIZE = 512
+
+# Colours of the spectrogram from quiet to loud, blended into SPECTROGRAM_PALETTE
+PALETTE_COLOURS = [(0, 0, 0), (0, 0, 160), (160, 0, 160), (255, 64, 0), (255, 255, 0), (255, 255, 255)]
+PALETTE_SIZE = 64
+
+
+def make_palette(colours, size):
+    """
+    Blends a list of colours into a smooth ramp of Tk colour strings.
+
+    Args:
+        colours (list): (red, green, blue) tuples (0-255), from the start of the ramp to the end
+        size (int): Number of colours in the ramp
+    Returns:
+        (numpy.ndarray) Colour strings such as "#ff8000"
+    """
+
+    positions = numpy.linspace(0, len(colours) - 1, size)
+    anchors = numpy.arange(len(colours))
+    components = [numpy.interp(positions, anchors, [colour[i] for colour in colours]).astype(int) for i in xrange(3)]
+
+    return numpy.array(["#%02x%02x%02x" % rgb for rgb in zip(*components)], dtype=object)
+
+
+SPECTROGRAM_PALETTE = make_palette(PALETTE_COLOURS, PALETTE_SIZE)
+
+
+class MinMaxPyramid:
+    """
+    Min/max decimation pyramid of a sound, for drawing it at any zoom. Level 0 holds the lowest and highest sample (of
+    any channel) in each block of block_size frames, and each level above merges pairs of blocks from the level below.
+    A view is drawn from the level with one to two blocks per pixel column, so the cost grows with the number of
+    columns, not the number of frames.
+
+    Attributes:
+        samples (numpy.ndarray): The sound's samples (frames x channels), read directly when zoomed in past level 0
+        block_size (int): Frames per block at level 0
+        mins (list): Lowest sample of each block (numpy.ndarray), by level
+        maxs (list): Highest sample of each block (numpy.ndarray), by level
+    """
+
+    samples = None
+    block_size = 16
+    mins = None
+    maxs = None
+
+    def __init__(self, samples=None, block_size=16):
+        """
+        Creates a pyramid, building it for a sound's samples if given.
+
+        Args:
+            samples (numpy.ndarray): Samples (frames x channels), or None for an empty pyramid
+            block_size (int): Frames per block at level 0
+        """
+
+        self.samples = numpy.zeros((0, 1), dtype=numpy.float32)
+        self.block_size = block_size
+        self.mins = [numpy.zeros(0, dtype=numpy.float32)]
+        self.maxs = [numpy.zeros(0, dtype=numpy.float32)]
+
+        if samples is not None:
+            self.update(samples)
+
+    def update(self, samples, start=0, end=None):
+        """
+        Updates the pyramid for a sound whose frames from start to end are new or have changed, e.g. a buffer being
+        filled one block at a time. Only the blocks covering those frames are recomputed, at every level. If the
+        length of the sound has changed, every frame from the old or new end (whichever is first) counts as changed.
+
+        Args:
+            samples (numpy.ndarray): All of the sound's samples (frames x channels)
+            start (int): First changed frame
+            end (int): Frame after the last changed frame, or None for the end of the sound
+        """
+
+        old_num_frames = self.samples.shape[0]
+        num_frames = samples.shape[0]
+        self.samples = samples
+
+        if end is None or num_frames != old_num_frames:
+            end = num_frames
+            start = min(start, old_num_frames, num_frames)
+
+        # Changed blocks at level 0, recomputed from the frames
+        first = start // self.block_size
+        last = -(-end // self.block_size)
+        self.resize_level(0, -(-num_frames // self.block_size))
+
+        if first < last:
+            frames = samples[first * self.block_size:min(last * self.block_size, num_frames)]
+            starts = numpy.arange(0, frames.shape[0], self.block_size)
+            self.mins[0][first:last] = numpy.minimum.reduceat(frames.min(axis=1), starts)
+            self.maxs[0][first:last] = numpy.maximum.reduceat(frames.max(axis=1), starts)
+
+        # Each level above merges pairs of blocks, up to a level with a single block
+        level = 0
+        while self.mins[level].shape[0] > 1:
+            below_length = self.mins[level].shape[0]
+            first //= 2
+            last = -(-last // 2)
+            self.resize_level(level + 1, -(-below_length // 2))
+
+            if first < last:
+                pairs = numpy.arange(0, min(2 * last, below_length) - 2 * first, 2)
+                self.mins[level + 1][first:last] = numpy.minimum.reduceat(self.mins[level][2 * first:2 * last], pairs)
+                self.maxs[level + 1][first:last] = numpy.maximum.reduceat(self.maxs[level][2 * first:2 * last], pairs)
+
+            level += 1
+
+        # Forget levels left over from a longer sound
+        del self.mins[level + 1:]
+        del self.maxs[level + 1:]
+
+    def resize_level(self, level, length):
+        """
+        Makes a level hold length blocks, keeping the blocks it already has.
+
+        Args:
+            level (int): The level, at most one above the highest level so far
+            length (int): Number of blocks
+        """
+
+        if level == len(self.mins):
+            self.mins.append(numpy.zeros(length, dtype=numpy.float32))
+            self.maxs.append(numpy.zeros(length, dtype=numpy.float32))
+        elif self.mins[level].shape[0] != length:
+            for levels in (self.mins, self.maxs):
+                blocks = numpy.zeros(length, dtype=numpy.float32)
+                kept = min(length, levels[level].shape[0])
+                blocks[:kept] = levels[level][:kept]
+                levels[level] = blocks
+
+    def get_columns(self, start, end, num_columns):
+        """
+        Finds the lowest and highest sample drawn in each pixel column of a view of the sound.
+
+        Args:
+            start (float): First frame of the view
+            end (float): Frame after the last frame of the view
+            num_columns (int): Width of the view, in pixels
+        Returns:
+            (numpy.ndarray, numpy.ndarray) Lowest and highest sample in each column
+        """
+
+        num_frames = self.samples.shape[0]
+        start = max(0.0, min(float(start), num_frames))
+        end = max(start, min(float(end), num_frames))
+
+        if num_frames == 0 or end <= start:
+            return numpy.zeros(num_columns, dtype=numpy.float32), numpy.zeros(num_columns, dtype=numpy.float32)
+
+        frames_per_column = (end - start) / num_columns
+        column_starts = start + numpy.arange(num_columns) * frames_per_column
+
+        if frames_per_column < self.block_size:
+            # Zoomed in past level 0: fewer than block_size frames per column, so read the frames themselves. A column
+            # narrower than a frame shows the frame it falls in
+            first = int(start)
+            last = min(int(math.ceil(end)), num_frames)
+            frames = self.samples[first:last]
+            indices = (column_starts.astype(numpy.intp) - first).clip(0, last - first - 1)
+
+            return (numpy.minimum.reduceat(frames.min(axis=1), indices),
+                    numpy.maximum.reduceat(frames.max(axis=1), indices))
+
+        # The level whose blocks are between half a column and a whole column wide
+        level = min(int(math.log(frames_per_column / self.block_size, 2)), len(self.mins) - 1)
+        block_frames = self.block_size << level
+        first = int(start) // block_frames
+        last = min(-(-int(math.ceil(end)) // block_frames), self.mins[level].shape[0])
+        indices = (column_starts.astype(numpy.intp) // block_frames - first).clip(0, last - first - 1)
+
+        return (numpy.minimum.reduceat(self.mins[level][first:last], indices),
+                numpy.maximum.reduceat(self.maxs[level][first:last], indices))
+
+
+def spectrogram(samples, start, end, num_columns, num_rows, fft_size=FFT_SIZE):
+    """
+    Measures the loudness of each frequency around each pixel column of a view of a sound. One window of fft_size
+    frames is analysed per column, centred on it, so the cost grows with the number of columns, not the number of
+    frames in the view.
+
+    Args:
+        samples (numpy.ndarray): Samples of one channel, e.g. a mix of every channel (frames)
+        start (float): First frame of the view
+        end (float): Frame after the last frame of the view
+        num_columns (int): Width of the view, in pixels
+        num_rows (int): Height of the view, in pixels
+        fft_size (int): Frames per window
+    Returns:
+        (numpy.ndarray) Magnitudes (rows x columns), with the highest frequency in the top row
+    """
+
+    num_frames = samples.shape[0]
+    if num_frames == 0:
+        return numpy.zeros((num_rows, num_columns))
+
+    centres = (start + (numpy.arange(num_columns) + 0.5) * (end - start) / num_columns).astype(numpy.intp)
+    indices = centres[:, numpy.newaxis] + (numpy.arange(fft_size) - fft_size // 2)
+
+    # Windows hanging off either end of the sound are padded with silence
+    windows = samples[indices.clip(0, num_frames - 1)].astype(numpy.float64)
+    windows *= (indices >= 0) & (indices < num_frames)
+    windows *= numpy.hanning(fft_size)
+
+    magnitudes = numpy.abs(numpy.fft.rfft(windows, axis=1))
+
+    # Nearest frequency bin for each row, from the Nyquist frequency down to 0 Hz
+    bins = numpy.linspace(fft_size // 2, 0, num_rows).round().astype(numpy.intp)
+
+    return magnitudes[:, bins].T
+
+
+class WaveView:
+    """
+    Panel showing the current sound's waveform above its spectrogram. Scroll the mouse wheel over it to zoom in and out
+    around the pointer, drag it to scroll along the sound and double-click it to see the whole sound again.
+
+    The waveform is drawn from a MinMaxPyramid built once per sound, and the spectrogram from one window per pixel
+    column, so zooming and scrolling cost the same for a long sound as for a short one.
+
+    Attributes:
+        WIDTH (int): Width of the panel in pixels
+        WAVEFORM_HEIGHT (int): Height of the waveform in pixels
+        SPECTROGRAM_HEIGHT (int): Height of the spectrogram in pixels
+        ZOOM_STEP (float): How much of the view is kept by one step of the mouse wheel when zooming in
+        MIN_FRAMES (int): Fewest frames the view can be zoomed in to
+        DB_RANGE (float): Range of loudness shown by the spectrogram, in dB below full scale
+        BACKGROUND (string): Background colour of the waveform
+        WAVEFORM_COLOUR (string): Colour of the waveform
+
+        canvas (Tkinter.Canvas): Canvas the panel is drawn on
+        spectrogram_image (Tkinter.PhotoImage): Image of the spectrogram
+        waveform_item (int): Canvas id of the waveform polygon
+        time_item (int): Canvas id of the text showing the time range of the view
+        sound (DynSound): The sound shown, or None
+        pyramid (MinMaxPyramid): Decimation pyramid of the sound
+        mono_samples (numpy.ndarray): The sound's channels mixed together, for the spectrogram
+        view_start (float): First frame shown
+        view_end (float): Frame after the last frame shown
+        drag_x (int): Pointer position when the view was last dragged
+    """
+
+    WIDTH = 800
+    WAVEFORM_HEIGHT = 120
+    SPECTROGRAM_HEIGHT = 100
+    ZOOM_STEP = 0.8
+    MIN_FRAMES = 32
+    DB_RANGE = 90.0
+    BACKGROUND = "#202020"
+    WAVEFORM_COLOUR = "#00FF00"
+
+    canvas = None
+    spectrogram_image = None
+    waveform_item = None
+    time_item = None
+    sound = None
+    pyramid = None
+    mono_samples = None
+    view_start = 0.0
+    view_end = 0.0
+    drag_x = 0
+
+    def __init__(self, parent):
+        """
+        Creates the panel. Place it with canvas.grid (or pack).
+
+        Args:
+            parent (widget): The parent of the panel
+        """
+
+        self.pyramid = MinMaxPyramid()
+        self.mono_samples = numpy.zeros(0, dtype=numpy.float32)
+
+        self.canvas = Tkinter.Canvas(parent, width=self.WIDTH, height=self.WAVEFORM_HEIGHT + self.SPECTROGRAM_HEIGHT,
+                                     background=self.BACKGROUND, highlightthickness=0)
+
+        self.canvas.create_line(0, self.WAVEFORM_HEIGHT / 2, self.WIDTH, self.WAVEFORM_HEIGHT / 2, fill="#404040")
+        self.waveform_item = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill=self.WAVEFORM_COLOUR, outline=self.WAVEFORM_COLOUR)
+        self.time_item = self.canvas.create_text(4, 4, anchor=Tkinter.NW, fill="#FFFFFF", font=("Courier", 9))
+
+        self.spectrogram_image = Tkinter.PhotoImage(width=self.WIDTH, height=self.SPECTROGRAM_HEIGHT)
+        self.canvas.create_image(0, self.WAVEFORM_HEIGHT, anchor=Tkinter.NW, image=self.spectrogram_image)
+
+        # Linux sends the mouse wheel as buttons 4 and 5; Windows and macOS as MouseWheel events
+        self.canvas.bind("<MouseWheel>", lambda event: self.on_mouse_wheel(event, event.delta > 0))
+        self.canvas.bind("<Button-4>", lambda event: self.on_mouse_wheel(event, True))
+        self.canvas.bind("<Button-5>", lambda event: self.on_mouse_wheel(event, False))
+        self.canvas.bind("<ButtonPress-1>", lambda event: self.on_drag_start(event))
+        self.canvas.bind("<B1-Motion>", lambda event: self.on_drag(event))
+        self.canvas.bind("<Double-Button-1>", lambda event: self.reset_view())
+
+    def show(self, sound):
+        """
+        Shows a sound, keeping the view if the sound is as long as the last one.
+
+        Args:
+            sound (DynSound): The sound
+        """
+
+        if sound is None or (self.sound is not None and sound.samples is self.sound.samples):
+            # Nothing to show, or the same samples as before (e.g. a render served from the cache)
+            self.sound = sound or self.sound
+            return
+
+        is_same_length = self.sound is not None and sound.samples.shape[0] == self.sound.samples.shape[0]
+        self.sound = sound
+        self.pyramid.update(sound.samples)
+        self.mono_samples = sound.samples.mean(axis=1, dtype=numpy.float32)
+
+        if is_same_length:
+            self.redraw()
+        else:
+            self.reset_view()
+
+    def reset_view(self):
+        """Shows the whole sound"""
+
+        self.view_start = 0.0
+        self.view_end = float(self.pyramid.samples.shape[0])
+        self.redraw()
+
+    def set_view(self, start, num_frames):
+        """
+        Shows part of the sound, kept within the sound.
+
+        Args:
+            start (float): First frame to show
+            num_frames (float): Number of frames to show
+        """
+
+        total_frames = self.pyramid.samples.shape[0]
+        num_frames = max(min(num_frames, total_frames), min(self.MIN_FRAMES, total_frames))
+        start = max(0.0, min(start, total_frames - num_frames))
+
+        self.view_start = start
+        self.view_end = start + num_frames
+        self.redraw()
+
+    def on_mouse_wheel(self, event, zoom_in):
+        """
+        Zooms in or out one step, keeping the frame under the pointer where it is.
+
+        Args:
+            event (Tkinter.Event): The mouse wheel event
+            zoom_in (bool): Whether to zoom in (rather than out)
+        """
+
+        num_frames = self.view_end - self.view_start
+        new_num_frames = num_frames * (self.ZOOM_STEP if zoom_in else 1.0 / self.ZOOM_STEP)
+        pointer = min(max(event.x, 0), self.WIDTH) / float(self.WIDTH)
+
+        self.set_view(self.view_start + pointer * (num_frames - new_num_frames), new_num_frames)
+
+    def on_drag_start(self, event):
+        """Remembers where a drag started"""
+
+        self.drag_x = event.x
+
+    def on_drag(self, event):
+        """Scrolls the view along with the pointer"""
+
+        num_frames = self.view_end - self.view_start
+        self.set_view(self.view_start - (event.x - self.drag_x) * num_frames / self.WIDTH, num_frames)
+        self.drag_x = event.x
+
+    def redraw(self):
+        """Draws the waveform and spectrogram of the current view"""
+
+        if self.sound is None:
+            return
+
+        self.draw_waveform()
+        self.draw_spectrogram()
+
+        sample_rate = float(self.sound.sample_rate)
+        self.canvas.itemconfig(self.time_item, text="%.3fs - %.3fs" % (self.view_start / sample_rate, self.view_end / sample_rate))
+
+    def draw_waveform(self):
+        """Draws the waveform of the current view as one polygon: the highest samples left to right, then the lowest back"""
+
+        mins, maxs = self.pyramid.get_columns(self.view_start, self.view_end, self.WIDTH)
+
+        half_height = self.WAVEFORM_HEIGHT / 2.0
+        scale = (half_height - 1) / max(abs(self.sound.sample_min), self.sound.sample_max)
+        columns = numpy.arange(self.WIDTH)
+
+        points = numpy.empty((2 * self.WIDTH, 2))
+        points[:self.WIDTH, 0] = columns
+        points[:self.WIDTH, 1] = half_height - maxs.clip(self.sound.sample_min, self.sound.sample_max) * scale
+        points[self.WIDTH:, 0] = columns[::-1]
+        points[self.WIDTH:, 1] = (half_height - mins.clip(self.sound.sample_min, self.sound.sample_max) * scale)[::-1]
+
+        self.canvas.coords(self.waveform_item, *points.ravel().tolist())
+
+    def draw_spectrogram(self):
+        """Draws the spectrogram of the current view, in one update of the image"""
+
+        magnitudes = spectrogram(self.mono_samples, self.view_start, self.view_end, self.WIDTH, self.SPECTROGRAM_HEIGHT)
+
+        # Decibels below a full-scale sine, whose peak in a Hann window is a quarter of the window length
+        full_scale = max(abs(self.sound.sample_min), self.sound.sample_max) * FFT_SIZE / 4.0
+        decibels = 20 * numpy.log10(numpy.maximum(magnitudes / full_scale, 1e-10))
+
+        levels = ((decibels / self.DB_RANGE + 1.0) * (PALETTE_SIZE - 1)).clip(0, PALETTE_SIZE - 1).astype(numpy.intp)
+        colours = SPECTROGRAM_PALETTE[levels]
+
+        self.spectrogram_image.put(" ".join("{" + " ".join(row) + "}" for row in colours), to=(0, 0))
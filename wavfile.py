@@ -0,0 +1,310 @@
+import struct
+
+import numpy
+
+import effects
+
+
+# Output formats: (bytes per sample, WAV format tag)
+SAMPLE_FORMATS = {
+    "uint8": (1, 1),
+    "int16": (2, 1),
+    "int24": (3, 1),
+    "int32": (4, 1),
+    "float32": (4, 3),
+}
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Number of frames converted and written at a time
+CHUNK_FRAMES = 16384
+
+
+class WavWriter:
+    """
+    Streaming WAV file writer. Samples are written in chunks, so the whole sound never needs to be held in memory.
+
+    Attributes:
+        file (file): The open output file
+        num_channels (int): Number of channels
+        sample_rate (int): Sample rate
+        sample_format (string): Output sample format, one of SAMPLE_FORMATS
+        sample_min (int): Lowest value of the input samples
+        sample_max (int): Highest value of the input samples
+        dither (bool): Whether to dither when quantising to an integer format
+        num_frames (int): Number of frames written so far
+    """
+
+    file = None
+    num_channels = 2
+    sample_rate = 22050
+    sample_format = "int16"
+    sample_min = -32768
+    sample_max = 32767
+    dither = False
+    num_frames = 0
+
+    def __init__(self, file_name, num_channels, sample_rate, sample_format="int16", sample_min=-32768, sample_max=32767,
+                 dither=False):
+        """
+        Opens a WAV file for writing and writes a placeholder header.
+
+        Args:
+            file_name (string): The file name to save the sound with. File extension must be included.
+            num_channels (int): Number of channels
+            sample_rate (int): Sample rate
+            sample_format (string): Output sample format: "uint8", "int16", "int24", "int32" or "float32"
+            sample_min (int): Lowest value of the input samples
+            sample_max (int): Highest value of the input samples
+            dither (bool): Whether to dither when quantising to an integer format
+        """
+
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError("Unknown sample format: %s" % sample_format)
+
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.sample_min = sample_min
+        self.sample_max = sample_max
+        self.dither = dither
+        self.num_frames = 0
+
+        self.file = open(file_name, "wb")
+        self.write_header()
+
+    def write_header(self):
+        """Writes (or rewrites) the RIFF header for the frames written so far"""
+
+        sample_width, format_tag = SAMPLE_FORMATS[self.sample_format]
+        block_align = sample_width * self.num_channels
+        data_size = self.num_frames * block_align
+
+        if format_tag == WAVE_FORMAT_PCM:
+            fmt_chunk = struct.pack("<4sIHHIIHH", b"fmt ", 16, format_tag, self.num_channels, self.sample_rate,
+                                    self.sample_rate * block_align, block_align, sample_width * 8)
+            fact_chunk = b""
+        else:
+            # Non-PCM formats carry an extension size and a fact chunk with the frame count
+            fmt_chunk = struct.pack("<4sIHHIIHHH", b"fmt ", 18, format_tag, self.num_channels, self.sample_rate,
+                                    self.sample_rate * block_align, block_align, sample_width * 8, 0)
+            fact_chunk = struct.pack("<4sII", b"fact", 4, self.num_frames)
+
+        riff_size = 4 + len(fmt_chunk) + len(fact_chunk) + 8 + data_size + (data_size & 1)
+
+        self.file.seek(0)
+        self.file.write(struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE"))
+        self.file.write(fmt_chunk)
+        self.file.write(fact_chunk)
+        self.file.write(struct.pack("<4sI", b"data", data_size))
+
+    def convert(self, samples):
+        """
+        Converts a chunk of samples to the output format.
+
+        Args:
+            samples (numpy.ndarray): Samples (frames x channels) in the input range
+        Returns:
+            (numpy.ndarray) The samples, ready to be written as raw little-endian bytes
+        """
+
+        return convert(samples, self.sample_format, self.sample_min, self.sample_max, self.dither)
+
+    def write(self, samples):
+        """
+        Appends samples to the file, converting them one chunk at a time.
+
+        Args:
+            samples (numpy.ndarray): Samples (frames x channels) in the input range
+        """
+
+        for start in range(0, samples.shape[0], CHUNK_FRAMES):
+            chunk = numpy.ascontiguousarray(self.convert(samples[start:start + CHUNK_FRAMES]))
+
+            # Write the chunk's raw bytes without packing them into a string first
+            self.file.write(memoryview(chunk.reshape(-1).view(numpy.uint8)))
+
+        self.num_frames += samples.shape[0]
+
+    def close(self):
+        """Patches the header with the final length and closes the file"""
+
+        if self.file is None:
+            return
+
+        data_size = self.num_frames * SAMPLE_FORMATS[self.sample_format][0] * self.num_channels
+        if data_size & 1:
+            # RIFF chunks are padded to an even size
+            self.file.write(b"\0")
+
+        self.write_header()
+        self.file.close()
+        self.file = None
+
+
+def convert(samples, sample_format, sample_min=-32768, sample_max=32767, dither=False):
+    """
+    Converts samples to a WAV sample format.
+
+    Args:
+        samples (numpy.ndarray): Samples (frames x channels) in the input range
+        sample_format (string): Output sample format, one of SAMPLE_FORMATS
+        sample_min (int): Lowest value of the input samples
+        sample_max (int): Highest value of the input samples
+        dither (bool): Whether to dither when quantising to an integer format
+    Returns:
+        (numpy.ndarray) The samples, ready to be written as raw little-endian bytes. 24-bit samples are raw bytes
+                        (frames * channels x 3)
+    """
+
+    if sample_format == "int16" and samples.dtype == numpy.dtype("<i2") and samples.flags.c_contiguous:
+        # Already in the output format: use the array's memory as it is
+        return samples
+
+    # Normalise to -1..1
+    centre = (sample_min + sample_max + 1) / 2.0
+    values = samples.astype(numpy.float64)
+    values -= centre
+    values /= sample_max + 1 - centre
+
+    if sample_format == "float32":
+        return values.astype("<f4")
+
+    sample_width = SAMPLE_FORMATS[sample_format][0]
+    full_scale = 1 << (sample_width * 8 - 1)
+
+    values *= full_scale
+    effects.round_samples(values, dither)
+    numpy.clip(values, -full_scale, full_scale - 1, out=values)
+
+    if sample_format == "uint8":
+        # 8-bit WAVs are unsigned
+        return (values + full_scale).astype(numpy.uint8)
+    elif sample_format == "int24":
+        # Keep the low three bytes of each little-endian 32-bit sample
+        return values.astype("<i4").view(numpy.uint8).reshape(-1, 4)[:, :3]
+    else:
+        return values.astype("<i%d" % sample_width)
+
+
+def write_wav(file_name, samples, sample_rate, sample_format="int16", sample_min=-32768, sample_max=32767, dither=False):
+    """
+    Writes a block of samples to a WAV file.
+
+    Args:
+        file_name (string): The file name to save the sound with. File extension must be included.
+        samples (numpy.ndarray): Samples (frames x channels) to write
+        sample_rate (int): Sample rate
+        sample_format (string): Output sample format: "uint8", "int16", "int24", "int32" or "float32"
+        sample_min (int): Lowest value of the input samples
+        sample_max (int): Highest value of the input samples
+        dither (bool): Whether to dither when quantising to an integer format
+    """
+
+    writer = WavWriter(file_name, samples.shape[1], sample_rate, sample_format, sample_min, sample_max, dither)
+
+    try:
+        writer.write(samples)
+    finally:
+        writer.close()
+
+
+def read_wav(file_name):
+    """
+    Memory-maps the sample data of a WAV file. Nothing is decoded and the file is only read as samples are accessed.
+
+    Args:
+        file_name (string): The WAV file to read
+    Returns:
+        (numpy.ndarray, int, string) A copy-on-write view of the samples (frames x channels), the sample rate and the
+                                     sample format. 24-bit samples are viewed as raw bytes (frames x channels x 3)
+    """
+
+    with open(file_name, "rb") as wav:
+        riff, riff_size, wave_id = struct.unpack("<4sI4s", wav.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError("Not a WAV file: %s" % file_name)
+
+        fmt = None
+        while True:
+            header = wav.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV file has no data chunk: %s" % file_name)
+
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                fmt = wav.read(chunk_size)
+                wav.seek(chunk_size & 1, 1)
+            elif chunk_id == b"data":
+                data_offset = wav.tell()
+                data_size = chunk_size
+                break
+            else:
+                # Skip any other chunks (padded to an even size)
+                wav.seek(chunk_size + (chunk_size & 1), 1)
+
+        wav.seek(0, 2)
+        file_size = wav.tell()
+
+    if fmt is None:
+        raise ValueError("WAV file has no fmt chunk: %s" % file_name)
+
+    format_tag, num_channels, sample_rate, byte_rate, block_align, bits_per_sample = struct.unpack("<HHIIHH", fmt[:16])
+
+    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+        # The real format tag is the start of the sub-format GUID
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+
+    sample_format = None
+    for name, (sample_width, tag) in SAMPLE_FORMATS.items():
+        if tag == format_tag and sample_width * 8 == bits_per_sample:
+            sample_format = name
+
+    if sample_format is None:
+        raise ValueError("Unsupported WAV format (tag %d, %d bits): %s" % (format_tag, bits_per_sample, file_name))
+
+    # Some writers leave the data size unset or too large, so never map past the end of the file
+    num_frames = min(data_size, file_size - data_offset) // block_align
+
+    if sample_format == "int24":
+        shape = (num_frames, num_channels, 3)
+        dtype = numpy.uint8
+    else:
+        shape = (num_frames, num_channels)
+        dtype = {"uint8": numpy.uint8, "int16": "<i2", "int32": "<i4", "float32": "<f4"}[sample_format]
+
+    if num_frames == 0:
+        return numpy.zeros(shape, dtype=dtype), sample_rate, sample_format
+
+    samples = numpy.memmap(file_name, dtype=dtype, mode="c", offset=data_offset, shape=shape)
+
+    return samples, sample_rate, sample_format
+
+
+def normalise(samples, sample_format):
+    """
+    Converts samples in a WAV sample format to floats between -1 and 1.
+
+    Args:
+        samples (numpy.ndarray): Samples as returned by read_wav
+        sample_format (string): Sample format of the samples
+    Returns:
+        (numpy.ndarray) The normalised samples (frames x channels)
+    """
+
+    if sample_format == "float32":
+        return samples.astype(numpy.float64)
+    elif sample_format == "uint8":
+        return (samples.astype(numpy.float64) - 128.0) / 128.0
+    elif sample_format == "int24":
+        # Assemble the three little-endian bytes and sign-extend them
+        values = samples[..., 0].astype(numpy.int32)
+        values |= samples[..., 1].astype(numpy.int32) << 8
+        values |= samples[..., 2].astype(numpy.int32) << 16
+        values[values >= 1 << 23] -= 1 << 24
+        return values / float(1 << 23)
+    else:
+        return samples / float(1 << (SAMPLE_FORMATS[sample_format][0] * 8 - 1))